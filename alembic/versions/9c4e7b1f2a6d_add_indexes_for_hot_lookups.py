@@ -0,0 +1,60 @@
+"""Add indexes for hot lookups
+
+Revision ID: 9c4e7b1f2a6d
+Revises: 3f1a9c2d7e5b
+Create Date: 2026-10-18 01:12:40.208113
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e7b1f2a6d'
+down_revision: str | None = '3f1a9c2d7e5b'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Groups and lecturers were cached lazily, so the same row could be added twice.
+    # Keep the first row of each duplicate and move references to it, otherwise unique indexes can't be created.
+    op.execute(
+        "UPDATE users SET saved_group_id = ("
+        " SELECT MIN(duplicate.id) FROM groups AS saved"
+        " JOIN groups AS duplicate ON duplicate.group_id = saved.group_id"
+        " WHERE saved.id = users.saved_group_id)"
+        " WHERE saved_group_id IS NOT NULL"
+    )
+    op.execute(
+        "UPDATE users SET saved_lecturer_id = ("
+        " SELECT MIN(duplicate.id) FROM lecturers AS saved"
+        " JOIN lecturers AS duplicate ON duplicate.lecturer_id = saved.lecturer_id AND duplicate.chair_id = saved.chair_id"
+        " WHERE saved.id = users.saved_lecturer_id)"
+        " WHERE saved_lecturer_id IS NOT NULL"
+    )
+    # Cached schedules of duplicates are dropped, they will be fetched again
+    op.execute("DELETE FROM group_schedules WHERE group_id NOT IN ("
+               " SELECT id FROM (SELECT MIN(id) AS id FROM groups GROUP BY group_id) AS kept)")
+    op.execute("DELETE FROM lecturer_schedules WHERE lecturer_id NOT IN ("
+               " SELECT id FROM (SELECT MIN(id) AS id FROM lecturers GROUP BY lecturer_id, chair_id) AS kept)")
+    op.execute("DELETE FROM groups WHERE id NOT IN ("
+               " SELECT id FROM (SELECT MIN(id) AS id FROM groups GROUP BY group_id) AS kept)")
+    op.execute("DELETE FROM lecturers WHERE id NOT IN ("
+               " SELECT id FROM (SELECT MIN(id) AS id FROM lecturers GROUP BY lecturer_id, chair_id) AS kept)")
+    
+    op.create_index('ix_groups_group_id', 'groups', ['group_id'], unique=True)
+    op.create_index('ix_lecturers_lecturer_id_chair_id', 'lecturers', ['lecturer_id', 'chair_id'], unique=True)
+    op.create_index('ix_notes_user_id_timestamp', 'notes', ['user_id', 'timestamp'], unique=False)
+    op.create_index('ix_notes_chat_id_timestamp', 'notes', ['chat_id', 'timestamp'], unique=False)
+    op.create_index('ix_stats_timestamp', 'stats', ['timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stats_timestamp', table_name='stats')
+    op.drop_index('ix_notes_chat_id_timestamp', table_name='notes')
+    op.drop_index('ix_notes_user_id_timestamp', table_name='notes')
+    op.drop_index('ix_lecturers_lecturer_id_chair_id', table_name='lecturers')
+    op.drop_index('ix_groups_group_id', table_name='groups')
@@ -1,7 +1,10 @@
-from .formatting import format_schedule
+from .formatting import format_changes, format_schedule
 from .api import client
+from .ratelimit import RequestPriority
 
 __all__ = [
     'format_schedule',
-    'client'
+    'format_changes',
+    'client',
+    'RequestPriority',
 ]
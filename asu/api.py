@@ -1,65 +1,198 @@
 import asyncio
-from datetime import date, datetime
+from collections.abc import AsyncIterator, Mapping
+from datetime import date, datetime, timedelta
 import logging
-from typing import Any
+import re
+import time
+from types import TracebackType
+from typing import Any, TypeVar
 
 import httpx
+import msgspec
 from sqlalchemy import select
 
-from database.db import create_session
-from database.models import Faculty, Group, Lecturer
+from database.db import create_session, upsert
+from database.models import Group, Lecturer
 import database.models as models
 from settings import Settings
 from utils.daterange import DateRange
-
-from .timetable import Lesson, Room, Subject, TimeTable
+from utils.metrics import register_cache, registry
+from utils.tracing import Span, finish_span, span, start_span
+
+from .cache import ScheduleDatabaseCache, ScheduleMemoryCache
+from .faculties import FacultyMap
+from .interning import intern_string
+from .ratelimit import RequestPriority, TokenBucketRateLimiter
+from .schemas import (ChairsResponse, GroupRecord, GroupsResponse, LecturerRecord, LecturersResponse, LessonRecord,
+                      ScheduleResponse, chairs_decoder, groups_decoder, lecturers_decoder, lesson_decoder,
+                      parse_compact_date, schedule_decoder)
+from .streaming import JsonArraySplitter
+from .transport import AsuUnavailableError, CircuitOpenError, create_http_client
+from .search_index import SearchIndex
+from .timetable import Lesson, LessonGroup, LessonLecturer, Room, Subject, TimeTable
 
 ScheduleType = Group | Lecturer
+T = TypeVar('T')
 
 _logger: logging.Logger = logging.getLogger(__name__)
 _settings: Settings = Settings()
 
+_request_duration = registry.histogram("asu_request_duration_seconds",
+                                       "Duration of requests to ASU with retries and waiting for the rate limiter, "
+                                       + "streamed ones include reading the body",
+                                       ("endpoint",))
+_requests = registry.counter("asu_requests", "Requests to ASU by endpoint and response status", ("endpoint", "status"))
+_rate_limit_wait = registry.histogram("asu_rate_limit_wait_seconds", "Time requests waited for the rate limiter",
+                                      ("priority",))
+# Ids in paths like students/5/1001/
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+class _ObservedRequest:
+    """Measures duration of a request to ASU, counts it by endpoint and status and adds it to the trace"""
+
+    def __init__(self, endpoint: str) -> None:
+        self.endpoint: str = endpoint
+        # response status, set inside the block
+        self.status: str = "error"
+        self._started_at: float = 0.0
+        self._span: Span | None = None
+
+    def __enter__(self) -> '_ObservedRequest':
+        self._started_at = time.perf_counter()
+        self._span = start_span(f"asu {self.endpoint}")
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None,
+                 _traceback: TracebackType | None) -> None:
+        if isinstance(exc, CircuitOpenError):
+            self.status = "circuit_open"
+        elif isinstance(exc, httpx.TransportError):
+            self.status = type(exc).__name__
+
+        finish_span(self._span)
+        _request_duration.observe(time.perf_counter() - self._started_at, endpoint=self.endpoint)
+        _requests.inc(endpoint=self.endpoint, status=self.status)
+
 class APIClient:
     def __init__(self, token: str) -> None:
         if not token:
             raise ValueError("API token is required")
         
         self.token: str = token
-        self.client: httpx.AsyncClient = httpx.AsyncClient()
+        self.client: httpx.AsyncClient = create_http_client(_settings, before_attempt=self._wait_for_rate_limit)
         self.base_url: str = "https://www.asu.ru/timetable"
-        self.faculties: dict[str, int] = {}
+        self.faculty_map: FacultyMap = FacultyMap()
+        self.rate_limiter: TokenBucketRateLimiter = TokenBucketRateLimiter(
+            _settings.ASU_RATE_LIMIT, _settings.ASU_RATE_BURST)
+        self.schedule_cache: ScheduleDatabaseCache = ScheduleDatabaseCache(
+            timedelta(seconds=_settings.SCHEDULE_CACHE_TTL), timedelta(seconds=_settings.SCHEDULE_UNRESOLVED_CACHE_TTL))
+        self.memory_cache: ScheduleMemoryCache = ScheduleMemoryCache(
+            _settings.SCHEDULE_MEMORY_CACHE_SIZE, timedelta(seconds=_settings.SCHEDULE_MEMORY_CACHE_TTL),
+            timedelta(seconds=_settings.SCHEDULE_UNRESOLVED_CACHE_TTL))
+        self.latency_budget: float = _settings.SCHEDULE_LATENCY_BUDGET_MS / 1000
+        self.group_index: SearchIndex[Group] = SearchIndex(lambda group: group.group_id)
+        self.lecturer_index: SearchIndex[Lecturer] = SearchIndex(
+            lambda lecturer: (lecturer.lecturer_id, lecturer.chair_id))
         
-        loop = asyncio.get_event_loop()
-        loop.run_until_complete(self.load_faculties())
+        register_cache("schedule_memory", self.memory_cache.stats, lambda: len(self.memory_cache))
+        register_cache("schedule_database", self.schedule_cache.stats)
+
+    async def initialize(self) -> None:
+        """Loads faculties and the search index. Must be called before the client is used,
+        constructor doesn't touch the database, so importing `asu` is cheap"""
+        await asyncio.gather(self.load_faculties(), self.load_search_index())
+
+    @property
+    def faculties(self) -> Mapping[str, int]:
+        """Current snapshot of faculty codes to ids, it is replaced on refresh"""
+        return self.faculty_map.snapshot
 
     async def load_faculties(self) -> None:
-        stmt = select(Faculty)
-        
-        async for session in create_session():
-            async with session.begin():
-                result = await session.execute(stmt)
-                
-                for faculty in result.scalars():
-                    self.faculties[faculty.faculty_code] = faculty.faculty_id
+        await self.faculty_map.refresh("load")
                     
         if not self.faculties:
             raise ValueError("Failed to load data. Is database correctly installed?")
     
+    async def load_search_index(self) -> None:
+        async for session in create_session():
+            async with session.begin():
+                for group in (await session.execute(select(models.Group))).scalars():
+                    self.group_index.add(group.name, group)
+                    
+                for lecturer in (await session.execute(select(models.Lecturer))).scalars():
+                    self.lecturer_index.add(lecturer.name, lecturer)
+                    
+        _logger.info("Загружено в индекс поиска групп: %d, преподавателей: %d",
+                     len(self.group_index), len(self.lecturer_index))
+    
+    async def warm_up(self) -> None:
+        """Opens connection to ASU, so the first user doesn't wait for connecting. Failures are only logged"""
+        try:
+            request = self.client.head(self.base_url + "/", extensions={"priority": RequestPriority.BACKGROUND})
+            await asyncio.wait_for(request, timeout=_settings.ASU_CONNECT_TIMEOUT)
+        except (asyncio.TimeoutError, httpx.HTTPError, AsuUnavailableError):
+            _logger.warning("Не удалось заранее подключиться к АлтГУ", exc_info=True)
+    
+    async def close(self) -> None:
+        await self.client.aclose()
+    
+    async def set_transport(self, transport: httpx.AsyncBaseTransport) -> None:
+        """Replaces network transport of requests to ASU, for example with httpx.MockTransport.
+        Retries, the circuit breaker and the rate limiter are kept"""
+        await self.client.aclose()
+        self.client = create_http_client(_settings, transport, before_attempt=self._wait_for_rate_limit)
+    
     def _build_url(self, endpoint: str) -> str:
         return f"{self.base_url}/{endpoint}"
     
+    def _get_endpoint(self, url: str) -> str:
+        """Returns path of the url without ids, like students/{id}/{id}"""
+        return _ID_SEGMENT.sub("/{id}", url.removeprefix(self.base_url).rstrip("/")).lstrip("/")
+    
+    async def _wait_for_rate_limit(self, request: httpx.Request) -> None:
+        """Takes a token for every attempt of the request, so retries don't exceed the rate limit.
+        Priority is passed in extensions of the request"""
+        priority: RequestPriority = request.extensions.get("priority", RequestPriority.INTERACTIVE)
+        with span("asu rate_limit"), _rate_limit_wait.time(priority=priority.name.lower()):
+            await self.rate_limiter.acquire(priority)
+    
     def _build_params(self, extra_params: dict[str, str] | None = None) -> dict[str, str]:
         params: dict[str, str] = {'file': 'list.json', 'api_token': self.token}
         if extra_params:
             params.update(extra_params)
         return params
     
-    async def _make_request(self, url: str, params: dict[str, str]) -> dict[Any, Any]:
+    async def _make_request(self, url: str, params: dict[str, str], decoder: msgspec.json.Decoder[T],
+                            priority: RequestPriority = RequestPriority.INTERACTIVE) -> T:
         try:
-            await asyncio.sleep(2)  # Rate limiting
-            response = await self.client.get(url, params=params, follow_redirects=True)
+            with _ObservedRequest(self._get_endpoint(url)) as observed:
+                response = await self.client.get(url, params=params, extensions={"priority": priority})
+                observed.status = str(response.status_code)
+                
             response.raise_for_status()
-            return response.json()
+            return decoder.decode(response.content)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logging.error(f"API request failed: {str(e)}")
+            raise
+
+    async def _stream_records(self, url: str, params: dict[str, str],
+                              priority: RequestPriority) -> AsyncIterator[LessonRecord]:
+        """Yields records of the schedule while response is being received"""
+        splitter = JsonArraySplitter(("schedule", "records"))
+        
+        try:
+            with _ObservedRequest(self._get_endpoint(url)) as observed:
+                async with self.client.stream("GET", url, params=params, extensions={"priority": priority}) as response:
+                    observed.status = str(response.status_code)
+                    response.raise_for_status()
+                    
+                    async for chunk in response.aiter_bytes():
+                        for record in splitter.feed(chunk):
+                            yield lesson_decoder.decode(record)
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logging.error(f"API request failed: {str(e)}")
             raise
@@ -71,7 +204,11 @@ async def search_group(self, query: str) -> Group | None:
         if not query:
             return None
         
-        # Check in database first
+        # Check in the index first
+        if groups := self.group_index.search(query, limit=1, fuzzy=False):
+            return groups[0]
+        
+        # Then in database, the index might miss rows added by another process
         stmt = select(models.Group).where(models.Group.name.like("%{}%".format(query)))
         async for session in create_session():
             async with session.begin():
@@ -79,37 +216,24 @@ async def search_group(self, query: str) -> Group | None:
                 group = result.scalar()
                 
                 if group:
+                    self.group_index.add(group.name, group)
                     return group
                 
         # Sad, not in the database, query the API then
         url = self._build_url("search/students/")
         params = self._build_params({'query': query})
         
-        data = await self._make_request(url, params)
-        groups = data.get("groups", {}).get("records", [])
+        data: GroupsResponse = await self._make_request(url, params, groups_decoder)
+        groups = data.groups.records
         
         if not groups:
+            # Probably there is a typo in the query
+            if similar_groups := self.group_index.search(query, limit=1):
+                return similar_groups[0]
+            
             return None
             
-        record = groups[0]
-        faculty_id = record["path"].split("/")[0]
-        group_code = record["groupCode"] # or group name
-        group_id = record["groupId"]
-        
-        group = models.Group(
-                    group_id=int(group_id),
-                    faculty_id=int(faculty_id),
-                    name=group_code
-                )
-        
-        # cache the result to database
-        async for session in create_session():
-            async with session.begin():
-                session.add(group)
-                
-                await session.commit()
-        
-        return group
+        return (await self.save_groups([self._parse_group_record(groups[0])]))[0]
 
     async def search_lecturer(self, query: str) -> Lecturer | None:
         # Limit to 50 chars
@@ -118,7 +242,11 @@ async def search_lecturer(self, query: str) -> Lecturer | None:
         if not query:
             return None
         
-        # Check in database first
+        # Check in the index first
+        if lecturers := self.lecturer_index.search(query, limit=1, fuzzy=False):
+            return lecturers[0]
+        
+        # Then in database, the index might miss rows added by another process
         stmt = select(models.Lecturer).where(models.Lecturer.name.like("%{}%".format(query)))
         async for session in create_session():
             async with session.begin():                
@@ -126,55 +254,253 @@ async def search_lecturer(self, query: str) -> Lecturer | None:
                 lecturer = result.scalar()
                 
                 if lecturer:
+                    self.lecturer_index.add(lecturer.name, lecturer)
                     return lecturer
            
         # Sad, not in the database, query the API then
         url = self._build_url("search/lecturers/")
         params = self._build_params({'query': query})
         
-        data = await self._make_request(url, params)
-        lecturers = data.get("lecturers", {}).get("records", [])
+        data: LecturersResponse = await self._make_request(url, params, lecturers_decoder)
+        lecturers = data.lecturers.records
         
         if not lecturers:
+            # Probably there is a typo in the query
+            if similar_lecturers := self.lecturer_index.search(query, limit=1):
+                return similar_lecturers[0]
+            
             return None
             
-        record = lecturers[0]
-        lecturer_faculty_id = record["path"].split("/")[0] # FACULTY_ID/CHAIR_ID/LECTURER_ID
-        lecturer_id = record["lecturerId"]
-        lecturer_name = record["lecturerName"]
-        lecturer_position = record["lecturerPosition"]
-        lecturer_id_chair = record["lecturerIdChair"]
-        
-        # cache the result to database
+        return (await self.save_lecturers([self._parse_lecturer_record(lecturers[0])]))[0]
+
+    async def fetch_faculty_groups(self, faculty_id: int,
+                                   priority: RequestPriority = RequestPriority.BACKGROUND) -> list[dict[str, Any]]:
+        """Returns all groups of the faculty. They are not saved"""
+        url = self._build_url(f"students/{faculty_id}/")
+        
+        data: GroupsResponse = await self._make_request(url, self._build_params(), groups_decoder, priority)
+        return [self._parse_group_record(record) for record in data.groups.records]
+
+    async def fetch_faculty_chairs(self, faculty_id: int,
+                                   priority: RequestPriority = RequestPriority.BACKGROUND) -> list[int]:
+        """Returns ids of chairs of the faculty"""
+        url = self._build_url(f"lecturers/{faculty_id}/")
+        
+        data: ChairsResponse = await self._make_request(url, self._build_params(), chairs_decoder, priority)
+        # FACULTY_ID/CHAIR_ID
+        return [int(record.path.split("/")[1]) for record in data.chairs.records]
+
+    async def fetch_chair_lecturers(self, faculty_id: int, chair_id: int,
+                                    priority: RequestPriority = RequestPriority.BACKGROUND) -> list[dict[str, Any]]:
+        """Returns all lecturers of the chair. They are not saved"""
+        url = self._build_url(f"lecturers/{faculty_id}/{chair_id}/")
+        
+        data: LecturersResponse = await self._make_request(url, self._build_params(), lecturers_decoder, priority)
+        return [self._parse_lecturer_record(record) for record in data.lecturers.records]
+
+    @staticmethod
+    def _parse_group_record(record: GroupRecord) -> dict[str, Any]:
+        return {
+            'group_id': record.group_id,
+            'faculty_id': int(record.path.split("/")[0]), # FACULTY_ID/GROUP_ID
+            'name': record.group_code, # or group name
+        }
+
+    @staticmethod
+    def _parse_lecturer_record(record: LecturerRecord) -> dict[str, Any]:
+        return {
+            'lecturer_id': record.lecturer_id,
+            'faculty_id': int(record.path.split("/")[0]), # FACULTY_ID/CHAIR_ID/LECTURER_ID
+            'chair_id': record.lecturer_id_chair,
+            'name': record.lecturer_name or "",
+            'position': record.lecturer_position or "",
+        }
+
+    async def save_groups(self, rows: list[dict[str, Any]]) -> list[Group]:
+        """Saves groups to the database and the search index. Existing groups are updated"""
+        if not rows:
+            return []
+        
+        # the group could be added by concurrent request already
+        unique_rows = list({row['group_id']: row for row in rows}.values())
+        stmt = upsert(models.Group, unique_rows, index_elements=['group_id'], update_columns=['faculty_id', 'name'])
+        select_stmt = select(models.Group).where(models.Group.group_id.in_([row['group_id'] for row in unique_rows]))
+        
+        groups: list[models.Group] = []
+        async for session in create_session():
+            async with session.begin():
+                await session.execute(stmt)
+                groups = list((await session.execute(select_stmt)).scalars())
+                
+        for group in groups:
+            self.group_index.add(group.name, group)
+            
+        # keep order of rows
+        groups_by_id = {group.group_id: group for group in groups}
+        return [groups_by_id[row['group_id']] for row in rows]
+
+    async def save_lecturers(self, rows: list[dict[str, Any]]) -> list[Lecturer]:
+        """Saves lecturers to the database and the search index. Existing lecturers are updated"""
+        if not rows:
+            return []
+        
+        # the lecturer could be added by concurrent request already
+        unique_rows = list({(row['lecturer_id'], row['chair_id']): row for row in rows}.values())
+        stmt = upsert(models.Lecturer, unique_rows, index_elements=['lecturer_id', 'chair_id'],
+                      update_columns=['faculty_id', 'name', 'position'])
+        select_stmt = select(models.Lecturer).where(
+            models.Lecturer.lecturer_id.in_([row['lecturer_id'] for row in unique_rows]))
+        
+        lecturers: list[models.Lecturer] = []
         async for session in create_session():
             async with session.begin():
-                session.add(models.Lecturer(
-                    lecturer_id=int(lecturer_id),
-                    faculty_id=int(lecturer_faculty_id),
-                    chair_id=int(lecturer_id_chair),
-                    name=lecturer_name,
-                    position=lecturer_position,
-                ))
+                await session.execute(stmt)
+                lecturers = list((await session.execute(select_stmt)).scalars())
                 
-                await session.commit()
+        for lecturer in lecturers:
+            self.lecturer_index.add(lecturer.name, lecturer)
+            
+        # keep order of rows
+        lecturers_by_id = {(lecturer.lecturer_id, lecturer.chair_id): lecturer for lecturer in lecturers}
+        return [lecturers_by_id[(row['lecturer_id'], row['chair_id'])] for row in rows]
+
+    async def get_schedule(self, schedule: ScheduleType, target_date: DateRange,
+                           priority: RequestPriority = RequestPriority.INTERACTIVE) -> TimeTable:
+        # Whole weeks are fetched and cached, so today, tomorrow and this week share one response
+        with span("schedule"):
+            week_time_tables = await asyncio.gather(
+                *[self.get_week_schedule(schedule, week_start, priority)
+                  for week_start in self._get_week_starts(target_date)])
+        
+        return TimeTable.merge([week_time_table.slice(target_date) for week_time_table in week_time_tables])
+
+    async def get_week_schedule(self, schedule: ScheduleType, week_start: date,
+                                priority: RequestPriority = RequestPriority.INTERACTIVE) -> TimeTable:
+        date_param = self._format_week_param(week_start)
+        key = (schedule.schedule_url, date_param)
+        
+        time_table = self.memory_cache.get(key)
+        if time_table is not None:
+            self.memory_cache.stats.hits += 1
+            return time_table
+        
+        # Fetch continues in background even if outdated copy is returned, so the next request gets fresh one
+        task = self.memory_cache.fetch(key, lambda: self._load_schedule(schedule, week_start, date_param, priority))
+        await asyncio.wait([task], timeout=self.latency_budget)
+        
+        if task.done() and not task.cancelled() and task.exception() is None:
+            return task.result()
+        
+        stale_time_table = self.memory_cache.get_stale(key)
+        if stale_time_table is None:
+            stale_time_table = await self.schedule_cache.get(schedule, date_param, include_expired=True)
             
-        return Lecturer(
-            name=lecturer_name,
-            faculty_id=lecturer_faculty_id,
-            chair_id=lecturer_id_chair,
-            lecturer_id=lecturer_id_chair,
-            position=lecturer_position
-        )
+        if stale_time_table is None:
+            # Nothing to show, wait for ASU
+            return await asyncio.shield(task)
+        
+        self.memory_cache.stats.stale += 1
+        _logger.warning("Показано устаревшее расписание %s (%s): %s", schedule.schedule_url, date_param,
+                        "ошибка запроса" if task.done() else "АлтГУ не ответил вовремя")
+        return stale_time_table.as_stale()
+
+    async def _load_schedule(self, schedule: ScheduleType, week_start: date, date_param: str,
+                             priority: RequestPriority) -> TimeTable:
+        cached_time_table = await self.schedule_cache.get(schedule, date_param)
+        if cached_time_table is not None:
+            _logger.debug("Расписание %s (%s) получено из кэша", schedule.schedule_url, date_param)
+            return cached_time_table
+        
+        time_table = await self._fetch_schedule(schedule, week_start, priority)
+        await self._save_to_database_cache(schedule, date_param, time_table)
+        
+        return time_table
 
-    async def get_schedule(self, schedule: ScheduleType, target_date: DateRange) -> TimeTable:
-        # todo: add caching
+    async def refresh_week_schedule(self, schedule: ScheduleType, week_start: date,
+                                    priority: RequestPriority = RequestPriority.BACKGROUND) -> TimeTable:
+        """Fetches week schedule bypassing the cache and updates cached copies"""
+        date_param = self._format_week_param(week_start)
+        
+        time_table = await self._fetch_schedule(schedule, week_start, priority)
+        await self._save_to_database_cache(schedule, date_param, time_table)
+        self.memory_cache.set((schedule.schedule_url, date_param), time_table)
         
+        return time_table
+
+    async def refresh_schedule_weeks(self, schedule: ScheduleType, week_starts: list[date],
+                                     priority: RequestPriority = RequestPriority.BACKGROUND) -> list[TimeTable]:
+        """Fetches consecutive weeks with one streamed request bypassing the cache and updates cached copies"""
+        date_range = DateRange(week_starts[0], week_starts[-1] + timedelta(days=7))
+        time_table = await self.fetch_schedule_range(schedule, date_range, priority)
+        
+        week_time_tables: list[TimeTable] = []
+        for week_start in week_starts:
+            date_param = self._format_week_param(week_start)
+            week_time_table = time_table.slice(DateRange(week_start, week_start + timedelta(days=7)))
+            
+            await self._save_to_database_cache(schedule, date_param, week_time_table)
+            self.memory_cache.set((schedule.schedule_url, date_param), week_time_table)
+            week_time_tables.append(week_time_table)
+            
+        return week_time_tables
+
+    async def fetch_schedule_range(self, schedule: ScheduleType, date_range: DateRange,
+                                   priority: RequestPriority = RequestPriority.BACKGROUND) -> TimeTable:
+        """Fetches schedule of any length bypassing the cache. Response is parsed while it is received"""
+        days: dict[date, tuple[Lesson, ...]] = {}
+        
+        async for day, lessons in self.stream_schedule(schedule, date_range, priority):
+            previous_lessons = days.get(day)
+            days[day] = self._sort_lessons([*previous_lessons, *lessons]) if previous_lessons else lessons
+            
+        _logger.info("Получено дней расписания %s: %d", schedule.schedule_url, len(days))
+        return TimeTable(days, fetched_at=datetime.now())
+
+    async def stream_schedule(self, schedule: ScheduleType, date_range: DateRange,
+                              priority: RequestPriority = RequestPriority.BACKGROUND
+                              ) -> AsyncIterator[tuple[date, tuple[Lesson, ...]]]:
+        """Yields lessons day by day, so only one day of a long response is kept in memory.
+        Day is yielded when lessons of another day start, so a day can be yielded again if ASU
+        returns records out of order"""
+        last_date = date_range.end_date - timedelta(days=1) if date_range.end_date is not None else date_range.start_date
+        
+        params = self._build_params()
+        params['date'] = date_range.start_date.strftime('%Y%m%d') + "-" + last_date.strftime('%Y%m%d')
+        
+        current_day: date | None = None
+        lessons: list[Lesson] = []
+        
+        async for record in self._stream_records(schedule.schedule_url, params, priority):
+            lesson_date = self._get_lesson_date(record, date_range)
+            if lesson_date is None:
+                continue
+            
+            if lesson_date != current_day:
+                if current_day is not None and lessons:
+                    yield current_day, self._sort_lessons(lessons)
+                    
+                current_day, lessons = lesson_date, []
+                
+            lessons.append(self._format_lesson(record))
+            
+        if current_day is not None and lessons:
+            yield current_day, self._sort_lessons(lessons)
+
+    async def _save_to_database_cache(self, schedule: ScheduleType, date_param: str, time_table: TimeTable) -> None:
+        try:
+            await self.schedule_cache.set(schedule, date_param, time_table)
+        except Exception:
+            _logger.exception("Не удалось сохранить расписание %s (%s) в кэш", schedule.schedule_url, date_param)
+
+    async def _fetch_schedule(self, schedule: ScheduleType, week_start: date,
+                              priority: RequestPriority) -> TimeTable:
         url: str = schedule.schedule_url
         params: dict[str, str] = self._build_params()
         
-        params['date'] = self._format_date_param(target_date)
+        params['date'] = self._format_week_param(week_start)
+        target_date = DateRange(week_start, week_start + timedelta(days=7))
             
-        data = await self._make_request(url, params)
+        data: ScheduleResponse = await self._make_request(url, params, schedule_decoder, priority)
 
         if _logger.isEnabledFor(logging.DEBUG):
             _logger.debug(f"Получены данные расписания: {data}")
@@ -182,8 +508,7 @@ async def get_schedule(self, schedule: ScheduleType, target_date: DateRange) ->
         is_lecturer = isinstance(schedule, Lecturer)
         _logger.debug("Тип расписания: %s", 'преподаватель' if is_lecturer else 'группа')
         
-        schedule_data: dict[Any, Any] = data.get("schedule", {})
-        records: list[dict[Any, Any]] = schedule_data.get("records", [])
+        records: list[LessonRecord] = data.schedule.records
         _logger.info("Найдено %d записей в расписании", len(records))
 
         if _logger.isEnabledFor(logging.DEBUG):
@@ -191,7 +516,7 @@ async def get_schedule(self, schedule: ScheduleType, target_date: DateRange) ->
         
         if not records:
             _logger.warning("Расписание пустое")
-            return TimeTable({})
+            return TimeTable({}, fetched_at=datetime.now())
             
         time_table = self._process_schedule_data(records, target_date)
         _logger.info("Обработано дней: %d", len(time_table.days))
@@ -202,24 +527,33 @@ async def get_schedule(self, schedule: ScheduleType, target_date: DateRange) ->
         return time_table
 
     @staticmethod
-    def _format_date_param(target_date: DateRange) -> str:
-        if target_date.end_date is None:
-            return target_date.start_date.strftime('%Y%m%d')
+    def _get_week_starts(target_date: DateRange) -> list[date]:
+        """Returns mondays of ISO weeks covering the date range"""
+        last_date = target_date.start_date
+        if target_date.end_date is not None:
+            # end date is not included in the range
+            last_date = max(last_date, target_date.end_date - timedelta(days=1))
+            
+        week_start = target_date.start_date - timedelta(days=target_date.start_date.weekday())
+        week_starts: list[date] = []
+        
+        while week_start <= last_date:
+            week_starts.append(week_start)
+            week_start += timedelta(days=7)
+            
+        return week_starts
 
-        return target_date.start_date.strftime('%Y%m%d') + "-" + target_date.end_date.strftime('%Y%m%d')
+    @staticmethod
+    def _format_week_param(week_start: date) -> str:
+        week_end = week_start + timedelta(days=6)
+        return week_start.strftime('%Y%m%d') + "-" + week_end.strftime('%Y%m%d')
 
-    def _process_schedule_data(self, records: list[dict[Any, Any]], target_date: DateRange) -> TimeTable:
+    def _process_schedule_data(self, records: list[LessonRecord], target_date: DateRange) -> TimeTable:
         days_dict: dict[date, list[Lesson]] = {}
         
         for record in records:
-            lesson_date: str = record.get("lessonDate") or ""
-            if not lesson_date:
-                continue
-            
-            # format YYYYMMDD
-            formatted_date: date = datetime.strptime(lesson_date, "%Y%m%d").date()
-            
-            if not target_date.is_date_in_range(formatted_date):
+            formatted_date = self._get_lesson_date(record, target_date)
+            if formatted_date is None:
                 continue
 
             if formatted_date not in days_dict:
@@ -230,76 +564,105 @@ def _process_schedule_data(self, records: list[dict[Any, Any]], target_date: Dat
 
         # Сортируем дни и занятия
         
-        for d, day in days_dict.items():
-            days_dict[d] = sorted(day, key=lambda l: int(l.number))
-
-        return TimeTable(days_dict)
+        return TimeTable({d: self._sort_lessons(day) for d, day in days_dict.items()}, fetched_at=datetime.now())
     
-    def _get_subject(self, record: dict[Any, Any]) -> Subject:
-        groups: list[Group] = []
+    @staticmethod
+    def _get_lesson_date(record: LessonRecord, target_date: DateRange) -> date | None:
+        """Returns date of the lesson, None if it has no date or it is not in the range"""
+        lesson_date: str = record.lesson_date or ""
+        if not lesson_date:
+            return None
+        
+        # format YYYYMMDD
+        formatted_date: date = parse_compact_date(lesson_date)
+        
+        if not target_date.is_date_in_range(formatted_date):
+            return None
+        
+        return formatted_date
+    
+    @staticmethod
+    def _sort_lessons(lessons: list[Lesson]) -> tuple[Lesson, ...]:
+        return tuple(sorted(lessons, key=lambda l: int(l.number)))
+    
+    def _get_subject(self, record: LessonRecord) -> Subject:
+        groups: list[LessonGroup] = []
         sub_groups: list[str] = []
 
-        group_record: dict[Any, Any]
-        for group_record in record.get("lessonGroups", []):
-            lesson_group_record = group_record.get("lessonGroup", {})
+        for group_record in record.lesson_groups:
+            lesson_group_record = group_record.lesson_group
 
-            group_name = lesson_group_record.get("groupCode") or ""
-            faculty_code = lesson_group_record.get("groupFacultyCode") or ""
-            group_id = lesson_group_record.get("groupId") or ""
+            group_name = lesson_group_record.group_code or ""
+            faculty_code = lesson_group_record.group_faculty_code or ""
+            group_id = lesson_group_record.group_id
+            if group_id is None:
+                _logger.warning("Пропущена группа без id '%s' в занятии %s", group_name, record.lesson_date)
+                continue
 
-            faculty_id = self.faculties.get(faculty_code) or ""
-            sub_group = (group_record.get("lessonSubGroup") or "").strip()
+            faculty_id = self.faculty_map.get(faculty_code)
+            if faculty_id is None:
+                known_group = self.group_index.get(group_id)
+                faculty_id = self.faculty_map.resolve_unknown(
+                    faculty_code, known_group.faculty_id if known_group is not None else None)
+            sub_group = (group_record.lesson_sub_group or "").strip()
 
-            group = Group(group_id=int(group_id), faculty_id=int(faculty_id),
-                          name=group_name)
+            group = LessonGroup.interned(group_id=group_id, faculty_id=faculty_id, name=group_name)
             groups.append(group)
             
             if sub_group:
                 sub_groups.append(sub_group)
 
-        lecturers: list[Lecturer] = []
+        lecturers: list[LessonLecturer] = []
+
+        for lecturer_record in record.lesson_lecturers:
+            name = lecturer_record.lecturer_name or ""
+            chair_id = lecturer_record.lecturer_id_chair
+            lecturer_id = lecturer_record.lecturer_id
+            if chair_id is None or lecturer_id is None:
+                _logger.warning("Пропущен преподаватель без id '%s' в занятии %s", name, record.lesson_date)
+                continue
 
-        for lecturer_record in record.get("lessonLecturers", []):
-            name = lecturer_record.get("lecturerName", "")
-            chair_id = lecturer_record.get("lecturerIdChair", "")
-            lecturer_id = lecturer_record.get("lecturerId", "")
-            lecturer_faculty_code = lecturer_record.get("lecturerChairFacultyCode", "")
-            lecturer_position = lecturer_record.get("lecturerPosition", "")
+            lecturer_faculty_code = lecturer_record.lecturer_chair_faculty_code or ""
+            lecturer_position = lecturer_record.lecturer_position or ""
 
-            faculty_id = self.faculties.get(lecturer_faculty_code, "")
+            faculty_id = self.faculty_map.get(lecturer_faculty_code)
+            if faculty_id is None:
+                known_lecturer = self.lecturer_index.get((lecturer_id, chair_id))
+                faculty_id = self.faculty_map.resolve_unknown(
+                    lecturer_faculty_code, known_lecturer.faculty_id if known_lecturer is not None else None)
 
-            lecturer = Lecturer(lecturer_id=int(lecturer_id),
-                                faculty_id=int(faculty_id),
-                                chair_id=int(chair_id),
-                                name=name,
-                                position=lecturer_position)
+            lecturer = LessonLecturer.interned(lecturer_id=lecturer_id,
+                                               faculty_id=faculty_id,
+                                               chair_id=chair_id,
+                                               name=name,
+                                               position=lecturer_position)
             lecturers.append(lecturer)
 
-        building = record.get("lessonBuilding", {})
-        address = building.get("buildingAddress", "")
-        address_code = building.get("buildingCode", "")
+        building = record.lesson_building
+        address = building.building_address or ""
+        address_code = building.building_code or ""
 
-        if isinstance(address_code, str) and address_code == '`':
+        if address_code == '`':
             # address code can only be that symbol, if it was then clean the result
             address_code = ""
 
-        lesson_room = record.get("lessonRoom", {}).get("roomTitle", "") or ""
+        lesson_room = record.lesson_room.room_title or ""
 
-        room = Room(address, address_code, lesson_room)
+        room = Room.interned(address, address_code, lesson_room)
 
-        subject_title = record.get("lessonSubject", {}).get("subjectTitle", "")
-        subject_type = (record.get("lessonSubjectType") or "").strip()
-        subject_comment = (record.get("lessonCommentary") or "").strip()
+        subject_title = record.lesson_subject.subject_title or ""
+        subject_type = (record.lesson_subject_type or "").strip()
+        subject_comment = (record.lesson_commentary or "").strip()
 
-        return Subject(title=subject_title, type=subject_type, comment=subject_comment, groups=groups, lecturers=lecturers, room=room)
+        return Subject.interned(title=subject_title, type=subject_type, comment=subject_comment, groups=tuple(groups), lecturers=tuple(lecturers), room=room)
 
-    def _format_lesson(self, record: dict[Any, Any]) -> Lesson:
-        number = record.get("lessonNum", "")
-        time_start = record.get("lessonTimeStart", "")
-        time_end = record.get("lessonTimeEnd", "")
+    def _format_lesson(self, record: LessonRecord) -> Lesson:
+        number = str(record.lesson_num)
+        time_start = record.lesson_time_start or ""
+        time_end = record.lesson_time_end or ""
 
         subject = self._get_subject(record)
-        lesson = Lesson(number, time_start, time_end, subject)
+        lesson = Lesson(intern_string(number), intern_string(time_start), intern_string(time_end), subject)
         
         return lesson
 
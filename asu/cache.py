@@ -0,0 +1,166 @@
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import logging
+import time
+
+from sqlalchemy import select
+
+from database.db import create_session, upsert
+from database.models import Group, GroupSchedule, Lecturer, LecturerSchedule
+
+from .timetable import TimeTable, timetable_from_json, timetable_to_json
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+# (schedule url, date param)
+CacheKey = tuple[str, str]
+
+@dataclass
+class CacheStats:
+    # requests served from memory
+    hits: int = 0
+    # requests that had to fetch timetable
+    misses: int = 0
+    # requests that awaited fetch started by another request
+    coalesced: int = 0
+    # entries removed to fit in max size
+    evictions: int = 0
+    # requests served with expired entry, because fetching took too long or failed
+    stale: int = 0
+    
+class ScheduleMemoryCache:
+    """In-process LRU cache of parsed timetables with TTL and single-flight fetching.
+    Expired entries are kept until evicted, so they can be served while fresh ones are fetched"""
+
+    def __init__(self, max_size: int, ttl: timedelta, unresolved_ttl: timedelta) -> None:
+        self.max_size: int = max_size
+        self.ttl: float = ttl.total_seconds()
+        # TTL of timetables with unknown faculties
+        self.unresolved_ttl: float = min(unresolved_ttl.total_seconds(), self.ttl)
+        self.stats: CacheStats = CacheStats()
+        
+        # key -> (expire time in monotonic clock, timetable)
+        self._entries: OrderedDict[CacheKey, tuple[float, TimeTable]] = OrderedDict()
+        self._in_flight: dict[CacheKey, asyncio.Task[TimeTable]] = {}
+        
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> TimeTable | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expire_time, timetable = entry
+        if expire_time <= time.monotonic():
+            return None
+        
+        self._entries.move_to_end(key)
+        return timetable
+    
+    def get_stale(self, key: CacheKey) -> TimeTable | None:
+        """Returns timetable even if it has expired"""
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else None
+    
+    def set(self, key: CacheKey, timetable: TimeTable) -> None:
+        ttl = self.unresolved_ttl if timetable.has_unknown_faculties else self.ttl
+        self._entries[key] = (time.monotonic() + ttl, timetable)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def fetch(self, key: CacheKey, fetch: Callable[[], Awaitable[TimeTable]]) -> asyncio.Task[TimeTable]:
+        """Starts fetching timetable or returns fetch already in progress. Result is saved to the cache"""
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+            return task
+        
+        self.stats.misses += 1
+        task = asyncio.create_task(self._fetch(key, fetch))
+        # Fetch can finish after everybody stopped waiting for it, then its error is not reported as unhandled
+        task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        self._in_flight[key] = task
+        
+        return task
+    
+    async def _fetch(self, key: CacheKey, fetch: Callable[[], Awaitable[TimeTable]]) -> TimeTable:
+        try:
+            timetable = await fetch()
+            self.set(key, timetable)
+            return timetable
+        finally:
+            del self._in_flight[key]
+
+class ScheduleDatabaseCache:
+    """Read-through/write-through cache of timetables in group_schedules and lecturer_schedules tables"""
+
+    def __init__(self, ttl: timedelta, unresolved_ttl: timedelta) -> None:
+        self.ttl: timedelta = ttl
+        # TTL of timetables with unknown faculties
+        self.unresolved_ttl: timedelta = min(unresolved_ttl, ttl)
+        self.stats: CacheStats = CacheStats()
+
+    async def get(self, schedule: Group | Lecturer, date_range: str, include_expired: bool = False) -> TimeTable | None:
+        """Returns cached timetable, if it was not expired yet or `include_expired` is set"""
+        if isinstance(schedule, Lecturer):
+            stmt = select(LecturerSchedule.data, LecturerSchedule.fetched_at)
+            stmt = stmt.where(LecturerSchedule.lecturer_id == schedule.id, LecturerSchedule.date_range == date_range)
+            if not include_expired:
+                stmt = stmt.where(LecturerSchedule.expired_at > datetime.now())
+        else:
+            stmt = select(GroupSchedule.data, GroupSchedule.fetched_at)
+            stmt = stmt.where(GroupSchedule.group_id == schedule.id, GroupSchedule.date_range == date_range)
+            if not include_expired:
+                stmt = stmt.where(GroupSchedule.expired_at > datetime.now())
+
+        async for session in create_session():
+            async with session.begin():
+                result = await session.execute(stmt)
+                row = result.first()
+
+                if row is None:
+                    if not include_expired:
+                        self.stats.misses += 1
+                    return None
+
+                if include_expired:
+                    self.stats.stale += 1
+                else:
+                    self.stats.hits += 1
+
+                data, fetched_at = row
+                try:
+                    return timetable_from_json(data, fetched_at=fetched_at)
+                except (ValueError, KeyError, TypeError):
+                    _logger.warning("Не удалось прочитать кэш расписания %s (%s)", schedule.schedule_url, date_range,
+                                    exc_info=True)
+                    return None
+
+        return None
+
+    async def set(self, schedule: Group | Lecturer, date_range: str, timetable: TimeTable) -> None:
+        """Saves timetable to the database until TTL expires"""
+        data = timetable_to_json(timetable)
+        expired_at = datetime.now() + (self.unresolved_ttl if timetable.has_unknown_faculties else self.ttl)
+
+        if isinstance(schedule, Lecturer):
+            stmt = upsert(LecturerSchedule,
+                          {'lecturer_id': schedule.id, 'date_range': date_range, 'data': data, 'expired_at': expired_at,
+                           'fetched_at': timetable.fetched_at},
+                          index_elements=['lecturer_id', 'date_range'], update_columns=['data', 'expired_at', 'fetched_at'])
+        else:
+            stmt = upsert(GroupSchedule,
+                          {'group_id': schedule.id, 'date_range': date_range, 'data': data, 'expired_at': expired_at,
+                           'fetched_at': timetable.fetched_at},
+                          index_elements=['group_id', 'date_range'], update_columns=['data', 'expired_at', 'fetched_at'])
+
+        async for session in create_session():
+            async with session.begin():
+                await session.execute(stmt)
@@ -0,0 +1,182 @@
+"""Crawler of all groups and lecturers of ASU.
+
+Started by crawl.py, which loads .env before settings of the asu package are read:
+    python crawl.py [--checkpoint PATH] [--concurrency N] [--restart]
+"""
+import argparse
+import asyncio
+from collections.abc import Awaitable
+from dataclasses import dataclass, field
+from datetime import datetime
+import json
+import logging
+import os
+import time
+
+from .api import APIClient, client
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+# Checkpoint is saved at most once in this many seconds while crawling and after every stage
+_SAVE_INTERVAL: float = 5.0
+
+@dataclass
+class CrawlerCheckpoint:
+    """Progress of the crawler, so interrupted crawl continues where it stopped"""
+    # faculties, which groups are saved
+    group_faculties: set[int] = field(default_factory=set)
+    # faculty -> chairs
+    chairs: dict[int, list[int]] = field(default_factory=dict)
+    # (faculty, chair), which lecturers are saved
+    lecturer_chairs: set[tuple[int, int]] = field(default_factory=set)
+
+    @classmethod
+    def load(cls, path: str) -> 'CrawlerCheckpoint':
+        if not os.path.exists(path):
+            return cls()
+
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+
+        return cls(
+            group_faculties=set(data["group_faculties"]),
+            chairs={int(faculty_id): chairs for faculty_id, chairs in data["chairs"].items()},
+            lecturer_chairs={(faculty_id, chair_id) for faculty_id, chair_id in data["lecturer_chairs"]},
+        )
+
+    async def save(self, path: str) -> None:
+        # Serialized in the event loop, crawling tasks change the checkpoint while the file is written
+        data = json.dumps({
+            "group_faculties": sorted(self.group_faculties),
+            "chairs": self.chairs,
+            "lecturer_chairs": sorted(self.lecturer_chairs),
+        })
+        await asyncio.to_thread(_write_file, path, data)
+
+def _write_file(path: str, data: str) -> None:
+    # Write to temp file first, so checkpoint is not corrupted if process is killed
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(data)
+    os.replace(temp_path, path)
+
+@dataclass
+class CrawlResult:
+    groups: int = 0
+    lecturers: int = 0
+    # count of faculties or chairs failed to crawl
+    failed: int = 0
+
+class DirectoryCrawler:
+    """Loads groups and lecturers of all faculties from ASU and saves them to the database"""
+
+    def __init__(self, client: APIClient, checkpoint_path: str, concurrency: int) -> None:
+        self.client: APIClient = client
+        self.checkpoint_path: str = checkpoint_path
+
+        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+        self._checkpoint: CrawlerCheckpoint = CrawlerCheckpoint()
+        self._result: CrawlResult = CrawlResult()
+        # One save at a time, they write the same temp file
+        self._save_lock: asyncio.Lock = asyncio.Lock()
+        # monotonic time of the last save
+        self._saved_at: float = 0.0
+
+    async def run(self) -> CrawlResult:
+        self._checkpoint = CrawlerCheckpoint.load(self.checkpoint_path)
+        self._result = CrawlResult()
+
+        checkpoint_directory = os.path.dirname(self.checkpoint_path)
+        if checkpoint_directory:
+            os.makedirs(checkpoint_directory, exist_ok=True)
+
+        started_at = datetime.now()
+        faculty_ids = sorted(set(self.client.faculties.values()))
+
+        await self._run_all([self._crawl_groups(faculty_id) for faculty_id in faculty_ids
+                             if faculty_id not in self._checkpoint.group_faculties])
+        await self._run_all([self._crawl_chairs(faculty_id) for faculty_id in faculty_ids
+                             if faculty_id not in self._checkpoint.chairs])
+        await self._run_all([self._crawl_lecturers(faculty_id, chair_id)
+                             for faculty_id, chairs in self._checkpoint.chairs.items() for chair_id in chairs
+                             if (faculty_id, chair_id) not in self._checkpoint.lecturer_chairs])
+
+        if not self._result.failed and os.path.exists(self.checkpoint_path):
+            # Everything is crawled, next run starts from scratch
+            os.remove(self.checkpoint_path)
+
+        _logger.info("Обход справочника завершен за %s: групп %d, преподавателей %d, ошибок %d",
+                     datetime.now() - started_at, self._result.groups, self._result.lecturers, self._result.failed)
+        return self._result
+
+    async def _run_all(self, coroutines: list[Awaitable[None]]) -> None:
+        async def run(coroutine: Awaitable[None]) -> None:
+            async with self._semaphore:
+                try:
+                    await coroutine
+                except Exception:
+                    self._result.failed += 1
+                    _logger.exception("Ошибка обхода справочника")
+
+        await asyncio.gather(*[run(coroutine) for coroutine in coroutines])
+
+        if coroutines:
+            await self._save_checkpoint(force=True)
+
+    async def _save_checkpoint(self, force: bool = False) -> None:
+        """Saves the checkpoint, unless it was saved recently. Progress since the last save is crawled again
+        after a crash, saving groups and lecturers again is harmless"""
+        if not force and time.monotonic() - self._saved_at < _SAVE_INTERVAL:
+            return
+
+        async with self._save_lock:
+            self._saved_at = time.monotonic()
+            await self._checkpoint.save(self.checkpoint_path)
+
+    async def _crawl_groups(self, faculty_id: int) -> None:
+        rows = await self.client.fetch_faculty_groups(faculty_id)
+        await self.client.save_groups(rows)
+
+        self._result.groups += len(rows)
+        self._checkpoint.group_faculties.add(faculty_id)
+        await self._save_checkpoint()
+
+    async def _crawl_chairs(self, faculty_id: int) -> None:
+        self._checkpoint.chairs[faculty_id] = await self.client.fetch_faculty_chairs(faculty_id)
+        await self._save_checkpoint()
+
+    async def _crawl_lecturers(self, faculty_id: int, chair_id: int) -> None:
+        rows = await self.client.fetch_chair_lecturers(faculty_id, chair_id)
+        await self.client.save_lecturers(rows)
+
+        self._result.lecturers += len(rows)
+        self._checkpoint.lecturer_chairs.add((faculty_id, chair_id))
+        await self._save_checkpoint()
+
+def main() -> None:
+    from settings import CrawlerSettings
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s %(levelname)s][%(name)s] %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    settings = CrawlerSettings()
+
+    parser = argparse.ArgumentParser(description="Loads all groups and lecturers of ASU to the database")
+    parser.add_argument("--checkpoint", default=settings.CRAWLER_CHECKPOINT_PATH, help="path to the checkpoint file")
+    parser.add_argument("--concurrency", type=int, default=settings.CRAWLER_CONCURRENCY,
+                        help="count of requests made at the same time")
+    parser.add_argument("--restart", action="store_true", help="ignore saved checkpoint")
+    args = parser.parse_args()
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    crawler = DirectoryCrawler(client, args.checkpoint, args.concurrency)
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(client.initialize())
+        result = loop.run_until_complete(crawler.run())
+    finally:
+        loop.run_until_complete(client.close())
+
+    raise SystemExit(1 if result.failed else 0)
@@ -0,0 +1,60 @@
+from dataclasses import dataclass, field
+from datetime import date
+
+from .timetable import Lesson, TimeTable
+
+# Lessons with the same key are the same lesson, even if room, lecturers or time were changed
+LessonKey = tuple[str, str, str, tuple[str, ...] | None]
+
+@dataclass
+class DayChanges:
+    day: date
+    # lessons, which were not in the previous timetable
+    added: list[Lesson] = field(default_factory=list)
+    # lessons, which are not in the new timetable
+    removed: list[Lesson] = field(default_factory=list)
+    # (previous, new) versions of the lesson
+    changed: list[tuple[Lesson, Lesson]] = field(default_factory=list)
+
+def _lesson_key(lesson: Lesson) -> LessonKey:
+    return (lesson.number, lesson.subject.title, lesson.subject.type, lesson.subject.sub_groups)
+
+def diff_timetables(previous: TimeTable, current: TimeTable, since: date | None = None) -> list[DayChanges]:
+    """Returns changes of lessons by day. Days with equal content hashes are skipped without comparing lessons.
+    Days before `since` are ignored"""
+    changes: list[DayChanges] = []
+
+    for day in sorted(previous.days.keys() | current.days.keys()):
+        if since is not None and day < since:
+            continue
+
+        if previous.day_digest(day) == current.day_digest(day):
+            continue
+
+        day_changes = _diff_day(day, previous.days.get(day, ()), current.days.get(day, ()))
+        if day_changes.added or day_changes.removed or day_changes.changed:
+            changes.append(day_changes)
+
+    return changes
+
+def _diff_day(day: date, previous: tuple[Lesson, ...], current: tuple[Lesson, ...]) -> DayChanges:
+    day_changes = DayChanges(day)
+
+    previous_lessons: dict[LessonKey, list[Lesson]] = {}
+    for lesson in previous:
+        previous_lessons.setdefault(_lesson_key(lesson), []).append(lesson)
+
+    for lesson in current:
+        same_lessons = previous_lessons.get(_lesson_key(lesson))
+        if not same_lessons:
+            day_changes.added.append(lesson)
+            continue
+
+        previous_lesson = same_lessons.pop(0)
+        if previous_lesson != lesson:
+            day_changes.changed.append((previous_lesson, lesson))
+
+    for lessons in previous_lessons.values():
+        day_changes.removed.extend(lessons)
+
+    return day_changes
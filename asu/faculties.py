@@ -0,0 +1,125 @@
+import asyncio
+from collections.abc import Mapping
+import logging
+from types import MappingProxyType
+
+from sqlalchemy import select
+
+from database.db import create_session
+from database.models import Faculty
+from utils.metrics import registry
+
+from .timetable import UNKNOWN_FACULTY_ID
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+_refreshes = registry.counter("faculty_refreshes", "Reloads of the faculty map", ("reason",))
+_unknown_codes = registry.counter("faculty_unknown_codes", "Lookups of faculty codes missing in the faculty map")
+
+class FacultyMap:
+    """Faculty codes to ids of ASU.
+
+    Readers get an immutable snapshot, refresh builds a new one and swaps it at once, so lookups
+    never see a partly loaded map and don't need locks. Unknown codes found in schedules are learned
+    from groups and lecturers of the lesson, saved to the database and loaded by one refresh,
+    however many schedules contained them."""
+
+    def __init__(self) -> None:
+        self._snapshot: Mapping[str, int] = MappingProxyType({})
+        # code -> faculty id, learned from ASU and not saved yet
+        self._learned: dict[str, int] = {}
+        # codes, which already requested a refresh, they don't request it again until the periodic one
+        self._requested: set[str] = set()
+        self._refresh_task: asyncio.Task[None] | None = None
+
+    @property
+    def snapshot(self) -> Mapping[str, int]:
+        return self._snapshot
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def get(self, code: str) -> int | None:
+        return self._snapshot.get(code)
+
+    async def refresh(self, reason: str = "periodic") -> None:
+        """Saves learned codes, loads all faculties from the database and swaps the snapshot"""
+        learned = self._learned
+        self._learned = {}
+        _refreshes.inc(reason=reason)
+
+        faculties: dict[str, int] = {}
+        new_faculties: dict[str, int] = {}
+        try:
+            async for session in create_session():
+                async with session.begin():
+                    faculties = {faculty.faculty_code: faculty.faculty_id
+                                 for faculty in (await session.execute(select(Faculty))).scalars()}
+
+                    new_faculties = {code: faculty_id for code, faculty_id in learned.items()
+                                     if code not in faculties}
+                    session.add_all(Faculty(faculty_code=code, faculty_id=faculty_id)
+                                    for code, faculty_id in new_faculties.items())
+                    faculties.update(new_faculties)
+        except Exception:
+            # Saved by the next refresh
+            self._learned = learned | self._learned
+            raise
+
+        if new_faculties:
+            _logger.info("Добавлены новые факультеты: %s", new_faculties)
+
+        added = faculties.keys() - self._snapshot.keys()
+        self._snapshot = MappingProxyType(faculties)
+
+        if reason == "periodic":
+            self._requested.clear()
+        else:
+            self._requested -= added
+
+    def resolve_unknown(self, code: str, faculty_id: int | None) -> int:
+        """Returns id of the code missing in the snapshot. `faculty_id` is the id known from the group
+        or the lecturer of the lesson, None if they are not saved. It is saved on refresh.
+        Requests a refresh once per code and once the id is learned, returns UNKNOWN_FACULTY_ID
+        if the id is not known"""
+        _unknown_codes.inc()
+        
+        if not code:
+            # Missing code can't be learned, it would map every record without a code to one faculty
+            return faculty_id if faculty_id is not None else UNKNOWN_FACULTY_ID
+
+        needs_refresh = code not in self._requested
+        if needs_refresh:
+            self._requested.add(code)
+            _logger.warning("Неизвестный код факультета '%s', список факультетов будет обновлен", code)
+
+        if faculty_id is not None and code not in self._learned:
+            self._learned[code] = faculty_id
+            needs_refresh = True
+
+        if needs_refresh:
+            self._request_refresh()
+
+        return faculty_id if faculty_id is not None else UNKNOWN_FACULTY_ID
+
+    def _request_refresh(self) -> None:
+        """Starts a refresh, unless one is running already"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Parsed outside of the event loop, like in benchmarks
+            return
+
+        self._refresh_task = loop.create_task(self._refresh_unknown())
+
+    async def _refresh_unknown(self) -> None:
+        try:
+            await self.refresh("unknown_code")
+            # Codes learned while refreshing
+            while self._learned:
+                await self.refresh("unknown_code")
+        except Exception:
+            _logger.exception("Не удалось обновить список факультетов")
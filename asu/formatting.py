@@ -1,10 +1,20 @@
+from collections import OrderedDict
+from collections.abc import Sequence
 from datetime import date
 from html import escape
 import logging
 
+from asu.cache import CacheStats
+from asu.diff import DayChanges
 from asu.timetable import Lesson, TimeTable
+from settings import CacheSettings
 
 from utils.daterange import DateRange
+from utils.metrics import register_cache
+from utils.tracing import span
+
+# (timetable hash, schedule link, name, start date, end date, update time of outdated timetable)
+RenderCacheKey = tuple[str, str, str, date, date | None, str | None]
 
 EMOJI_NUMBERS: list[str] = ["0️⃣", "1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣"]
 USER_FRIENDLY_WEEKDAYS: list[str] = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"]
@@ -12,12 +22,41 @@
 class ScheduleFormatter:
     """Класс для форматирования расписания"""
     
-    def __init__(self, is_lecturer: bool = False):
+    def __init__(self, is_lecturer: bool = False, cache_size: int = 0):
         self.is_lecturer: bool = is_lecturer
+        self.cache_size: int = cache_size
+        self.cache_stats: CacheStats = CacheStats()
+        self._cache: OrderedDict[RenderCacheKey, str] = OrderedDict()
 
     def format_schedule(self, timetable: TimeTable, schedule_link: str, name: str,
                        date_range: DateRange) -> str:
-        """Форматирует расписание в текстовый вид"""
+        """Форматирует расписание в текстовый вид, повторяет ранее сформированный текст, если расписание не изменилось"""
+        stale_note = self._stale_note(timetable)
+        if not self.cache_size:
+            return self._format_schedule(timetable, schedule_link, name, date_range, stale_note)
+        
+        # Hash changes with the content of timetable, so outdated text is never returned.
+        # Note depends on the current date too, so it is a part of the key
+        key: RenderCacheKey = (timetable.digest, schedule_link, name, date_range.start_date, date_range.end_date,
+                               stale_note)
+        
+        formatted = self._cache.get(key)
+        if formatted is not None:
+            self.cache_stats.hits += 1
+            self._cache.move_to_end(key)
+            return formatted
+        
+        self.cache_stats.misses += 1
+        formatted = self._cache[key] = self._format_schedule(timetable, schedule_link, name, date_range, stale_note)
+        
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+            self.cache_stats.evictions += 1
+            
+        return formatted
+
+    def _format_schedule(self, timetable: TimeTable, schedule_link: str, name: str,
+                        date_range: DateRange, stale_note: str | None) -> str:
         logging.info("Форматирование расписания для %s %s", 'преподавателя' if self.is_lecturer else 'группы', name)
         
         # Формируем заголовок
@@ -27,6 +66,7 @@ def format_schedule(self, timetable: TimeTable, schedule_link: str, name: str,
         
         if not timetable.days:
             formatted_schedule.append("На указанный период занятий не найдено.")
+            self._add_stale_note(stale_note, formatted_schedule)
             return self._add_schedule_link(formatted_schedule, schedule_link)
             
         # Форматируем дни
@@ -35,6 +75,7 @@ def format_schedule(self, timetable: TimeTable, schedule_link: str, name: str,
         if not found_lessons:
             formatted_schedule.append("На указанный период занятий не найдено.")
             
+        self._add_stale_note(stale_note, formatted_schedule)
         return self._add_schedule_link(formatted_schedule, schedule_link)
 
     def _format_days(self, timetable: TimeTable, date_range: DateRange, formatted_schedule: list[str]) -> bool:
@@ -50,7 +91,7 @@ def _format_days(self, timetable: TimeTable, date_range: DateRange, formatted_sc
             
         return found_lessons
 
-    def _format_single_day(self, lessons: list[Lesson], date: date, formatted_schedule: list[str]) -> None:
+    def _format_single_day(self, lessons: Sequence[Lesson], date: date, formatted_schedule: list[str]) -> None:
         """Форматирует один день расписания"""
         formatted_date = date.strftime('%d.%m')
         formatted_schedule.append(f"📅 {USER_FRIENDLY_WEEKDAYS[date.weekday()]} {escape(formatted_date)}\n")
@@ -67,7 +108,7 @@ def _format_lesson(self, lesson: Lesson) -> str:
         """Форматирует информацию о занятии в табличном стиле"""
         
         # Подгруппы
-        lesson_subgroups = lesson.subject.sub_groups or []
+        lesson_subgroups = lesson.subject.sub_groups or ()
         subgroups = ''.join([f"<i>{escape(group)}</i> " for group in lesson_subgroups])
         
         # Время
@@ -101,6 +142,64 @@ def _format_lesson(self, lesson: Lesson) -> str:
         
         return formatted
 
+    def format_changes(self, changes: list[DayChanges], schedule_link: str, name: str) -> str:
+        """Форматирует изменения расписания в короткое уведомление"""
+        header_text: str = "преподавателя" if self.is_lecturer else "группы"
+        formatted_changes: list[str] = [f"🔔 Изменения в расписании {header_text}: {escape(name)}\n"]
+        
+        for day_changes in changes:
+            formatted_date = day_changes.day.strftime('%d.%m')
+            formatted_changes.append(f"📅 {USER_FRIENDLY_WEEKDAYS[day_changes.day.weekday()]} {escape(formatted_date)}")
+            
+            for lesson in day_changes.removed:
+                formatted_changes.append(f"❌ {self._format_lesson_title(lesson)} — отменено")
+                
+            for previous, lesson in day_changes.changed:
+                formatted_changes.append(f"✏️ {self._format_lesson_title(lesson)}: {self._format_lesson_changes(previous, lesson)}")
+                
+            for lesson in day_changes.added:
+                room = lesson.subject.room
+                formatted_changes.append(
+                    f"➕ {self._format_lesson_title(lesson)}, 🏢 {escape(f'{room.number} {room.address_code}')}")
+                
+            formatted_changes.append("")
+            
+        return self._add_schedule_link(formatted_changes, schedule_link)
+
+    def _format_lesson_title(self, lesson: Lesson) -> str:
+        return (f"{self._num_to_emoji(lesson.number)} {escape(lesson.time_start)}-{escape(lesson.time_end)} "
+                f"{escape(lesson.subject.type)} {escape(lesson.subject.title)}")
+
+    def _format_lesson_changes(self, previous: Lesson, lesson: Lesson) -> str:
+        """Перечисляет, что изменилось в занятии"""
+        changes: list[str] = []
+        
+        previous_room, room = previous.subject.room, lesson.subject.room
+        if previous_room != room:
+            changes.append(f"аудитория {escape(f'{previous_room.number} {previous_room.address_code}')} → "
+                           + f"{escape(f'{room.number} {room.address_code}')}")
+            
+        if (previous.time_start, previous.time_end) != (lesson.time_start, lesson.time_end):
+            changes.append(f"время {escape(previous.time_start)}-{escape(previous.time_end)} → "
+                           + f"{escape(lesson.time_start)}-{escape(lesson.time_end)}")
+            
+        if self.is_lecturer:
+            previous_people = ', '.join(group.name for group in previous.subject.groups) or "❓"
+            people = ', '.join(group.name for group in lesson.subject.groups) or "❓"
+            people_title = "группы"
+        else:
+            previous_people = ', '.join(lecturer.name for lecturer in previous.subject.lecturers) or "❓"
+            people = ', '.join(lecturer.name for lecturer in lesson.subject.lecturers) or "❓"
+            people_title = "преподаватель"
+            
+        if previous_people != people:
+            changes.append(f"{people_title} {escape(previous_people)} → {escape(people)}")
+            
+        if previous.subject.comment != lesson.subject.comment:
+            changes.append(f"💬 {escape(lesson.subject.comment or 'без комментария')}")
+            
+        return "; ".join(changes) or "изменено"
+
     @staticmethod
     def _num_to_emoji(num: str) -> str:
         """Конвертирует числовой номер пары в эмодзи"""
@@ -108,18 +207,46 @@ def _num_to_emoji(num: str) -> str:
             return EMOJI_NUMBERS[int(num)]
         return "❓"
 
+    @staticmethod
+    def _stale_note(timetable: TimeTable) -> str | None:
+        """Возвращает предупреждение, если сайт не ответил и показано сохраненное расписание"""
+        if not timetable.is_stale:
+            return None
+        
+        if timetable.fetched_at is None:
+            return "⚠️ Расписание может быть неактуальным\n"
+        
+        time_format = '%H:%M' if timetable.fetched_at.date() == date.today() else '%d.%m %H:%M'
+        return f"⚠️ Расписание может быть неактуальным (обновлено {timetable.fetched_at.strftime(time_format)})\n"
+
+    @staticmethod
+    def _add_stale_note(stale_note: str | None, formatted_schedule: list[str]) -> None:
+        """Добавляет предупреждение о неактуальном расписании, если оно есть"""
+        if stale_note is not None:
+            formatted_schedule.append(stale_note)
+
     @staticmethod
     def _add_schedule_link(formatted_schedule: list[str], schedule_link: str) -> str:
         """Добавляет ссылку на расписание и объединяет все строки"""
         formatted_schedule.append(f"🚀 <a href=\"{escape(schedule_link)}\">Ссылка на расписание</a>")
         return "\n".join(formatted_schedule)
 
+_settings = CacheSettings()
+
 # Создаем форматтеры для разных типов расписаний
-group_formatter = ScheduleFormatter(is_lecturer=False)
-lecturer_formatter = ScheduleFormatter(is_lecturer=True)
+group_formatter = ScheduleFormatter(is_lecturer=False, cache_size=_settings.RENDER_CACHE_SIZE)
+lecturer_formatter = ScheduleFormatter(is_lecturer=True, cache_size=_settings.RENDER_CACHE_SIZE)
+
+register_cache("group_render", group_formatter.cache_stats, lambda: len(group_formatter._cache))  # pyright: ignore[reportPrivateUsage]
+register_cache("lecturer_render", lecturer_formatter.cache_stats, lambda: len(lecturer_formatter._cache))  # pyright: ignore[reportPrivateUsage]
 
 def format_schedule(timetable_data: TimeTable, schedule_link: str, name: str, 
                    target_date: DateRange, is_lecturer: bool) -> str:
     """Функция-обертка для обратной совместимости"""
     formatter = lecturer_formatter if is_lecturer else group_formatter
-    return formatter.format_schedule(timetable_data, schedule_link, name, target_date)
+    with span("format"):
+        return formatter.format_schedule(timetable_data, schedule_link, name, target_date)
+
+def format_changes(changes: list[DayChanges], schedule_link: str, name: str, is_lecturer: bool) -> str:
+    formatter = lecturer_formatter if is_lecturer else group_formatter
+    return formatter.format_changes(changes, schedule_link, name)
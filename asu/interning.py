@@ -0,0 +1,71 @@
+from collections.abc import Hashable
+from dataclasses import dataclass
+import sys
+from typing import Any, Generic, TypeVar
+
+from utils.metrics import LabelValues, register_cache, registry
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+@dataclass
+class InternStats:
+    # values replaced by the pooled instance
+    hits: int = 0
+    # values added to the pool
+    misses: int = 0
+    # times the pool was cleared after reaching max size
+    resets: int = 0
+
+class InternPool(Generic[K, V]):
+    """Process-wide pool of immutable values, so equal values share one instance.
+
+    Values are looked up by key, usually upstream ID. If value of the key has changed,
+    the new value replaces the pooled one."""
+
+    def __init__(self, name: str, max_size: int) -> None:
+        self.name: str = name
+        self.max_size: int = max_size
+        self.stats: InternStats = InternStats()
+        # estimated bytes of duplicates, which were not kept in memory
+        self.saved_bytes: int = 0
+
+        self._entries: dict[K, V] = {}
+        pools[name] = self
+        register_cache(f"intern_{name}", self.stats, lambda: len(self))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def intern(self, key: K, value: V) -> V:
+        """Returns pooled instance equal to the value"""
+        if self.max_size <= 0:
+            return value
+
+        pooled = self._entries.get(key)
+        if pooled is not None and pooled == value:
+            self.stats.hits += 1
+            self.saved_bytes += sys.getsizeof(value)
+            return pooled
+
+        if pooled is None and len(self._entries) >= self.max_size:
+            # Values of timetables in memory stay shared, only new ones start a new pool
+            self._entries.clear()
+            self.stats.resets += 1
+
+        self.stats.misses += 1
+        self._entries[key] = value
+        return value
+
+def intern_string(value: str) -> str:
+    return sys.intern(value)
+
+# name -> pool
+pools: dict[str, 'InternPool[Any, Any]'] = {}
+
+def _get_saved_bytes() -> list[tuple[LabelValues, float]]:
+    return [((pool.name,), pool.saved_bytes) for pool in pools.values()]
+
+# Sizes, hits and resets of pools are cache metrics, registered by InternPool
+registry.callback_metric("intern_saved_bytes", "Estimated bytes of duplicates replaced by pooled values", "counter",
+                         ("pool",)).add_callback("pools", _get_saved_bytes)
@@ -0,0 +1,81 @@
+import asyncio
+from collections import deque
+import enum
+import time
+
+class RequestPriority(enum.IntEnum):
+    # Requests made by users, they are waiting for the response
+    INTERACTIVE = 0
+    # Prefetching, crawling and other work nobody is waiting for
+    BACKGROUND = 1
+
+class TokenBucketRateLimiter:
+    """Shared rate limiter of ASU API requests.
+
+    Bucket holds up to `burst` tokens and refills with `rate` tokens per second.
+    Requests waiting for a token are served by priority, then in order of arrival."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        if burst < 1:
+            raise ValueError("Burst must be at least 1")
+
+        self.rate: float = rate
+        self.burst: int = burst
+
+        self._tokens: float = float(burst)
+        self._updated_at: float = time.monotonic()
+        self._lanes: dict[RequestPriority, deque[asyncio.Future[None]]] = {
+            priority: deque() for priority in RequestPriority
+        }
+        self._dispatcher: asyncio.Task[None] | None = None
+
+    async def acquire(self, priority: RequestPriority = RequestPriority.INTERACTIVE) -> None:
+        """Waits until request is allowed to be made"""
+        self._refill()
+
+        if self._tokens >= 1 and not self._has_waiters():
+            self._tokens -= 1
+            return
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._lanes[priority].append(future)
+
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        # If waiter is cancelled, then the future is cancelled too and dispatcher will skip it
+        await future
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _has_waiters(self) -> bool:
+        return any(not future.done() for lane in self._lanes.values() for future in lane)
+
+    def _pop_waiter(self) -> asyncio.Future[None] | None:
+        for priority in RequestPriority:
+            lane = self._lanes[priority]
+
+            while lane:
+                future = lane.popleft()
+                if not future.done():
+                    return future
+
+        return None
+
+    async def _dispatch(self) -> None:
+        while True:
+            self._refill()
+
+            while self._tokens >= 1 and (future := self._pop_waiter()) is not None:
+                self._tokens -= 1
+                future.set_result(None)
+
+            if not self._has_waiters():
+                return
+
+            await asyncio.sleep((1 - self._tokens) / self.rate)
@@ -0,0 +1,108 @@
+"""Typed schemas of ASU API responses.
+
+Responses are decoded straight from bytes by msgspec, unknown fields are skipped without being
+materialized. Decoders are not strict, so numbers sent as strings are accepted."""
+from datetime import date
+from functools import lru_cache
+
+import msgspec
+
+class _Record(msgspec.Struct, rename="camel"):
+    pass
+
+class LessonGroupInfo(_Record):
+    group_code: str | None = None
+    group_faculty_code: str | None = None
+    group_id: int | None = None
+
+class LessonGroupRecord(_Record):
+    lesson_group: LessonGroupInfo = msgspec.field(default_factory=LessonGroupInfo)
+    lesson_sub_group: str | None = None
+
+class LessonLecturerRecord(_Record):
+    lecturer_name: str | None = None
+    lecturer_id_chair: int | None = None
+    lecturer_id: int | None = None
+    lecturer_chair_faculty_code: str | None = None
+    lecturer_position: str | None = None
+
+class BuildingRecord(_Record):
+    building_address: str | None = None
+    building_code: str | None = None
+
+class RoomRecord(_Record):
+    room_title: str | None = None
+
+class SubjectRecord(_Record):
+    subject_title: str | None = None
+
+class LessonRecord(_Record):
+    # format YYYYMMDD
+    lesson_date: str | None = None
+    lesson_num: str | int = ""
+    lesson_time_start: str | None = None
+    lesson_time_end: str | None = None
+    lesson_groups: list[LessonGroupRecord] = []
+    lesson_lecturers: list[LessonLecturerRecord] = []
+    lesson_building: BuildingRecord = msgspec.field(default_factory=BuildingRecord)
+    lesson_room: RoomRecord = msgspec.field(default_factory=RoomRecord)
+    lesson_subject: SubjectRecord = msgspec.field(default_factory=SubjectRecord)
+    lesson_subject_type: str | None = None
+    lesson_commentary: str | None = None
+
+class ScheduleRecords(_Record):
+    records: list[LessonRecord] = []
+
+class ScheduleResponse(_Record):
+    schedule: ScheduleRecords = msgspec.field(default_factory=ScheduleRecords)
+
+class GroupRecord(_Record):
+    group_id: int
+    group_code: str
+    # FACULTY_ID/GROUP_ID
+    path: str
+
+class GroupRecords(_Record):
+    records: list[GroupRecord] = []
+
+class GroupsResponse(_Record):
+    groups: GroupRecords = msgspec.field(default_factory=GroupRecords)
+
+class LecturerRecord(_Record):
+    lecturer_id: int
+    lecturer_id_chair: int
+    lecturer_name: str | None
+    lecturer_position: str | None
+    # FACULTY_ID/CHAIR_ID/LECTURER_ID
+    path: str
+
+class LecturerRecords(_Record):
+    records: list[LecturerRecord] = []
+
+class LecturersResponse(_Record):
+    lecturers: LecturerRecords = msgspec.field(default_factory=LecturerRecords)
+
+class ChairRecord(_Record):
+    # FACULTY_ID/CHAIR_ID
+    path: str
+
+class ChairRecords(_Record):
+    records: list[ChairRecord] = []
+
+class ChairsResponse(_Record):
+    chairs: ChairRecords = msgspec.field(default_factory=ChairRecords)
+
+schedule_decoder: msgspec.json.Decoder[ScheduleResponse] = msgspec.json.Decoder(ScheduleResponse, strict=False)
+# one record of the schedule, used when response is streamed
+lesson_decoder: msgspec.json.Decoder[LessonRecord] = msgspec.json.Decoder(LessonRecord, strict=False)
+groups_decoder: msgspec.json.Decoder[GroupsResponse] = msgspec.json.Decoder(GroupsResponse, strict=False)
+lecturers_decoder: msgspec.json.Decoder[LecturersResponse] = msgspec.json.Decoder(LecturersResponse, strict=False)
+chairs_decoder: msgspec.json.Decoder[ChairsResponse] = msgspec.json.Decoder(ChairsResponse, strict=False)
+
+@lru_cache(maxsize=1024)
+def parse_compact_date(value: str) -> date:
+    """Parses YYYYMMDD date. Much faster than datetime.strptime, and a response has only a few distinct dates"""
+    if len(value) != 8 or not value.isdigit():
+        raise ValueError(f"Invalid date: {value!r}")
+
+    return date(int(value[:4]), int(value[4:6]), int(value[6:]))
@@ -0,0 +1,155 @@
+from collections import deque
+from collections.abc import Callable, Hashable
+import re
+from typing import Generic, TypeVar
+
+T = TypeVar('T')
+
+# Latin letters looking like cyrillic ones, users often type group names with them
+_LOOKALIKES: dict[int, str] = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у', 'ё': 'е',
+})
+_DASHES_PATTERN = re.compile(r"[‐‑‒–—―−_]")
+_IGNORED_PATTERN = re.compile(r"[\s.,]+")
+
+# Min similarity of trigrams for fuzzy match
+_MIN_SIMILARITY: float = 0.3
+
+def normalize(text: str) -> str:
+    """Returns search key of the text: lower case, cyrillic letters, one kind of dashes, no spaces and dots"""
+    text = text.lower().translate(_LOOKALIKES)
+    text = _DASHES_PATTERN.sub('-', text)
+    return _IGNORED_PATTERN.sub('', text)
+
+def _trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class _TrieNode:
+    __slots__: tuple[str, ...] = ('children', 'items')
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        # identities of items, which key ends in this node
+        self.items: set[Hashable] = set()
+
+class SearchIndex(Generic[T]):
+    """In-memory index of names with prefix and fuzzy search.
+
+    Results are ranked: exact match, then keys starting with the query (shorter first),
+    then keys containing the query, then keys with similar trigrams."""
+
+    def __init__(self, get_identity: Callable[[T], Hashable]) -> None:
+        self._get_identity: Callable[[T], Hashable] = get_identity
+
+        self._root: _TrieNode = _TrieNode()
+        self._trigrams: dict[str, set[Hashable]] = {}
+        # identity -> (key, item)
+        self._items: dict[Hashable, tuple[str, T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, name: str, item: T) -> None:
+        """Adds item to the index. Item with the same identity is replaced"""
+        key = normalize(name)
+        if not key:
+            return
+
+        identity = self._get_identity(item)
+        if identity in self._items:
+            self._remove(identity)
+
+        self._items[identity] = (key, item)
+
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+        node.items.add(identity)
+
+        for trigram in _trigrams(key):
+            self._trigrams.setdefault(trigram, set()).add(identity)
+
+    def get(self, identity: Hashable) -> T | None:
+        """Returns item with the identity, None if it is not indexed"""
+        entry = self._items.get(identity)
+        return entry[1] if entry is not None else None
+
+    def search(self, query: str, limit: int = 5, fuzzy: bool = True) -> list[T]:
+        """Returns up to `limit` items ranked by similarity to the query.
+        Without `fuzzy` only keys starting with or containing the query are matched"""
+        key = normalize(query)
+        if not key:
+            return []
+
+        found: list[Hashable] = self._search_prefix(key, limit)
+        if len(found) < limit:
+            found.extend(self._search_similar(key, set(found), limit - len(found), fuzzy))
+
+        return [self._items[identity][1] for identity in found]
+
+    def _search_prefix(self, key: str, limit: int) -> list[Hashable]:
+        node = self._root
+        for char in key:
+            next_node = node.children.get(char)
+            if next_node is None:
+                return []
+            node = next_node
+
+        # Breadth-first, so shorter keys go first
+        found: list[Hashable] = []
+        queue: deque[_TrieNode] = deque([node])
+        while queue and len(found) < limit:
+            node = queue.popleft()
+            found.extend(sorted(node.items, key=lambda identity: self._items[identity][0]))
+            queue.extend(node.children[char] for char in sorted(node.children))
+
+        return found[:limit]
+
+    def _search_similar(self, key: str, excluded: set[Hashable], limit: int, fuzzy: bool) -> list[Hashable]:
+        query_trigrams = _trigrams(key)
+
+        shared: dict[Hashable, int] = {}
+        if len(key) < 3:
+            # Short query has no trigrams in the middle of keys, so look through all keys
+            shared = {identity: 0 for identity, (item_key, _) in self._items.items() if key in item_key}
+        else:
+            for trigram in query_trigrams:
+                for identity in self._trigrams.get(trigram, ()):
+                    shared[identity] = shared.get(identity, 0) + 1
+
+        scored: list[tuple[float, str, Hashable]] = []
+        for identity, count in shared.items():
+            if identity in excluded:
+                continue
+            
+            item_key = self._items[identity][0]
+
+            if key in item_key:
+                # substring match is better than any trigram similarity
+                score = 2.0 - len(item_key) / 1000
+            elif fuzzy:
+                score = count / (len(query_trigrams) + len(_trigrams(item_key)) - count)
+                if score < _MIN_SIMILARITY:
+                    continue
+            else:
+                continue
+
+            scored.append((-score, item_key, identity))
+
+        scored.sort(key=lambda entry: (entry[0], entry[1]))
+        return [identity for _, _, identity in scored[:limit]]
+
+    def _remove(self, identity: Hashable) -> None:
+        key, _ = self._items.pop(identity)
+
+        node = self._root
+        for char in key:
+            node = node.children[char]
+        node.items.discard(identity)
+
+        for trigram in _trigrams(key):
+            identities = self._trigrams.get(trigram)
+            if identities is not None:
+                identities.discard(identity)
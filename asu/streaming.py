@@ -0,0 +1,136 @@
+import re
+
+# Bytes changing the structure outside of strings
+_STRUCTURAL_PATTERN = re.compile(rb'[{}\[\]",:]')
+# Inside of array element only nesting of objects matters
+_ELEMENT_PATTERN = re.compile(rb'[{}"]')
+_STRING_END_PATTERN = re.compile(rb'["\\]')
+
+class JsonArraySplitter:
+    """Splits JSON document arriving in chunks into raw elements of the array at `path`.
+
+    Only the element being read is kept in memory, everything before it is dropped.
+    Example: path ("schedule", "records") yields objects of {"schedule": {"records": [{...}, {...}]}}"""
+
+    def __init__(self, path: tuple[str, ...]) -> None:
+        self.path: tuple[str, ...] = path
+
+        self._buffer: bytearray = bytearray()
+        self._position: int = 0
+        # open objects and arrays: (b'{' or b'[', key of the container in its parent)
+        self._stack: list[tuple[bytes, str | None]] = []
+        # key of the next value in the current object
+        self._key: str | None = None
+        self._expect_key: bool = False
+        self._in_string: bool = False
+        self._string_start: int = 0
+        # nesting of objects in the element being read, 0 if no element is read
+        self._element_depth: int = 0
+        self._element_start: int = 0
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """Consumes next chunk of the document and returns elements completed in it"""
+        self._buffer += chunk
+        elements: list[bytes] = []
+
+        while True:
+            if self._in_string:
+                if not self._skip_string():
+                    break
+                continue
+
+            pattern = _ELEMENT_PATTERN if self._element_depth else _STRUCTURAL_PATTERN
+            match = pattern.search(self._buffer, self._position)
+            if match is None:
+                self._position = len(self._buffer)
+                break
+
+            self._position = match.end()
+            char = match.group()
+
+            if self._element_depth:
+                if char == b'"':
+                    self._start_string()
+                elif char == b'{':
+                    self._element_depth += 1
+                else:
+                    self._element_depth -= 1
+                    if not self._element_depth:
+                        elements.append(bytes(self._buffer[self._element_start:self._position]))
+                continue
+
+            self._handle_structural(char, match.start())
+
+        self._compact()
+        return elements
+
+    def _is_target_array(self) -> bool:
+        # key of the root is None
+        return self._stack[-1][0] == b'[' and tuple(key for _, key in self._stack[1:]) == self.path
+
+    def _handle_structural(self, char: bytes, start: int) -> None:
+        if char == b'"':
+            self._start_string()
+        elif char in (b'{', b'['):
+            if char == b'{' and self._stack and self._is_target_array():
+                self._element_depth = 1
+                self._element_start = start
+                return
+
+            self._stack.append((char, self._key))
+            self._key = None
+            self._expect_key = char == b'{'
+        elif char in (b'}', b']'):
+            if self._stack:
+                self._stack.pop()
+            self._key = None
+            self._expect_key = False
+        elif char == b',':
+            self._key = None
+            self._expect_key = bool(self._stack) and self._stack[-1][0] == b'{'
+        else:
+            # colon after key
+            self._expect_key = False
+
+    def _start_string(self) -> None:
+        self._in_string = True
+        self._string_start = self._position
+
+    def _skip_string(self) -> bool:
+        """Moves to the end of the string. Returns False if more data is needed"""
+        while True:
+            match = _STRING_END_PATTERN.search(self._buffer, self._position)
+            if match is None:
+                self._position = len(self._buffer)
+                return False
+
+            if match.group() == b'\\':
+                if match.end() >= len(self._buffer):
+                    # escaped char is in the next chunk
+                    self._position = match.start()
+                    return False
+
+                self._position = match.end() + 1
+                continue
+
+            self._position = match.end()
+            self._in_string = False
+
+            if self._expect_key and not self._element_depth:
+                self._key = self._buffer[self._string_start:match.start()].decode()
+            return True
+
+    def _compact(self) -> None:
+        """Drops bytes, which are not needed anymore"""
+        if self._element_depth:
+            keep_from = self._element_start
+        elif self._in_string:
+            keep_from = self._string_start
+        else:
+            keep_from = self._position
+
+        if keep_from:
+            del self._buffer[:keep_from]
+            self._position -= keep_from
+            self._element_start = max(self._element_start - keep_from, 0)
+            self._string_start = max(self._string_start - keep_from, 0)
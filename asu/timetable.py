@@ -1,9 +1,43 @@
-from dataclasses import dataclass
-from datetime import date
+from dataclasses import dataclass, field
+from datetime import date, datetime
+import hashlib
+import json
+from typing import Any
 
-from database.models import Group, Lecturer
+from settings import CacheSettings
+from utils.daterange import DateRange
 
-@dataclass
+from .interning import InternPool, intern_string
+
+# Faculty id of groups and lecturers, whose faculty code is not known yet
+UNKNOWN_FACULTY_ID: int = 0
+
+# Value objects below are immutable and slotted, so thousands of cached timetables stay compact.
+
+@dataclass(frozen=True, slots=True)
+class LessonGroup:
+    group_id: int
+    faculty_id: int
+    name: str
+    
+    @classmethod
+    def interned(cls, group_id: int, faculty_id: int, name: str) -> 'LessonGroup':
+        return _group_pool.intern(group_id, cls(group_id, faculty_id, intern_string(name)))
+
+@dataclass(frozen=True, slots=True)
+class LessonLecturer:
+    lecturer_id: int
+    faculty_id: int
+    chair_id: int
+    name: str
+    position: str
+    
+    @classmethod
+    def interned(cls, lecturer_id: int, faculty_id: int, chair_id: int, name: str, position: str) -> 'LessonLecturer':
+        lecturer = cls(lecturer_id, faculty_id, chair_id, intern_string(name), intern_string(position))
+        return _lecturer_pool.intern((lecturer_id, chair_id), lecturer)
+
+@dataclass(frozen=True, slots=True)
 class Room:
     # Address where lecture will be
     address: str
@@ -11,8 +45,13 @@ class Room:
     address_code: str
     # Room number where lecture will be
     number: str
+    
+    @classmethod
+    def interned(cls, address: str, address_code: str, number: str) -> 'Room':
+        room = cls(intern_string(address), intern_string(address_code), intern_string(number))
+        return _room_pool.intern(room, room)
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Subject:
     title: str
     # type of subject. Examples: пр.з. ; лек.
@@ -20,16 +59,30 @@ class Subject:
     # Optional comment. Example: дистанционно-синхронно
     comment: str | None
     # name of groups
-    groups: list[Group]
+    groups: tuple[LessonGroup, ...]
     
     # name of lecturer
-    lecturers: list[Lecturer]
+    lecturers: tuple[LessonLecturer, ...]
     room: Room
     
     # Some subjects can have sub groups
-    sub_groups: list[str] | None = None
+    sub_groups: tuple[str, ...] | None = None
+    
+    @classmethod
+    def interned(cls, title: str, type: str, comment: str | None, groups: tuple[LessonGroup, ...],
+                 lecturers: tuple[LessonLecturer, ...], room: Room, sub_groups: tuple[str, ...] | None = None) -> 'Subject':
+        subject = cls(intern_string(title), intern_string(type), intern_string(comment) if comment is not None else None,
+                      groups, lecturers, room, sub_groups)
+        return _subject_pool.intern(subject, subject)
+
+_pool_size = CacheSettings().INTERN_POOL_SIZE
+# Groups and lecturers are pooled by ASU IDs, rooms and subjects by value
+_group_pool: InternPool[int, LessonGroup] = InternPool("groups", _pool_size)
+_lecturer_pool: InternPool[tuple[int, int], LessonLecturer] = InternPool("lecturers", _pool_size)
+_room_pool: InternPool[Room, Room] = InternPool("rooms", _pool_size)
+_subject_pool: InternPool[Subject, Subject] = InternPool("subjects", _pool_size)
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Lesson:
     # lesson num sorted by time
     number: str
@@ -38,7 +91,117 @@ class Lesson:
     time_end: str
     subject: Subject
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TimeTable:
-    days: dict[date, list[Lesson]]
+    days: dict[date, tuple[Lesson, ...]]
+    # When the timetable was received from ASU, None if unknown
+    fetched_at: datetime | None = field(default=None, compare=False)
+    # Timetable is served from the cache, because ASU didn't respond in time
+    is_stale: bool = field(default=False, compare=False)
+    
+    # Content hashes of days, computed on demand
+    _day_digests: dict[date, str] = field(default_factory=dict, init=False, repr=False, compare=False)
+    
+    def day_digest(self, day: date) -> str:
+        """Returns hash of lessons of the day, it changes only when lessons are changed"""
+        digest = self._day_digests.get(day)
+        if digest is None:
+            lessons = [_lesson_to_dict(lesson) for lesson in self.days.get(day, ())]
+            data = json.dumps(lessons, ensure_ascii=False, separators=(',', ':')).encode()
+            digest = self._day_digests[day] = hashlib.blake2b(data, digest_size=16).hexdigest()
+            
+        return digest
+    
+    @property
+    def digest(self) -> str:
+        """Returns hash of all lessons in the timetable"""
+        day_digests = ",".join(f"{day:%Y%m%d}:{self.day_digest(day)}" for day in sorted(self.days))
+        return hashlib.blake2b(day_digests.encode(), digest_size=16).hexdigest()
+    
+    @property
+    def has_unknown_faculties(self) -> bool:
+        """Some groups or lecturers have UNKNOWN_FACULTY_ID. Such timetable is cached for a short time,
+        so it is parsed again once faculties are refreshed"""
+        return any(group.faculty_id == UNKNOWN_FACULTY_ID for lessons in self.days.values() for lesson in lessons
+                   for group in lesson.subject.groups) \
+            or any(lecturer.faculty_id == UNKNOWN_FACULTY_ID for lessons in self.days.values() for lesson in lessons
+                   for lecturer in lesson.subject.lecturers)
+    
+    def slice(self, date_range: DateRange) -> 'TimeTable':
+        """Returns timetable with days in the range. Computed hashes are shared"""
+        time_table = TimeTable({day: lessons for day, lessons in self.days.items() if date_range.is_date_in_range(day)},
+                               fetched_at=self.fetched_at, is_stale=self.is_stale)
+        
+        for day in time_table.days:
+            time_table._day_digests[day] = self.day_digest(day)
+            
+        return time_table
+    
+    def as_stale(self) -> 'TimeTable':
+        """Returns the same timetable marked as possibly outdated"""
+        time_table = TimeTable(self.days, fetched_at=self.fetched_at, is_stale=True)
+        time_table._day_digests.update(self._day_digests)
+        
+        return time_table
+    
+    @staticmethod
+    def merge(time_tables: list['TimeTable']) -> 'TimeTable':
+        """Combines timetables of different days into one. It is as old as the oldest of them"""
+        fetched_at = [time_table.fetched_at for time_table in time_tables if time_table.fetched_at is not None]
+        merged = TimeTable({}, fetched_at=min(fetched_at, default=None),
+                           is_stale=any(time_table.is_stale for time_table in time_tables))
+        
+        for time_table in time_tables:
+            merged.days.update(time_table.days)
+            merged._day_digests.update(time_table._day_digests)
+            
+        return merged
+
+
+def timetable_to_json(timetable: TimeTable) -> str:
+    """Serializes timetable to store it in the database cache"""
+    days: dict[str, list[dict[str, Any]]] = {}
+    
+    for day, lessons in timetable.days.items():
+        days[day.strftime('%Y%m%d')] = [_lesson_to_dict(lesson) for lesson in lessons]
+        
+    return json.dumps(days, ensure_ascii=False, separators=(',', ':'))
 
+def timetable_from_json(data: str, fetched_at: datetime | None = None) -> TimeTable:
+    """Restores timetable serialized by timetable_to_json"""
+    days: dict[date, tuple[Lesson, ...]] = {}
+    
+    raw_days: dict[str, list[dict[str, Any]]] = json.loads(data)
+    for day, lessons in raw_days.items():
+        days[datetime.strptime(day, '%Y%m%d').date()] = tuple(_lesson_from_dict(lesson) for lesson in lessons)
+        
+    return TimeTable(days, fetched_at=fetched_at)
+
+def _lesson_to_dict(lesson: Lesson) -> dict[str, Any]:
+    subject = lesson.subject
+    
+    return {
+        'number': lesson.number,
+        'time_start': lesson.time_start,
+        'time_end': lesson.time_end,
+        'title': subject.title,
+        'type': subject.type,
+        'comment': subject.comment,
+        'groups': [[group.group_id, group.faculty_id, group.name] for group in subject.groups],
+        'lecturers': [[lecturer.lecturer_id, lecturer.faculty_id, lecturer.chair_id, lecturer.name, lecturer.position]
+                      for lecturer in subject.lecturers],
+        'room': [subject.room.address, subject.room.address_code, subject.room.number],
+        'sub_groups': subject.sub_groups,
+    }
+
+def _lesson_from_dict(record: dict[str, Any]) -> Lesson:
+    groups = tuple(LessonGroup.interned(*group) for group in record['groups'])
+    lecturers = tuple(LessonLecturer.interned(*lecturer) for lecturer in record['lecturers'])
+    sub_groups = tuple(record['sub_groups']) if record['sub_groups'] is not None else None
+    
+    subject = Subject.interned(title=record['title'], type=record['type'], comment=record['comment'],
+                               groups=groups, lecturers=lecturers, room=Room.interned(*record['room']),
+                               sub_groups=sub_groups)
+    
+    return Lesson(intern_string(record['number']), intern_string(record['time_start']),
+                  intern_string(record['time_end']), subject)
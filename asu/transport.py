@@ -0,0 +1,182 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+import enum
+import importlib.util
+import logging
+import random
+import time
+
+import httpx
+
+from settings import AsuSettings
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+# Statuses meaning ASU is overloaded or temporarily broken, request can succeed later
+_RETRY_STATUSES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+# Max delay before retry, also used to limit Retry-After header
+_MAX_RETRY_DELAY: float = 10.0
+
+class AsuUnavailableError(Exception):
+    """ASU can't be reached or responds with errors"""
+
+class CircuitOpenError(AsuUnavailableError):
+    """Request was not sent, because recent requests to ASU failed"""
+
+class CircuitState(enum.Enum):
+    # requests are sent
+    CLOSED = 1
+    # requests fail fast
+    OPEN = 2
+    # one trial request is sent to check if ASU is back
+    HALF_OPEN = 3
+
+class CircuitBreaker:
+    """Stops sending requests after `failure_threshold` failures in a row for `reset_timeout` seconds"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold: int = failure_threshold
+        self.reset_timeout: float = reset_timeout
+
+        self.state: CircuitState = CircuitState.CLOSED
+        self._failures: int = 0
+        self._opened_at: float = 0.0
+
+    def before_request(self) -> None:
+        """Raises CircuitOpenError if request must not be sent"""
+        if self.state == CircuitState.CLOSED:
+            return
+
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            # Let one request through, others keep failing until it finishes.
+            # If the trial request is lost (cancelled), another one is let through after the timeout
+            self.state = CircuitState.HALF_OPEN
+            self._opened_at = time.monotonic()
+            return
+
+        raise CircuitOpenError("ASU is unavailable, request was not sent")
+
+    def record_success(self) -> None:
+        if self.state != CircuitState.CLOSED:
+            _logger.info("Запросы к АлтГУ восстановлены")
+
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+
+        if self.state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                _logger.warning("АлтГУ недоступен, запросы приостановлены на %.0f с", self.reset_timeout)
+
+            self.state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """Retries idempotent requests with jittered exponential backoff and fails fast while circuit is open.
+
+    `before_attempt` is awaited before every attempt, retries included, so the rate limiter counts them.
+    All attempts of a request fit in `deadline` seconds since the first one, retries that don't fit are not made"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, retries: int, backoff: float,
+                 circuit_breaker: CircuitBreaker, deadline: float,
+                 before_attempt: Callable[[httpx.Request], Awaitable[None]] | None = None) -> None:
+        self.transport: httpx.AsyncBaseTransport = transport
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.circuit_breaker: CircuitBreaker = circuit_breaker
+        self.deadline: float = deadline
+        self.before_attempt: Callable[[httpx.Request], Awaitable[None]] | None = before_attempt
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:  # pyright: ignore[reportImplicitOverride]
+        self.circuit_breaker.before_request()
+
+        attempts = self.retries + 1 if request.method in ("GET", "HEAD") else 1
+        deadline: float | None = None
+        for attempt in range(attempts):
+            if deadline is None:
+                # Deadline starts after the first wait, background requests can wait for the rate limiter long
+                if self.before_attempt is not None:
+                    await self.before_attempt(request)
+                deadline = time.monotonic() + self.deadline
+                sending = self.transport.handle_async_request(request)
+            else:
+                sending = self._retry(request)
+
+            try:
+                response = await asyncio.wait_for(sending, timeout=max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError as e:
+                self.circuit_breaker.record_failure()
+                raise httpx.TimeoutException("Request to ASU exceeded its deadline", request=request) from e
+            except httpx.TransportError:
+                delay = self._get_delay(attempt, None)
+                if not self._can_retry(attempt, attempts, deadline, delay):
+                    self.circuit_breaker.record_failure()
+                    raise
+
+                _logger.warning("Ошибка запроса %s, попытка %d из %d", request.url.path, attempt + 1, attempts,
+                                exc_info=True)
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code not in _RETRY_STATUSES:
+                self.circuit_breaker.record_success()
+                return response
+
+            delay = self._get_delay(attempt, response)
+            if not self._can_retry(attempt, attempts, deadline, delay):
+                self.circuit_breaker.record_failure()
+                return response
+
+            _logger.warning("АлтГУ ответил %d на %s, попытка %d из %d", response.status_code, request.url.path,
+                            attempt + 1, attempts)
+            await response.aclose()
+            await asyncio.sleep(delay)
+
+        raise AssertionError("unreachable")
+
+    async def _retry(self, request: httpx.Request) -> httpx.Response:
+        if self.before_attempt is not None:
+            await self.before_attempt(request)
+        return await self.transport.handle_async_request(request)
+
+    @staticmethod
+    def _can_retry(attempt: int, attempts: int, deadline: float, delay: float) -> bool:
+        """Returns True if there are attempts left and the next one starts before the deadline"""
+        return attempt < attempts - 1 and time.monotonic() + delay < deadline
+
+    async def aclose(self) -> None:  # pyright: ignore[reportImplicitOverride]
+        await self.transport.aclose()
+
+    def _get_delay(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), _MAX_RETRY_DELAY)
+
+        # Full jitter, so concurrent requests don't retry at the same moment
+        return random.uniform(0, min(self.backoff * 2 ** attempt, _MAX_RETRY_DELAY))
+
+def create_http_client(settings: AsuSettings, transport: httpx.AsyncBaseTransport | None = None,
+                       before_attempt: Callable[[httpx.Request], Awaitable[None]] | None = None) -> httpx.AsyncClient:
+    """Creates client of ASU. `transport` replaces network transport, for example with httpx.MockTransport.
+    `before_attempt` is awaited before every attempt of a request, like waiting for the rate limiter"""
+    if transport is None:
+        http2 = settings.ASU_HTTP2
+        if http2 and importlib.util.find_spec("h2") is None:
+            _logger.warning("HTTP/2 отключен: пакет h2 не установлен")
+            http2 = False
+
+        limits = httpx.Limits(max_connections=settings.ASU_MAX_CONNECTIONS,
+                              max_keepalive_connections=settings.ASU_MAX_KEEPALIVE_CONNECTIONS,
+                              keepalive_expiry=settings.ASU_KEEPALIVE_EXPIRY)
+        transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+
+    timeout = httpx.Timeout(connect=settings.ASU_CONNECT_TIMEOUT, read=settings.ASU_READ_TIMEOUT,
+                            write=settings.ASU_WRITE_TIMEOUT, pool=settings.ASU_POOL_TIMEOUT)
+    circuit_breaker = CircuitBreaker(settings.ASU_CIRCUIT_FAILURE_THRESHOLD, settings.ASU_CIRCUIT_RESET_TIMEOUT)
+
+    return httpx.AsyncClient(
+        transport=ResilientTransport(transport, settings.ASU_RETRIES, settings.ASU_RETRY_BACKOFF, circuit_breaker,
+                                     settings.ASU_REQUEST_DEADLINE, before_attempt),
+        timeout=timeout, follow_redirects=True)
@@ -0,0 +1,142 @@
+"""Benchmark of decoding ASU responses into timetables and search results.
+
+Compares typed msgspec decoding of asu.schemas with the previous parser:
+response.json() followed by walking dictionaries with record.get(...) and datetime.strptime.
+
+Responses are generated by benchmarks.synthetic. Recorded responses can be added with --response,
+every file is decoded as a schedule response.
+
+Usage:
+    python -m benchmarks.decoding
+    python -m benchmarks.decoding --response week.json --response semester.json
+"""
+import argparse
+import asyncio
+from collections.abc import Callable
+from datetime import date, datetime
+import json
+import time
+from typing import Any
+
+from .synthetic import SyntheticSchedule, group_search_response, lecturer_search_response, prepare_environment
+
+prepare_environment()
+
+from asu import client  # noqa: E402
+from asu.api import APIClient  # noqa: E402
+from asu.schemas import groups_decoder, lecturers_decoder, schedule_decoder  # noqa: E402
+from asu.timetable import Lesson, LessonGroup, LessonLecturer, Room, Subject, TimeTable  # noqa: E402
+from utils.daterange import DateRange  # noqa: E402
+
+asyncio.run(client.load_faculties())
+
+_ALL_DATES = DateRange(date.min, date.max)
+
+def parse_schedule_legacy(data: bytes) -> TimeTable:
+    """Previous parser of APIClient, producing the same timetable"""
+    records: list[dict[Any, Any]] = json.loads(data).get("schedule", {}).get("records", [])
+    days: dict[date, list[Lesson]] = {}
+
+    for record in records:
+        lesson_date: str = record.get("lessonDate") or ""
+        if not lesson_date:
+            continue
+
+        formatted_date = datetime.strptime(lesson_date, "%Y%m%d").date()
+        if not _ALL_DATES.is_date_in_range(formatted_date):
+            continue
+
+        groups: list[LessonGroup] = []
+        for group_record in record.get("lessonGroups", []):
+            lesson_group_record = group_record.get("lessonGroup", {})
+            faculty_id = client.faculties.get(lesson_group_record.get("groupFacultyCode") or "") or ""
+            groups.append(LessonGroup.interned(int(lesson_group_record.get("groupId") or ""), int(faculty_id),
+                                               lesson_group_record.get("groupCode") or ""))
+
+        lecturers: list[LessonLecturer] = []
+        for lecturer_record in record.get("lessonLecturers", []):
+            faculty_id = client.faculties.get(lecturer_record.get("lecturerChairFacultyCode", ""), "")
+            lecturers.append(LessonLecturer.interned(int(lecturer_record.get("lecturerId", "")), int(faculty_id),
+                                                     int(lecturer_record.get("lecturerIdChair", "")),
+                                                     lecturer_record.get("lecturerName", ""),
+                                                     lecturer_record.get("lecturerPosition", "")))
+
+        building = record.get("lessonBuilding", {})
+        address_code = building.get("buildingCode", "")
+        if isinstance(address_code, str) and address_code == '`':
+            address_code = ""
+        room = Room.interned(building.get("buildingAddress", ""), address_code,
+                             record.get("lessonRoom", {}).get("roomTitle", "") or "")
+
+        subject = Subject.interned(record.get("lessonSubject", {}).get("subjectTitle", ""),
+                                   (record.get("lessonSubjectType") or "").strip(),
+                                   (record.get("lessonCommentary") or "").strip(),
+                                   tuple(groups), tuple(lecturers), room)
+        days.setdefault(formatted_date, []).append(
+            Lesson(record.get("lessonNum", ""), record.get("lessonTimeStart", ""), record.get("lessonTimeEnd", ""), subject))
+
+    return TimeTable({day: tuple(sorted(lessons, key=lambda l: int(l.number))) for day, lessons in days.items()})
+
+def parse_schedule_typed(data: bytes) -> TimeTable:
+    records = schedule_decoder.decode(data).schedule.records
+    return client._process_schedule_data(records, _ALL_DATES)  # pyright: ignore[reportPrivateUsage]
+
+def parse_groups_legacy(data: bytes) -> list[dict[str, Any]]:
+    return [{'group_id': int(record["groupId"]), 'faculty_id': int(record["path"].split("/")[0]),
+             'name': record["groupCode"]}
+            for record in json.loads(data).get("groups", {}).get("records", [])]
+
+def parse_groups_typed(data: bytes) -> list[dict[str, Any]]:
+    return [APIClient._parse_group_record(record)  # pyright: ignore[reportPrivateUsage]
+            for record in groups_decoder.decode(data).groups.records]
+
+def parse_lecturers_legacy(data: bytes) -> list[dict[str, Any]]:
+    return [{'lecturer_id': int(record["lecturerId"]), 'faculty_id': int(record["path"].split("/")[0]),
+             'chair_id': int(record["lecturerIdChair"]), 'name': record["lecturerName"],
+             'position': record["lecturerPosition"]}
+            for record in json.loads(data).get("lecturers", {}).get("records", [])]
+
+def parse_lecturers_typed(data: bytes) -> list[dict[str, Any]]:
+    return [APIClient._parse_lecturer_record(record)  # pyright: ignore[reportPrivateUsage]
+            for record in lecturers_decoder.decode(data).lecturers.records]
+
+def measure(parse: Callable[[bytes], Any], data: bytes, seconds: float) -> float:
+    """Returns microseconds per response"""
+    iterations = 0
+    started_at = time.perf_counter()
+
+    while time.perf_counter() - started_at < seconds:
+        parse(data)
+        iterations += 1
+
+    return (time.perf_counter() - started_at) / iterations * 1_000_000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--response", action="append", default=[], help="recorded schedule response (JSON file)")
+    parser.add_argument("--seconds", type=float, default=1.0, help="duration of each measurement")
+    args = parser.parse_args()
+
+    cases: list[tuple[str, bytes, Callable[[bytes], Any], Callable[[bytes], Any]]] = []
+    for weeks in [1, 4, 18]:
+        cases.append((f"schedule {weeks}w", SyntheticSchedule(weeks=weeks).response_bytes(),
+                      parse_schedule_legacy, parse_schedule_typed))
+    for path in args.response:
+        with open(path, "rb") as file:
+            cases.append((f"schedule {path}", file.read(), parse_schedule_legacy, parse_schedule_typed))
+    for count in [1, 300]:
+        cases.append((f"groups {count}", group_search_response(count), parse_groups_legacy, parse_groups_typed))
+        cases.append((f"lecturers {count}", lecturer_search_response(count), parse_lecturers_legacy,
+                      parse_lecturers_typed))
+
+    print(f"{'response':<28}{'size':>10}{'legacy':>12}{'typed':>12}{'speedup':>10}")
+    for name, data, parse_legacy, parse_typed in cases:
+        if parse_legacy(data) != parse_typed(data):
+            raise SystemExit(f"{name}: parsers returned different results")
+
+        legacy = measure(parse_legacy, data, args.seconds)
+        typed = measure(parse_typed, data, args.seconds)
+        print(f"{name:<28}{len(data) / 1024:>8.1f}KB{legacy:>10.1f}us{typed:>10.1f}us{legacy / typed:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Benchmark of the parse → format path every schedule request goes through.
+
+Covers APIClient._process_schedule_data, APIClient._get_subject, ScheduleFormatter.format_schedule
+and DateRange filtering on timetables made by benchmarks.synthetic. Every case is run --repeat times,
+the median, p95 and minimum time of one call are printed and written as JSON with --output.
+
+A previous result can be passed with --compare, the benchmark exits with code 1 if any case
+became slower than the baseline by more than --threshold.
+
+Usage:
+    python -m benchmarks.hot_path --output before.json
+    python -m benchmarks.hot_path --compare before.json --output after.json
+    python -m benchmarks.hot_path --weeks 18 --groups 200 --lecturers 150 --lessons-per-day 6
+"""
+import argparse
+import asyncio
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any
+
+from .synthetic import SyntheticSchedule, prepare_environment
+
+prepare_environment()
+
+from asu import client  # noqa: E402
+from asu.formatting import ScheduleFormatter  # noqa: E402
+from asu.schemas import schedule_decoder  # noqa: E402
+from utils.daterange import DateRange  # noqa: E402
+
+asyncio.run(client.load_faculties())
+
+_SCHEDULE_LINK = "https://www.asu.ru/timetable/students/5/100000/"
+_NAME = "305с11-4"
+
+@dataclass
+class Result:
+    name: str
+    # calls in one sample
+    number: int
+    # microseconds per call
+    median_us: float
+    p95_us: float
+    min_us: float
+
+def measure(name: str, func: Callable[[], Any], repeat: int, sample_seconds: float) -> Result:
+    """Calls `func` in samples of about `sample_seconds` and returns time of one call"""
+    # Calibrate count of calls in a sample
+    number = 1
+    while True:
+        started_at = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - started_at >= sample_seconds / 10 or number >= 1_000_000:
+            break
+        number *= 2
+    number = max(int(number * sample_seconds / max(time.perf_counter() - started_at, 1e-9)), 1)
+
+    samples: list[float] = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started_at) / number * 1_000_000)
+
+    samples.sort()
+    return Result(name, number, statistics.median(samples), samples[min(int(len(samples) * 0.95), len(samples) - 1)],
+                  samples[0])
+
+def run(args: argparse.Namespace) -> list[Result]:
+    schedule = SyntheticSchedule(weeks=args.weeks, lessons_per_day=args.lessons_per_day, groups=args.groups,
+                                 lecturers=args.lecturers, seed=args.seed)
+    records = schedule_decoder.decode(schedule.response_bytes()).schedule.records
+    whole_range = DateRange(schedule.start, schedule.start + timedelta(weeks=args.weeks))
+    week_range = DateRange(schedule.start, schedule.start + timedelta(weeks=1))
+    day_range = DateRange(schedule.start)
+
+    process = client._process_schedule_data  # pyright: ignore[reportPrivateUsage]
+    get_subject = client._get_subject  # pyright: ignore[reportPrivateUsage]
+    week_records = [record for record in records
+                    if client._get_lesson_date(record, week_range) is not None]  # pyright: ignore[reportPrivateUsage]
+
+    time_table = process(records, whole_range)
+    week_time_table = time_table.slice(week_range)
+    lesson_dates = [day for day, lessons in time_table.days.items() for _ in lessons]
+
+    formatter = ScheduleFormatter()
+    cached_formatter = ScheduleFormatter(cache_size=16)
+
+    def get_subjects() -> None:
+        for record in week_records:
+            get_subject(record)
+
+    def filter_dates() -> None:
+        for day in lesson_dates:
+            week_range.is_date_in_range(day)
+
+    cases: list[tuple[str, Callable[[], Any]]] = [
+        ("process_schedule_data week", lambda: process(week_records, week_range)),
+        (f"process_schedule_data {args.weeks}w", lambda: process(records, whole_range)),
+        (f"process_schedule_data {args.weeks}w to week", lambda: process(records, week_range)),
+        ("get_subject week", get_subjects),
+        ("format_schedule day", lambda: formatter.format_schedule(time_table, _SCHEDULE_LINK, _NAME, day_range)),
+        ("format_schedule week", lambda: formatter.format_schedule(time_table, _SCHEDULE_LINK, _NAME, week_range)),
+        ("format_schedule week cached",
+         lambda: cached_formatter.format_schedule(week_time_table, _SCHEDULE_LINK, _NAME, week_range)),
+        (f"daterange filter {len(lesson_dates)} lessons", filter_dates),
+        (f"timetable slice {args.weeks}w to week", lambda: time_table.slice(week_range)),
+    ]
+
+    results: list[Result] = []
+    for name, func in cases:
+        result = measure(name, func, args.repeat, args.sample_seconds)
+        results.append(result)
+        print(f"{name:<40}{result.median_us:>12.1f}us{result.p95_us:>12.1f}us{result.min_us:>12.1f}us")
+
+    return results
+
+def get_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: list[Result], path: str, threshold: float) -> bool:
+    """Prints changes against baseline, returns False if any case regressed"""
+    with open(path, encoding="utf-8") as file:
+        baseline = {result["name"]: result for result in json.load(file)["results"]}
+
+    passed = True
+    print(f"\n{'case':<40}{'baseline':>12}{'current':>12}{'change':>10}")
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+
+        change = result.median_us / previous["median_us"] - 1
+        regressed = change > threshold
+        passed = passed and not regressed
+        print(f"{result.name:<40}{previous['median_us']:>10.1f}us{result.median_us:>10.1f}us{change:>+9.0%}"
+              + f"{'  REGRESSION' if regressed else ''}")
+
+    return passed
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, default=18, help="length of the synthetic schedule")
+    parser.add_argument("--lessons-per-day", type=int, default=4)
+    parser.add_argument("--groups", type=int, default=40)
+    parser.add_argument("--lecturers", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=441)
+    parser.add_argument("--repeat", type=int, default=20, help="count of samples of every case")
+    parser.add_argument("--sample-seconds", type=float, default=0.05, help="duration of one sample")
+    parser.add_argument("--output", help="write results to JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown against --compare")
+    args = parser.parse_args()
+
+    print(f"{'case':<40}{'median':>14}{'p95':>14}{'min':>14}")
+    results = run(args)
+
+    if args.output:
+        report = {
+            "benchmark": "hot_path",
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": get_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "parameters": {"weeks": args.weeks, "lessons_per_day": args.lessons_per_day, "groups": args.groups,
+                           "lecturers": args.lecturers, "seed": args.seed, "repeat": args.repeat},
+            "results": [asdict(result) for result in results],
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,389 @@
+"""Offline load test of the bot.
+
+Builds the real application of telegrambot.bot with a fake Bot API backend, a temporary SQLite
+database seeded by benchmarks.synthetic and ASU served by httpx.MockTransport. Synthetic users go
+through /schedule, /lecturer and /notes conversations (commands, text replies and callback queries),
+their updates are passed through the same update processor as in production.
+
+Sessions start at --rate per second (0 starts them as fast as possible), at most --concurrency of them
+run at once. Latency of an update is measured from injection until all handlers finished,
+so it includes waiting for the update processor. Throughput and latency percentiles are printed
+per handler and written as JSON with --output.
+
+Usage:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --sessions 5000 --concurrency 200 --rate 300 --asu-latency-ms 150
+    python -m benchmarks.load_test --telegram-latency-ms 50 --asu-error-rate 0.05 --output load.json
+"""
+import argparse
+import asyncio
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+import functools
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any
+
+import httpx
+from telegram import Update
+from telegram.request import BaseRequest, RequestData
+
+from .synthetic import (SyntheticSchedule, group_rows, group_search_response, lecturer_rows,
+                        lecturer_search_response, prepare_environment)
+
+_BOT_USER: dict[str, Any] = {"id": 1, "is_bot": True, "first_name": "Расписание", "username": "load_test_bot"}
+_FIRST_USER_ID = 1_000_000
+_PERIODS = ["T", "M", "W", "NW"]
+
+class FakeBotApi(BaseRequest):
+    """Answers Bot API requests without network, like Telegram would answer them"""
+
+    def __init__(self, latency: float) -> None:
+        self.latency: float = latency
+        self.calls: Counter[str] = Counter()
+        self._message_ids: itertools.count[int] = itertools.count(1)
+
+    async def initialize(self) -> None:  # pyright: ignore[reportImplicitOverride]
+        pass
+
+    async def shutdown(self) -> None:  # pyright: ignore[reportImplicitOverride]
+        pass
+
+    @property
+    def read_timeout(self) -> float | None:  # pyright: ignore[reportImplicitOverride]
+        return None
+
+    async def do_request(self, url: str, method: str, request_data: RequestData | None = None,  # pyright: ignore[reportImplicitOverride]
+                         *args: Any, **kwargs: Any) -> tuple[int, bytes]:
+        endpoint = url.rsplit("/", 1)[-1]
+        self.calls[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        parameters: dict[str, Any] = request_data.parameters if request_data else {}
+        result: Any = True
+
+        if endpoint == "getMe":
+            result = _BOT_USER
+        elif endpoint in ("sendMessage", "editMessageText"):
+            chat_id = int(parameters.get("chat_id") or 0)
+            result = {"message_id": parameters.get("message_id") or next(self._message_ids),
+                      "date": int(time.time()), "chat": {"id": chat_id, "type": "private"},
+                      "from": _BOT_USER, "text": parameters.get("text", "")}
+        elif endpoint == "getChatMember":
+            result = {"status": "creator", "is_anonymous": False,
+                      "user": {"id": int(parameters.get("user_id") or 0), "is_bot": False, "first_name": "Админ"}}
+
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+class StubAsu:
+    """Serves synthetic schedules and search results instead of ASU"""
+
+    def __init__(self, latency: float, error_rate: float, seed: int) -> None:
+        self.latency: float = latency
+        self.error_rate: float = error_rate
+        self.requests: Counter[str] = Counter()
+        self._rng: random.Random = random.Random(seed)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/timetable/")
+        endpoint = "/".join(path.split("/")[:2]) if path.startswith("search/") else path.split("/")[0] + "/schedule"
+        self.requests[endpoint] += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return httpx.Response(503)
+
+        if endpoint == "search/students":
+            return httpx.Response(200, content=group_search_response(1))
+        if endpoint == "search/lecturers":
+            return httpx.Response(200, content=lecturer_search_response(1))
+
+        # format YYYYMMDD-YYYYMMDD
+        first, _, last = request.url.params.get("date", "").partition("-")
+        if not first:
+            # Warm up request to the site
+            return httpx.Response(200)
+        start = datetime.strptime(first, "%Y%m%d").date()
+        end = datetime.strptime(last or first, "%Y%m%d").date()
+        return httpx.Response(200, content=self._schedule(start - timedelta(days=start.weekday()),
+                                                          (end - start).days // 7 + 1))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _schedule(start: date, weeks: int) -> bytes:
+        return SyntheticSchedule(start=start, weeks=weeks).response_bytes()
+
+@dataclass
+class HandlerResult:
+    handler: str
+    count: int
+    errors: int
+    mean_ms: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace, application: Any) -> None:
+        self.args: argparse.Namespace = args
+        self.application: Any = application
+        self.rng: random.Random = random.Random(args.seed)
+
+        self.group_names: list[str] = [row['name'] for row in group_rows(args.groups)]
+        self.lecturer_names: list[str] = [row['name'] for row in lecturer_rows(args.lecturers)]
+        # users, who saved group or lecturer during the test
+        self.saved_group: set[int] = set()
+        self.saved_lecturer: set[int] = set()
+
+        self.latencies: defaultdict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+        self.error_types: Counter[str] = Counter()
+        # update id -> handler, to attribute errors
+        self._handlers: dict[int, str] = {}
+        self._update_ids: itertools.count[int] = itertools.count(1)
+        self._message_ids: itertools.count[int] = itertools.count(1)
+
+    async def on_error(self, update: object, context: Any) -> None:
+        if isinstance(update, Update) and (handler := self._handlers.get(update.update_id)):
+            self.errors[handler] += 1
+        self.error_types[type(context.error).__name__] += 1
+
+    def _user(self, user_id: int) -> dict[str, Any]:
+        return {"id": user_id, "is_bot": False, "first_name": f"Студент{user_id}", "language_code": "ru"}
+
+    def _message(self, user_id: int, text: str) -> dict[str, Any]:
+        message: dict[str, Any] = {"message_id": next(self._message_ids), "date": int(time.time()),
+                                   "chat": {"id": user_id, "type": "private"}, "from": self._user(user_id),
+                                   "text": text}
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return message
+
+    def _callback_query(self, user_id: int, data: str) -> dict[str, Any]:
+        message = self._message(user_id, "Выберите")
+        message["from"] = _BOT_USER
+        return {"id": str(next(self._update_ids)), "from": self._user(user_id), "chat_instance": str(user_id),
+                "data": data, "message": message}
+
+    async def send(self, handler: str, user_id: int, text: str | None = None, data: str | None = None) -> None:
+        update_id = next(self._update_ids)
+        payload: dict[str, Any] = {"update_id": update_id}
+        if data is not None:
+            payload["callback_query"] = self._callback_query(user_id, data)
+        else:
+            payload["message"] = self._message(user_id, text or "")
+
+        update = Update.de_json(payload, self.application.bot)
+        self._handlers[update_id] = handler
+
+        started_at = time.perf_counter()
+        # The same path as updates from Telegram take
+        await self.application.update_processor.process_update(update, self.application.process_update(update))
+        self.latencies[handler].append((time.perf_counter() - started_at) * 1000)
+
+        del self._handlers[update_id]
+        if self.args.think_ms:
+            await asyncio.sleep(self.args.think_ms / 1000)
+
+    async def schedule_session(self, user_id: int) -> None:
+        if user_id not in self.saved_group:
+            await self.send("/schedule", user_id, "/schedule")
+            await self.send("schedule: group name", user_id, self.rng.choice(self.group_names))
+            await self.send("schedule: save", user_id, data="save_yes")
+            self.saved_group.add(user_id)
+        elif self.rng.random() < 0.3:
+            # Another group than the saved one
+            await self.send("/schedule name", user_id, f"/schedule {self.rng.choice(self.group_names)}")
+            await self.send("schedule: save", user_id, data="save_no")
+        else:
+            await self.send("/schedule", user_id, "/schedule")
+
+        await self.send("schedule: show", user_id, data=self.rng.choice(_PERIODS))
+
+    async def schedule_search_session(self, user_id: int) -> None:
+        # Unknown name is searched in ASU
+        await self.send("/schedule search", user_id, f"/schedule {self.rng.randint(1, 9)}99м{self.rng.randint(1, 99)}")
+        await self.send("schedule: save", user_id, data="save_no")
+        await self.send("schedule: show", user_id, data=self.rng.choice(_PERIODS))
+
+    async def lecturer_session(self, user_id: int) -> None:
+        await self.send("/lecturer", user_id, "/lecturer")
+        if user_id not in self.saved_lecturer:
+            await self.send("lecturer: name", user_id, self.rng.choice(self.lecturer_names))
+            await self.send("lecturer: save", user_id, data="save_lecturer_yes")
+            self.saved_lecturer.add(user_id)
+
+        await self.send("lecturer: show", user_id, data=self.rng.choice(_PERIODS))
+
+    async def notes_session(self, user_id: int) -> None:
+        await self.send("/notes", user_id, "/notes")
+        if self.rng.random() < 0.5:
+            await self.send("notes: view", user_id, data="view_notes")
+            return
+
+        await self.send("notes: add", user_id, data="add_note")
+        await self.send("notes: text", user_id, "Математический анализ")
+        await self.send("notes: text", user_id, date.today().strftime("%d.%m.%Y"))
+        await self.send("notes: text", user_id, "Контрольная работа")
+
+    async def run(self) -> float:
+        """Runs all sessions, returns duration in seconds"""
+        sessions = [self.schedule_session, self.schedule_search_session, self.lecturer_session, self.notes_session]
+        weights = [self.args.schedule_weight, self.args.search_weight, self.args.lecturer_weight,
+                   self.args.notes_weight]
+
+        # Sessions of the same user don't overlap, like a real user waits for the answer
+        free_users: asyncio.Queue[int] = asyncio.Queue()
+        for user_id in range(_FIRST_USER_ID, _FIRST_USER_ID + self.args.users):
+            free_users.put_nowait(user_id)
+
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+
+        async def run_session(session: Any) -> None:
+            try:
+                user_id = await free_users.get()
+                try:
+                    await session(user_id)
+                finally:
+                    free_users.put_nowait(user_id)
+            finally:
+                semaphore.release()
+
+        started_at = time.perf_counter()
+        tasks: list[asyncio.Task[None]] = []
+        for index, session in enumerate(self.rng.choices(sessions, weights, k=self.args.sessions)):
+            if self.args.rate:
+                delay = started_at + index / self.args.rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(run_session(session)))
+
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - started_at
+
+    def results(self) -> list[HandlerResult]:
+        results: list[HandlerResult] = []
+        all_latencies: list[float] = []
+
+        for handler, latencies in sorted(self.latencies.items()):
+            all_latencies.extend(latencies)
+            results.append(self._result(handler, latencies, self.errors[handler]))
+
+        results.append(self._result("total", all_latencies, sum(self.errors.values())))
+        return results
+
+    @staticmethod
+    def _result(handler: str, latencies: list[float], errors: int) -> HandlerResult:
+        latencies = sorted(latencies)
+
+        def percentile(value: float) -> float:
+            return latencies[min(int(len(latencies) * value), len(latencies) - 1)]
+
+        return HandlerResult(handler, len(latencies), errors, statistics.fmean(latencies), percentile(0.5),
+                             percentile(0.9), percentile(0.99), latencies[-1])
+
+async def run(args: argparse.Namespace) -> None:
+    # Settings are read on import
+    from asu import client
+    from telegrambot.bot import create_application, on_post_init, on_post_shutdown
+
+    bot_api = FakeBotApi(args.telegram_latency_ms / 1000)
+    stub_asu = StubAsu(args.asu_latency_ms / 1000, args.asu_error_rate, args.seed)
+
+    await client.set_transport(httpx.MockTransport(stub_asu.handle))
+
+    application = create_application(bot_api)
+    load_test = LoadTest(args, application)
+
+    await application.initialize()
+    await on_post_init(application)
+    application.add_error_handler(load_test.on_error)
+
+    try:
+        duration = await load_test.run()
+    finally:
+        await application.shutdown()
+        await on_post_shutdown(application)
+
+    results = load_test.results()
+    total = results[-1]
+
+    print(f"{'handler':<24}{'count':>8}{'errors':>8}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for result in results:
+        print(f"{result.handler:<24}{result.count:>8}{result.errors:>8}{result.mean_ms:>8.1f}ms{result.p50_ms:>8.1f}ms"
+              + f"{result.p90_ms:>8.1f}ms{result.p99_ms:>8.1f}ms{result.max_ms:>8.1f}ms")
+
+    print(f"\n{total.count} updates in {duration:.1f}s: {total.count / duration:.0f} updates/s")
+    print(f"Bot API calls: {dict(bot_api.calls.most_common())}")
+    print(f"ASU requests: {dict(stub_asu.requests.most_common())}")
+    if load_test.error_types:
+        print(f"Errors: {dict(load_test.error_types.most_common())}")
+
+    if args.output:
+        report = {
+            "benchmark": "load_test",
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "log_level")},
+            "duration_s": duration,
+            "updates_per_second": total.count / duration,
+            "bot_api_calls": dict(bot_api.calls),
+            "asu_requests": dict(stub_asu.requests),
+            "errors": dict(load_test.error_types),
+            "results": [asdict(result) for result in results],
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=2000, help="count of conversations")
+    parser.add_argument("--users", type=int, default=1000, help="count of distinct users")
+    parser.add_argument("--concurrency", type=int, default=100, help="max count of conversations at once")
+    parser.add_argument("--rate", type=float, default=0, help="conversations started per second, 0 for no limit")
+    parser.add_argument("--think-ms", type=float, default=0, help="pause of user between updates")
+    parser.add_argument("--groups", type=int, default=2000, help="count of groups in the database")
+    parser.add_argument("--lecturers", type=int, default=1500, help="count of lecturers in the database")
+    parser.add_argument("--schedule-weight", type=float, default=6)
+    parser.add_argument("--search-weight", type=float, default=1)
+    parser.add_argument("--lecturer-weight", type=float, default=2)
+    parser.add_argument("--notes-weight", type=float, default=1)
+    parser.add_argument("--telegram-latency-ms", type=float, default=0, help="delay of every Bot API call")
+    parser.add_argument("--asu-latency-ms", type=float, default=0, help="delay of every ASU response")
+    parser.add_argument("--asu-error-rate", type=float, default=0, help="share of ASU responses with status 503")
+    parser.add_argument("--max-concurrent-updates", type=int, help="overrides MAX_CONCURRENT_UPDATES")
+    parser.add_argument("--seed", type=int, default=441)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="write results to JSON file")
+    args = parser.parse_args()
+
+    if args.users < args.concurrency:
+        parser.error("--users must be at least --concurrency, conversations of one user don't overlap")
+
+    logging.basicConfig(level=args.log_level, format="[%(asctime)s %(levelname)s][%(name)s] %(message)s")
+
+    prepare_environment(groups=args.groups, lecturers=args.lecturers)
+    # ASU is local, its rate limit would only measure the limiter
+    os.environ["ASU_RATE_LIMIT"] = "1000000"
+    os.environ["ASU_RATE_BURST"] = "1000000"
+    if args.max_concurrent_updates:
+        os.environ["MAX_CONCURRENT_UPDATES"] = str(args.max_concurrent_updates)
+
+    asyncio.run(run(args))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark of peak memory of parsing long schedule responses.
+
+Compares decoding the whole response, like APIClient._fetch_schedule does, with streaming parse
+(APIClient.fetch_schedule_range). Response is served by httpx.MockTransport in chunks,
+like it arrives from the network.
+
+Usage:
+    python -m benchmarks.streaming [--weeks 4 18 36] [--chunk-size 16384]
+"""
+import argparse
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import timedelta
+import time
+import tracemalloc
+
+import httpx
+
+from .synthetic import FACULTIES, SyntheticSchedule, prepare_environment
+
+prepare_environment()
+
+from asu import client  # noqa: E402
+from asu.schemas import schedule_decoder  # noqa: E402
+from asu.timetable import TimeTable  # noqa: E402
+from database.models import Group  # noqa: E402
+from utils.daterange import DateRange  # noqa: E402
+
+class ChunkedStream(httpx.AsyncByteStream):
+    def __init__(self, data: bytes, chunk_size: int) -> None:
+        self.data: bytes = data
+        self.chunk_size: int = chunk_size
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:  # pyright: ignore[reportImplicitOverride]
+        for start in range(0, len(self.data), self.chunk_size):
+            yield self.data[start:start + self.chunk_size]
+
+async def measure(fetch: Callable[[], Awaitable[TimeTable]]) -> tuple[float, float, int]:
+    """Returns peak memory in KB, time in ms and count of days"""
+    tracemalloc.start()
+    started_at = time.perf_counter()
+
+    time_table = await fetch()
+
+    elapsed = (time.perf_counter() - started_at) * 1000
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak / 1024, elapsed, len(time_table.days)
+
+async def run(args: argparse.Namespace) -> None:
+    await client.load_faculties()
+    group = Group(id=1, group_id=100000, faculty_id=next(iter(FACULTIES.values())), name="305с11-4")
+
+    print(f"{'weeks':<8}{'payload':>10}{'whole peak':>14}{'stream peak':>14}{'whole':>10}{'stream':>10}")
+    for weeks in args.weeks:
+        schedule = SyntheticSchedule(weeks=weeks)
+        data = schedule.response_bytes()
+        date_range = DateRange(schedule.start, schedule.start + timedelta(weeks=weeks))
+
+        await client.set_transport(httpx.MockTransport(
+            lambda _: httpx.Response(200, stream=ChunkedStream(data, args.chunk_size))))
+        client.rate_limiter.rate = client.rate_limiter.burst = 1_000_000
+
+        async def fetch_whole() -> TimeTable:
+            response = await client._make_request(group.schedule_url, client._build_params(),  # pyright: ignore[reportPrivateUsage]
+                                                  schedule_decoder)
+            return client._process_schedule_data(response.schedule.records, date_range)  # pyright: ignore[reportPrivateUsage]
+
+        whole_peak, whole_time, whole_days = await measure(fetch_whole)
+        stream_peak, stream_time, stream_days = await measure(
+            lambda: client.fetch_schedule_range(group, date_range))
+
+        if whole_days != stream_days:
+            raise SystemExit(f"{weeks} weeks: parsed {whole_days} and {stream_days} days")
+
+        print(f"{weeks:<8}{len(data) / 1024:>8.0f}KB{whole_peak:>12.0f}KB{stream_peak:>12.0f}KB"
+              + f"{whole_time:>8.1f}ms{stream_time:>8.1f}ms")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, nargs="+", default=[4, 18, 36])
+    parser.add_argument("--chunk-size", type=int, default=16384)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Deterministic synthetic data shaped like ASU API responses, shared by the benchmarks"""
+import atexit
+from dataclasses import dataclass
+from datetime import date, timedelta
+import json
+import os
+import random
+import shutil
+import tempfile
+from typing import Any
+
+FACULTIES: dict[str, int] = {"ФМиИТ": 5, "ИЦЭ": 7, "ИББ": 9, "ЮИ": 11, "ИГН": 13}
+
+_SUBJECTS: list[str] = ["Математический анализ", "Алгебра и геометрия", "Программирование", "Базы данных",
+                        "Физическая культура", "Иностранный язык", "История России", "Философия",
+                        "Дискретная математика", "Операционные системы"]
+_SUBJECT_TYPES: list[str] = ["лек.", "пр.з.", "лаб.р."]
+_BUILDINGS: list[tuple[str, str]] = [("пр. Ленина 61", "Л"), ("ул. Димитрова 66", "Д"),
+                                      ("пр. Комсомольский 100", "Н"), ("ул. Антона Петрова 219", "`")]
+_LESSON_TIMES: list[tuple[str, str]] = [("08:00", "09:30"), ("09:40", "11:10"), ("11:20", "12:50"),
+                                        ("13:20", "14:50"), ("15:00", "16:30"), ("16:40", "18:10")]
+
+@dataclass
+class SyntheticSchedule:
+    # first monday of the schedule
+    start: date = date(2026, 2, 2)
+    weeks: int = 18
+    # lessons of one group per study day
+    lessons_per_day: int = 4
+    # groups attending the lesson together
+    groups_per_lesson: int = 2
+    lecturers_per_lesson: int = 1
+    # size of the pools lessons are made of
+    groups: int = 40
+    lecturers: int = 25
+    seed: int = 441
+
+    def records(self) -> list[dict[str, Any]]:
+        """Returns lesson records like in `schedule.records` of the API response"""
+        rng = random.Random(self.seed)
+        faculty_codes = list(FACULTIES)
+
+        groups = [{"groupCode": f"{rng.randint(1, 9)}{rng.randint(0, 99):02d}с{rng.randint(1, 99)}-{i % 9 + 1}",
+                   "groupFacultyCode": rng.choice(faculty_codes), "groupId": 100000 + i}
+                  for i in range(self.groups)]
+        lecturers = [{"lecturerName": f"Преподаватель{i} И.О.", "lecturerIdChair": rng.randint(1, 300),
+                      "lecturerId": 200000 + i, "lecturerChairFacultyCode": rng.choice(faculty_codes),
+                      "lecturerPosition": rng.choice(["доц.", "проф.", "ст.преп."])}
+                     for i in range(self.lecturers)]
+
+        records: list[dict[str, Any]] = []
+        for day_offset in range(self.weeks * 7):
+            day = self.start + timedelta(days=day_offset)
+            if day.weekday() == 6:
+                continue
+
+            for number in range(1, self.lessons_per_day + 1):
+                time_start, time_end = _LESSON_TIMES[(number - 1) % len(_LESSON_TIMES)]
+                address, address_code = rng.choice(_BUILDINGS)
+
+                records.append({
+                    "lessonDate": day.strftime("%Y%m%d"),
+                    "lessonNum": str(number),
+                    "lessonTimeStart": time_start,
+                    "lessonTimeEnd": time_end,
+                    "lessonGroups": [{"lessonGroup": group, "lessonSubGroup": rng.choice(["", "", "1", "2"])}
+                                     for group in rng.sample(groups, self.groups_per_lesson)],
+                    "lessonLecturers": rng.sample(lecturers, self.lecturers_per_lesson),
+                    "lessonBuilding": {"buildingAddress": address, "buildingCode": address_code},
+                    "lessonRoom": {"roomTitle": str(rng.randint(100, 520))},
+                    "lessonSubject": {"subjectTitle": rng.choice(_SUBJECTS)},
+                    "lessonSubjectType": rng.choice(_SUBJECT_TYPES),
+                    "lessonCommentary": rng.choice(["", "", "дистанционно-синхронно"]),
+                })
+
+        return records
+
+    def response(self) -> dict[str, Any]:
+        return {"schedule": {"records": self.records()}}
+
+    def response_bytes(self) -> bytes:
+        return json.dumps(self.response(), ensure_ascii=False).encode()
+
+def group_search_response(count: int, seed: int = 441) -> bytes:
+    """Returns response of search/students/ or students/FACULTY_ID/ with `count` groups"""
+    rng = random.Random(seed)
+    records = [{"groupId": 100000 + i, "groupCode": f"{rng.randint(1, 9)}{rng.randint(0, 99):02d}с{i % 9 + 1}",
+                "path": f"{rng.choice(list(FACULTIES.values()))}/{100000 + i}", "groupTitle": "Группа"}
+               for i in range(count)]
+    return json.dumps({"groups": {"records": records}}, ensure_ascii=False).encode()
+
+def lecturer_search_response(count: int, seed: int = 441) -> bytes:
+    """Returns response of search/lecturers/ or lecturers/FACULTY_ID/CHAIR_ID/ with `count` lecturers"""
+    rng = random.Random(seed)
+    records: list[dict[str, Any]] = []
+    for i in range(count):
+        faculty_id, chair_id = rng.choice(list(FACULTIES.values())), rng.randint(1, 300)
+        records.append({"lecturerId": 200000 + i, "lecturerIdChair": chair_id, "lecturerName": f"Преподаватель{i} И.О.",
+                        "lecturerPosition": "доц.", "path": f"{faculty_id}/{chair_id}/{200000 + i}"})
+    return json.dumps({"lecturers": {"records": records}}, ensure_ascii=False).encode()
+
+def group_rows(count: int) -> list[dict[str, Any]]:
+    """Returns rows of the groups table, names are unique"""
+    faculty_ids = list(FACULTIES.values())
+    return [{'group_id': 300000 + i, 'faculty_id': faculty_ids[i % len(faculty_ids)],
+             'name': f"{i % 9 + 1}{i // 9 % 100:02d}с{i // 900 + 1}-{i % 4 + 1}"}
+            for i in range(count)]
+
+def lecturer_rows(count: int) -> list[dict[str, Any]]:
+    """Returns rows of the lecturers table, names are unique"""
+    faculty_ids = list(FACULTIES.values())
+    return [{'lecturer_id': 400000 + i, 'faculty_id': faculty_ids[i % len(faculty_ids)], 'chair_id': i % 300 + 1,
+             'name': f"Лектор{i} А.Б.", 'position': "доц."}
+            for i in range(count)]
+
+def prepare_environment(groups: int = 0, lecturers: int = 0) -> None:
+    """Points settings to a temporary SQLite database with synthetic faculties,
+    `groups` groups and `lecturers` lecturers made by group_rows and lecturer_rows.
+
+    Must be called before `asu` is imported, because settings of the API client are read on import.
+    The database is removed on exit"""
+    directory = tempfile.mkdtemp(prefix="asu-benchmark-")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    path = os.path.join(directory, "benchmark.db")
+
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    os.environ.setdefault("ASU_TOKEN", "benchmark")
+    os.environ.setdefault("BOT_TOKEN", "0:benchmark")
+
+    from sqlalchemy import create_engine, insert
+
+    from database.models import Base, Faculty, Group, Lecturer
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Faculty), [{'faculty_code': code, 'faculty_id': faculty_id}
+                                              for code, faculty_id in FACULTIES.items()])
+        if groups:
+            connection.execute(insert(Group), group_rows(groups))
+        if lecturers:
+            connection.execute(insert(Lecturer), lecturer_rows(lecturers))
+    engine.dispose()
@@ -0,0 +1,154 @@
+"""Benchmark of memory and parse throughput of timetables.
+
+Compares slotted immutable value objects of asu.timetable, with and without interning pools,
+with the previous representation: regular dataclasses holding SQLAlchemy Group and Lecturer instances.
+
+Usage:
+    python -m benchmarks.timetable_memory [--weeks 18] [--timetables 50]
+"""
+import argparse
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any
+
+from .synthetic import SyntheticSchedule, prepare_environment
+
+prepare_environment()
+
+from asu import client  # noqa: E402
+from asu.interning import pools  # noqa: E402
+from asu.schemas import schedule_decoder  # noqa: E402
+from asu.timetable import Room as SlottedRoom  # noqa: E402
+from database.models import Group, Lecturer  # noqa: E402
+from utils.daterange import DateRange  # noqa: E402
+
+asyncio.run(client.load_faculties())
+
+@dataclass
+class LegacyRoom:
+    address: str
+    address_code: str
+    number: str
+
+@dataclass
+class LegacySubject:
+    title: str
+    type: str
+    comment: str | None
+    groups: list[Group]
+    lecturers: list[Lecturer]
+    room: LegacyRoom
+    sub_groups: list[str] | None = None
+
+@dataclass
+class LegacyLesson:
+    number: str
+    time_start: str
+    time_end: str
+    subject: LegacySubject
+
+def parse_legacy(data: bytes) -> dict[date, list[LegacyLesson]]:
+    """Parses response the way APIClient did before value objects"""
+    days: dict[date, list[LegacyLesson]] = {}
+
+    for record in json.loads(data)["schedule"]["records"]:
+        lesson_date = datetime.strptime(record["lessonDate"], "%Y%m%d").date()
+
+        groups = [Group(group_id=int(group_record["lessonGroup"]["groupId"]),
+                        faculty_id=int(client.faculties[group_record["lessonGroup"]["groupFacultyCode"]]),
+                        name=group_record["lessonGroup"]["groupCode"])
+                  for group_record in record["lessonGroups"]]
+        lecturers = [Lecturer(lecturer_id=int(lecturer_record["lecturerId"]),
+                              faculty_id=int(client.faculties[lecturer_record["lecturerChairFacultyCode"]]),
+                              chair_id=int(lecturer_record["lecturerIdChair"]),
+                              name=lecturer_record["lecturerName"], position=lecturer_record["lecturerPosition"])
+                     for lecturer_record in record["lessonLecturers"]]
+        building = record["lessonBuilding"]
+        room = LegacyRoom(building["buildingAddress"], building["buildingCode"], record["lessonRoom"]["roomTitle"])
+
+        subject = LegacySubject(record["lessonSubject"]["subjectTitle"], record["lessonSubjectType"].strip(),
+                                record["lessonCommentary"].strip(), groups, lecturers, room)
+        days.setdefault(lesson_date, []).append(
+            LegacyLesson(record["lessonNum"], record["lessonTimeStart"], record["lessonTimeEnd"], subject))
+
+    for lessons in days.values():
+        lessons.sort(key=lambda lesson: int(lesson.number))
+
+    return days
+
+def parse_slotted(data: bytes) -> Any:
+    records = schedule_decoder.decode(data).schedule.records
+    return client._process_schedule_data(records, DateRange(date.min, date.max))  # pyright: ignore[reportPrivateUsage]
+
+def set_interning(enabled: bool, max_size: int) -> None:
+    for pool in pools.values():
+        pool.max_size = max_size if enabled else 0
+
+def measure_memory(parse: Callable[[bytes], Any], data: bytes, count: int) -> int:
+    """Returns bytes retained by `count` parsed timetables"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    timetables = [parse(data) for _ in range(count)]
+
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    del timetables
+    return retained
+
+def measure_throughput(parse: Callable[[bytes], Any], data: bytes, lessons: int, seconds: float) -> float:
+    """Returns parsed lessons per second"""
+    parsed = 0
+    started_at = time.perf_counter()
+
+    while time.perf_counter() - started_at < seconds:
+        parse(data)
+        parsed += lessons
+
+    return parsed / (time.perf_counter() - started_at)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, default=18, help="weeks in one timetable, 18 is a semester")
+    parser.add_argument("--timetables", type=int, default=50, help="timetables kept in memory at once")
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration of throughput measurement")
+    args = parser.parse_args()
+
+    schedule = SyntheticSchedule(weeks=args.weeks)
+    records = schedule.records()
+    data = schedule.response_bytes()
+    print(f"{len(records)} lessons per timetable, {args.timetables} timetables, "
+          + f"slotted Room has __dict__: {hasattr(SlottedRoom('', '', ''), '__dict__')}")
+
+    print(f"{'representation':<16}{'memory':>12}{'per lesson':>12}{'lessons/s':>12}")
+    results: dict[str, tuple[int, float]] = {}
+    pool_size = next(iter(pools.values())).max_size
+    for name, parse, interning in [("legacy", parse_legacy, False), ("slotted", parse_slotted, False),
+                                   ("interned", parse_slotted, True)]:
+        set_interning(interning, pool_size)
+        memory = measure_memory(parse, data, args.timetables)
+        throughput = measure_throughput(parse, data, len(records), args.seconds)
+        results[name] = (memory, throughput)
+
+        print(f"{name:<16}{memory / 1024 / 1024:>10.2f}MB{memory / (len(records) * args.timetables):>11.0f}B"
+              + f"{throughput:>12.0f}")
+
+    legacy_memory, legacy_throughput = results["legacy"]
+    for name in ["slotted", "interned"]:
+        memory, throughput = results[name]
+        print(f"{name}: memory {legacy_memory / memory:.1f}x smaller, throughput {throughput / legacy_throughput:.1f}x")
+
+    for pool in pools.values():
+        print(f"pool {pool.name}: {len(pool)} values, {pool.stats.hits} reused, ~{pool.saved_bytes // 1024}KB saved")
+
+if __name__ == '__main__':
+    main()
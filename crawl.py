@@ -0,0 +1,14 @@
+"""Loads all groups and lecturers of ASU to the database.
+
+Usage:
+    python crawl.py [--checkpoint PATH] [--concurrency N] [--restart]
+"""
+from dotenv import load_dotenv
+
+# Settings are read when the asu package is imported, so .env is loaded before it
+load_dotenv()
+
+from asu.crawler import main
+
+if __name__ == '__main__':
+    main()
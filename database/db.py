@@ -1,18 +1,74 @@
-from collections.abc import AsyncGenerator
+import asyncio
+from collections.abc import AsyncGenerator, Sequence
+import time
+from typing import Any
+
 from alembic import command
 from alembic.config import Config
-from sqlalchemy import Connection
+from sqlalchemy import Connection, Insert, text
+from sqlalchemy.dialects import mysql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from settings import DatabaseSettings
+from utils.metrics import registry
+from utils.tracing import finish_span, start_span
 
 _database_url = DatabaseSettings().DATABASE_URL # pyright: ignore[reportCallIssue]
 _engine = create_async_engine(_database_url, pool_pre_ping=True, pool_recycle=3600)
 _db = async_sessionmaker(bind=_engine, expire_on_commit=False)
 
+# Dialects with single statement upsert, others fail at startup instead of on the first write
+_UPSERT_DIALECTS = ('mysql', 'mariadb', 'sqlite')
+if _engine.dialect.name not in _UPSERT_DIALECTS:
+    raise ValueError(f"Dialect {_engine.dialect.name} is not supported, expected one of: {', '.join(_UPSERT_DIALECTS)}")
+
+_session_duration = registry.histogram("db_session_duration_seconds", "Lifetime of database sessions")
+_active_sessions = registry.gauge("db_sessions_active", "Count of open database sessions")
+
+def _get_checked_out_connections() -> list[tuple[tuple[str, ...], float]]:
+    # Only queue pools count connections
+    checkedout = getattr(_engine.sync_engine.pool, "checkedout", None)
+    return [((), checkedout())] if checkedout else []
+
+registry.callback_metric("db_pool_checked_out", "Count of database connections in use", "gauge").add_callback(
+    "engine", _get_checked_out_connections)
+
 async def create_session() -> AsyncGenerator[AsyncSession, None]:
-    async with _db() as session:
-        yield session
+    started_at = time.perf_counter()
+    # Finished when the generator is closed, also if it is closed later than the loop over it was left
+    session_span = start_span("db session")
+    _active_sessions.inc()
+    try:
+        async with _db() as session:
+            yield session
+    finally:
+        finish_span(session_span)
+        _active_sessions.dec()
+        _session_duration.observe(time.perf_counter() - started_at)
+
+async def warm_up_pool() -> None:
+    """Opens connections of the pool at once, so the first updates don't wait for connecting"""
+    # Only queue pools have size
+    size = getattr(_engine.sync_engine.pool, "size", None)
+    
+    async def connect() -> None:
+        async with _engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            
+    await asyncio.gather(*[connect() for _ in range(size() if size else 1)])
+
+def upsert(model: Any, values: dict[str, Any] | Sequence[dict[str, Any]],
+           index_elements: Sequence[str], update_columns: Sequence[str]) -> Insert:
+    """Builds single statement INSERT, that updates `update_columns` of existing row on unique key conflict.
+    `index_elements` are columns of the unique key, they are required by SQLite"""
+    if _engine.dialect.name in ('mysql', 'mariadb'):
+        mysql_stmt = mysql.insert(model).values(values)
+        return mysql_stmt.on_duplicate_key_update({column: mysql_stmt.inserted[column] for column in update_columns})
+    
+    # Other dialects are rejected at import
+    sqlite_stmt = sqlite.insert(model).values(values)
+    return sqlite_stmt.on_conflict_do_update(index_elements=index_elements,
+                                             set_={column: sqlite_stmt.excluded[column] for column in update_columns})
 
 def run_upgrade(connection: Connection, config: Config):
     config.attributes["connection"] = connection
@@ -1,7 +1,7 @@
 from datetime import date, datetime
 import enum
 
-from sqlalchemy import ForeignKey, String, Text, BigInteger, select
+from sqlalchemy import ForeignKey, Index, String, Text, BigInteger, UniqueConstraint, select
 from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncSession
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.ext.hybrid import hybrid_method
@@ -13,6 +13,9 @@ class Base(AsyncAttrs, DeclarativeBase):
 
 class Group(Base):
     __tablename__: str = "groups"
+    __table_args__: tuple[Index, ...] = (
+        Index("ix_groups_group_id", "group_id", unique=True),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     group_id: Mapped[int] = mapped_column(nullable=False)
@@ -25,6 +28,9 @@ def schedule_url(self) -> str:
     
 class Lecturer(Base):
     __tablename__: str = "lecturers"
+    __table_args__: tuple[Index, ...] = (
+        Index("ix_lecturers_lecturer_id_chair_id", "lecturer_id", "chair_id", unique=True),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     lecturer_id: Mapped[int] = mapped_column(nullable=False)
@@ -39,19 +45,45 @@ def schedule_url(self) -> str:
     
 class GroupSchedule(Base):
     __tablename__: str = "group_schedules"
+    __table_args__: tuple[UniqueConstraint] = (
+        UniqueConstraint("group_id", "date_range", name="uq_group_schedules_group_id_date_range"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     group_id: Mapped[int] = mapped_column(ForeignKey("groups.id"), nullable=False)
+    # Date parameter of the request. Format: YYYYMMDD or YYYYMMDD-YYYYMMDD
+    date_range: Mapped[str] = mapped_column(String(17), nullable=False)
     data: Mapped[str] = mapped_column(Text, nullable=True)
     expired_at: Mapped[datetime] = mapped_column(nullable=False)
+    # When the timetable was received from ASU, None for rows saved before it was stored
+    fetched_at: Mapped[datetime | None] = mapped_column(nullable=True)
     
 class LecturerSchedule(Base):
     __tablename__: str = "lecturer_schedules"
+    __table_args__: tuple[UniqueConstraint] = (
+        UniqueConstraint("lecturer_id", "date_range", name="uq_lecturer_schedules_lecturer_id_date_range"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     lecturer_id: Mapped[int] = mapped_column(ForeignKey("lecturers.id"), nullable=False)
+    # Date parameter of the request. Format: YYYYMMDD or YYYYMMDD-YYYYMMDD
+    date_range: Mapped[str] = mapped_column(String(17), nullable=False)
     data: Mapped[str] = mapped_column(Text, nullable=True)
     expired_at: Mapped[datetime] = mapped_column(nullable=False)
+    # When the timetable was received from ASU, None for rows saved before it was stored
+    fetched_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    
+class ScheduleSnapshot(Base):
+    """Timetable of the week, which subscribers were notified about last time"""
+    __tablename__: str = "schedule_snapshots"
+    __table_args__: tuple[UniqueConstraint] = (
+        UniqueConstraint("schedule_url", "week_start", name="uq_schedule_snapshots_schedule_url_week_start"),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    schedule_url: Mapped[str] = mapped_column(String(255), nullable=False)
+    week_start: Mapped[date] = mapped_column(nullable=False)
+    data: Mapped[str] = mapped_column(Text, nullable=False)
     
 class User(Base):
     __tablename__: str = "users"
@@ -86,6 +118,9 @@ class SearchType(enum.Enum):
 
 class Stat(Base):
     __tablename__: str = "stats"
+    __table_args__: tuple[Index, ...] = (
+        Index("ix_stats_timestamp", "timestamp"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(BigInteger(), nullable=False)
@@ -95,6 +130,10 @@ class Stat(Base):
     
 class Note(Base):
     __tablename__: str = "notes"
+    __table_args__: tuple[Index, ...] = (
+        Index("ix_notes_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_notes_chat_id_timestamp", "chat_id", "timestamp"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(BigInteger(), nullable=False)
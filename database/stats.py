@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime
+import logging
+from typing import Any
+
+from sqlalchemy import insert
+
+from database.db import create_session
+from database.models import SearchType, Stat
+from settings import StatisticsSettings
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+class StatisticsWriter:
+    """Collects statistics in memory and writes them to the database in batches in background"""
+
+    def __init__(self, max_queue_size: int, batch_size: int, flush_interval: float) -> None:
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        # count of statistics dropped, because queue was full
+        self.dropped: int = 0
+        
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(max_queue_size)
+        self._task: asyncio.Task[None] | None = None
+        self._stopping: bool = False
+
+    def add(self, user_id: int, search_type: SearchType, search_query: str) -> None:
+        """Adds statistics to the queue without waiting"""
+        try:
+            self._queue.put_nowait({
+                'user_id': user_id,
+                'search_type': search_type,
+                'search_query': search_query,
+                'timestamp': datetime.now(),
+            })
+        except asyncio.QueueFull:
+            self.dropped += 1
+            
+            # Do not spam logs, when the database is down
+            if self.dropped % 1000 == 1:
+                _logger.warning("Очередь статистики переполнена, отброшено записей: %d", self.dropped)
+
+    def start(self) -> None:
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Writes queued statistics and stops the writer"""
+        if self._task is None:
+            return
+        
+        self._stopping = True
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while not (self._stopping and self._queue.empty()):
+            batch = await self._collect_batch()
+            if batch:
+                await self._write(batch)
+
+    async def _collect_batch(self) -> list[dict[str, Any]]:
+        """Waits until batch is full or flush interval is passed since first statistics in the batch"""
+        loop = asyncio.get_running_loop()
+        
+        batch: list[dict[str, Any]] = []
+        try:
+            batch.append(await asyncio.wait_for(self._queue.get(), self.flush_interval))
+        except asyncio.TimeoutError:
+            return batch
+        
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            
+            timeout = deadline - loop.time()
+            if timeout <= 0 or self._stopping:
+                break
+            
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+            
+        return batch
+
+    async def _write(self, batch: list[dict[str, Any]]) -> None:
+        try:
+            async for session in create_session():
+                async with session.begin():
+                    await session.execute(insert(Stat).values(batch))
+        except Exception:
+            _logger.exception("Не удалось сохранить статистику, потеряно записей: %d", len(batch))
+
+_settings = StatisticsSettings()
+stats_writer = StatisticsWriter(_settings.STATS_QUEUE_SIZE, _settings.STATS_BATCH_SIZE,
+                                _settings.STATS_FLUSH_INTERVAL_MS / 1000)
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+import time
+
+from sqlalchemy import Insert, select
+
+from database.db import create_session, upsert
+from database.models import Group, Lecturer, User
+from settings import CacheSettings
+from utils.metrics import register_cache
+from utils.tracing import span
+
+@dataclass
+class UserProfileStats:
+    # profiles served from memory
+    hits: int = 0
+    # profiles loaded from the database
+    misses: int = 0
+    # profiles removed to fit in max size
+    evictions: int = 0
+    # profiles loaded again, because they were cached longer than TTL
+    expired: int = 0
+
+@dataclass
+class UserProfile:
+    saved_group: Group | None = None
+    saved_lecturer: Lecturer | None = None
+
+class UserProfileService:
+    """Saved group and lecturer of users with in-process cache, invalidated on writes.
+    Profiles expire after TTL, so groups and lecturers changed by others, like the crawler, are reloaded"""
+
+    def __init__(self, max_size: int, ttl: timedelta) -> None:
+        self.max_size: int = max_size
+        self.ttl: float = ttl.total_seconds()
+        self.stats: UserProfileStats = UserProfileStats()
+        # user id -> (expire time in monotonic clock, profile)
+        self._profiles: OrderedDict[int, tuple[float, UserProfile]] = OrderedDict()
+        # user id -> token of the latest load. Writes remove it, so loads started before the write end are not cached
+        self._loads: dict[int, object] = {}
+
+    async def get(self, user_id: int) -> UserProfile:
+        with span("user_profile"):
+            return await self._get(user_id)
+
+    async def _get(self, user_id: int) -> UserProfile:
+        entry = self._profiles.get(user_id)
+        if entry is not None:
+            expire_time, profile = entry
+            if expire_time > time.monotonic():
+                self._profiles.move_to_end(user_id)
+                self.stats.hits += 1
+                return profile
+            
+            del self._profiles[user_id]
+            self.stats.expired += 1
+        
+        self.stats.misses += 1
+        stmt = (
+            select(Group, Lecturer)
+            .select_from(User)
+            .outerjoin(Group, Group.id == User.saved_group_id)
+            .outerjoin(Lecturer, Lecturer.id == User.saved_lecturer_id)
+            .where(User.id == user_id)
+        )
+        
+        load = self._loads[user_id] = object()
+        profile = UserProfile()
+        try:
+            async for session in create_session():
+                async with session.begin():
+                    row = (await session.execute(stmt)).first()
+                    if row:
+                        profile = UserProfile(saved_group=row[0], saved_lecturer=row[1])
+        finally:
+            is_latest = self._loads.get(user_id) is load
+            if is_latest:
+                del self._loads[user_id]
+        
+        if not is_latest:
+            # Profile was written or loaded again meanwhile, this one may be outdated
+            return profile
+        
+        self._profiles[user_id] = (time.monotonic() + self.ttl, profile)
+        if len(self._profiles) > self.max_size:
+            self._profiles.popitem(last=False)
+            self.stats.evictions += 1
+            
+        return profile
+
+    async def set_saved_group(self, user_id: int, group: Group | None) -> None:
+        stmt = upsert(User, {'id': user_id, 'saved_group_id': group.id if group else None},
+                      index_elements=['id'], update_columns=['saved_group_id'])
+        
+        await self._execute(user_id, stmt)
+
+    async def set_saved_lecturer(self, user_id: int, lecturer: Lecturer | None) -> None:
+        stmt = upsert(User, {'id': user_id, 'saved_lecturer_id': lecturer.id if lecturer else None},
+                      index_elements=['id'], update_columns=['saved_lecturer_id'])
+        
+        await self._execute(user_id, stmt)
+
+    def invalidate(self, user_id: int) -> None:
+        """Removes cached profile and stops loads in progress from caching it"""
+        self._profiles.pop(user_id, None)
+        self._loads.pop(user_id, None)
+
+    async def _execute(self, user_id: int, stmt: Insert) -> None:
+        # Loads started before the write are not cached. Loads started during the write can read the old row,
+        # the second invalidate stops them too
+        self.invalidate(user_id)
+        try:
+            async for session in create_session():
+                async with session.begin():
+                    await session.execute(stmt)
+        finally:
+            self.invalidate(user_id)
+
+_settings = CacheSettings()
+user_profiles = UserProfileService(_settings.USER_PROFILE_CACHE_SIZE, timedelta(seconds=_settings.USER_PROFILE_CACHE_TTL))
+register_cache("user_profiles", user_profiles.stats, lambda: len(user_profiles._profiles))  # pyright: ignore[reportPrivateUsage]
@@ -1,3 +1,6 @@
+# Imported first to measure import time of the rest
+from utils.startup import startup
+
 import asyncio
 import logging
 import logging.handlers
@@ -10,6 +13,8 @@
 from database import db
 from telegrambot.bot import application
 
+startup.mark("imports")
+
 def setup_logging() -> None:
     level = logging.INFO
 
@@ -39,6 +44,7 @@ def main() -> None:
     
     loop = asyncio.get_event_loop()
     loop.run_until_complete(setup_database())
+    startup.mark("migrations")
     
     allowed_updates: list[str] = [UpdateType.MESSAGE, UpdateType.CALLBACK_QUERY]
     application.run_polling(allowed_updates=allowed_updates, drop_pending_updates=True)
@@ -1,3 +1,5 @@
+from datetime import time
+
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -7,9 +9,109 @@ class DatabaseSettings(BaseSettings):
 class TelegramSettings(BaseSettings):
     BOT_TOKEN: str = Field(default=...)
     DEVELOPER_CHAT_ID: int | None = None
+    # Max count of updates processed at the same time. Updates of one user are processed one by one
+    MAX_CONCURRENT_UPDATES: int = 64
+    # Updates processed longer are logged with time spent in handlers, ASU, database and Bot API, in milliseconds.
+    # 0 disables the log
+    SLOW_UPDATE_THRESHOLD_MS: int = 3000
+    # Max count of updates of one user waiting for the previous one, newer updates are dropped. 0 disables the limit
+    MAX_QUEUED_UPDATES_PER_USER: int = 20
     
 class AsuSettings(BaseSettings):
     ASU_TOKEN: str = Field(default=...)
+    # Average count of requests per second made to ASU API
+    ASU_RATE_LIMIT: float = 0.5
+    # Count of requests that can be made at once after being idle
+    ASU_RATE_BURST: int = 3
+    # Max count of open connections to ASU
+    ASU_MAX_CONNECTIONS: int = 10
+    # Max count of idle connections kept open
+    ASU_MAX_KEEPALIVE_CONNECTIONS: int = 5
+    # How long idle connection is kept open, in seconds
+    ASU_KEEPALIVE_EXPIRY: float = 30.0
+    # Use HTTP/2, requires h2 package
+    ASU_HTTP2: bool = False
+    # Timeouts of connecting, reading response, sending request and waiting for free connection, in seconds
+    ASU_CONNECT_TIMEOUT: float = 5.0
+    ASU_READ_TIMEOUT: float = 15.0
+    ASU_WRITE_TIMEOUT: float = 5.0
+    ASU_POOL_TIMEOUT: float = 5.0
+    # Count of retries of failed GET request
+    ASU_RETRIES: int = 2
+    # Base delay between retries, doubled on each retry and randomized, in seconds
+    ASU_RETRY_BACKOFF: float = 0.5
+    # Max time of one request with all its retries, counted from the first attempt, in seconds.
+    # Retries that don't fit are not made, so a user without cached schedule doesn't wait for all of them
+    ASU_REQUEST_DEADLINE: float = 20.0
+    # Count of failed requests in a row, after which requests fail fast without being sent
+    ASU_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    # How long requests fail fast before trying ASU again, in seconds
+    ASU_CIRCUIT_RESET_TIMEOUT: float = 30.0
+    # Open connection to ASU on startup, so the first user doesn't wait for connecting
+    ASU_WARM_UP: bool = True
+    
+class CacheSettings(BaseSettings):
+    # How long fetched schedule is served from the database, in seconds
+    SCHEDULE_CACHE_TTL: int = 3600
+    # How long schedule with faculties missing in the database is cached, in seconds.
+    # It is parsed again after that, faculties may be known by then
+    SCHEDULE_UNRESOLVED_CACHE_TTL: int = 300
+    # How long parsed schedule is kept in memory, in seconds
+    SCHEDULE_MEMORY_CACHE_TTL: int = 600
+    # Max count of timetables kept in memory
+    SCHEDULE_MEMORY_CACHE_SIZE: int = 1024
+    # How long user waits for ASU when outdated schedule is cached, in milliseconds.
+    # After that outdated schedule is shown and the fresh one is saved to the cache when it arrives
+    SCHEDULE_LATENCY_BUDGET_MS: int = 2000
+    # Max count of formatted schedules kept in memory per schedule type
+    RENDER_CACHE_SIZE: int = 2048
+    # Max count of users, whose saved group and lecturer are kept in memory
+    USER_PROFILE_CACHE_SIZE: int = 10000
+    # How long saved group and lecturer of user are kept in memory, in seconds
+    USER_PROFILE_CACHE_TTL: int = 600
+    # Max count of distinct groups, lecturers, rooms or subjects shared between timetables, 0 to disable
+    INTERN_POOL_SIZE: int = 50000
+    # Local time of day when schedules of saved groups and lecturers are refreshed
+    # Example: PREFETCH_TIMES='["06:30", "12:00"]'
+    PREFETCH_TIMES: list[time] = [time(6, 30), time(12, 0), time(18, 0)]
+    # Count of schedules refreshed at the same time
+    PREFETCH_CONCURRENCY: int = 4
+    
+class StatisticsSettings(BaseSettings):
+    # Max count of statistics waiting to be written, others are dropped
+    STATS_QUEUE_SIZE: int = 10000
+    # Max count of statistics written in one INSERT
+    STATS_BATCH_SIZE: int = 200
+    # Max time statistics waits in the queue, in milliseconds
+    STATS_FLUSH_INTERVAL_MS: int = 1000
+    
+class CrawlerSettings(BaseSettings):
+    # Local time of day when all groups and lecturers are loaded from ASU, None to disable
+    CRAWLER_TIME: time | None = time(3, 0)
+    # Count of requests made by the crawler at the same time
+    CRAWLER_CONCURRENCY: int = 2
+    # Progress of interrupted crawl
+    CRAWLER_CHECKPOINT_PATH: str = "data/crawler_checkpoint.json"
+    # How often faculties are reloaded from the database, in seconds, 0 to disable.
+    # Unknown faculty codes found in schedules reload them at once
+    FACULTIES_REFRESH_INTERVAL: int = 3600
+    
+class NotificationSettings(BaseSettings):
+    # Notify users when schedule of their saved group or lecturer is changed
+    SCHEDULE_CHANGE_NOTIFICATIONS: bool = True
+    # Count of notifications sent at once, Telegram allows about 30 messages per second
+    NOTIFICATION_BATCH_SIZE: int = 25
+    # Pause between batches of notifications, in milliseconds
+    NOTIFICATION_BATCH_INTERVAL_MS: int = 1000
+    
+class MetricsSettings(BaseSettings):
+    # Port of HTTP endpoint with metrics in Prometheus format, disabled if not set
+    METRICS_PORT: int | None = None
+    # Address the endpoint listens on
+    METRICS_HOST: str = "127.0.0.1"
+    # How often metrics are written to the log, in seconds, 0 to disable
+    METRICS_LOG_INTERVAL: int = 0
     
-class Settings(DatabaseSettings, TelegramSettings, AsuSettings):
+class Settings(DatabaseSettings, TelegramSettings, AsuSettings, CacheSettings, StatisticsSettings, CrawlerSettings,
+               NotificationSettings, MetricsSettings):
     pass
\ No newline at end of file
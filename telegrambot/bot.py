@@ -1,20 +1,45 @@
+import asyncio
 import html
 import json
 import logging
 
+import httpx
 from telegram import Update
 from telegram.constants import ParseMode
-from telegram.ext import Application, ApplicationBuilder, CommandHandler
+from telegram.ext import ApplicationBuilder, CommandHandler
+from telegram.request import BaseRequest, HTTPXRequest
 
+import asu
+from asu.transport import AsuUnavailableError, CircuitOpenError
+from database.db import warm_up_pool
+from database.stats import stats_writer
 from settings import Settings
 from telegrambot.commands import *
-from telegrambot.context import ApplicationContext, context_types
+from telegrambot.common.metrics import instrument_handlers
+from telegrambot.common.request import TracedRequest
+from telegrambot.common.update_processor import ConversationUpdateProcessor
+from telegrambot.jobs import (schedule_crawler_job, schedule_faculties_refresh_job, schedule_metrics_log_job,
+                               schedule_prefetch_jobs)
+from telegrambot.context import ApplicationContext, BotApplication, context_types
+from utils.metrics import MetricsServer
+from utils.startup import startup
 
 settings = Settings()
+metrics_server = MetricsServer(settings.METRICS_HOST, settings.METRICS_PORT) if settings.METRICS_PORT else None
 
 # pyright: reportUnknownMemberType=false
-async def on_post_init(application: Application): # pyright: ignore[reportMissingTypeArgument, reportUnknownParameterType]
-    application.bot_data._settings = settings
+async def on_post_init(application: BotApplication):
+    application.bot_data._settings = settings # pyright: ignore[reportPrivateUsage]
+
+    # Connections are opened while faculties and the search index are loaded
+    awaitables = [
+        startup.measure("faculties", asu.client.load_faculties()),
+        startup.measure("search_index", asu.client.load_search_index()),
+        startup.measure("database_pool", warm_up_pool()),
+    ]
+    if settings.ASU_WARM_UP:
+        awaitables.append(startup.measure("asu_connection", asu.client.warm_up()))
+    await asyncio.gather(*awaitables)
 
     application.add_handler(CommandHandler("start", start_callback))
     application.add_handler(CommandHandler("cleansavegroup", cleansavegroup_callback))
@@ -24,8 +49,30 @@ async def on_post_init(application: Application): # pyright: ignore[reportMissin
     application.add_handler(lecturer_handler)
     application.add_handler(notes_handler)
     
+    for handlers in application.handlers.values():
+        instrument_handlers(handlers)
+    
     application.add_error_handler(error_handler)
     
+    schedule_prefetch_jobs(application, settings)
+    schedule_crawler_job(application, settings)
+    schedule_metrics_log_job(application, settings)
+    schedule_faculties_refresh_job(application, settings)
+    
+    stats_writer.start()
+    
+    if metrics_server:
+        await metrics_server.start()
+        
+    startup.mark("post_init")
+    
+async def on_post_shutdown(_application: BotApplication) -> None:
+    await stats_writer.stop()
+    await asu.client.close()
+    
+    if metrics_server:
+        await metrics_server.stop()
+    
 async def disabled_command_handler(update: Update, _context: ApplicationContext) -> None:
     await update.message.reply_text("Данная команда была отключена")
 
@@ -33,13 +80,22 @@ async def error_handler(update: object, context: ApplicationContext) -> None:
     # Log the error before we do anything else, so we can see it even if something breaks.
     logging.error("Exception while handling an update:", exc_info=context.error)
     
+    is_asu_unavailable = isinstance(context.error, (AsuUnavailableError, httpx.TransportError))
+    
     # If exception happended in message update, then notify about the error to the user
     if isinstance(update, Update) and (message := update.message):
-        await message.reply_text("Произошла ошибка. Пожалуйста, попробуйте еще раз позже или свяжитесь с поддержкой.")
+        if is_asu_unavailable:
+            await message.reply_text("Сайт АлтГУ сейчас недоступен. Пожалуйста, попробуйте еще раз через несколько минут.")
+        else:
+            await message.reply_text("Произошла ошибка. Пожалуйста, попробуйте еще раз позже или свяжитесь с поддержкой.")
     
     if not (dev_chat_id := context.settings.DEVELOPER_CHAT_ID):
         return
     
+    # Failing fast is expected while ASU is down, developers were notified about failures that opened the circuit
+    if isinstance(context.error, CircuitOpenError):
+        return
+    
     # Do not send error message to devs, if update is null.
     # The reason update may be null is because of network error (httpx.ReadError)
     if update is None:
@@ -60,13 +116,28 @@ async def error_handler(update: object, context: ApplicationContext) -> None:
     )
     
     
-application = (
-    ApplicationBuilder()
-    .token(settings.BOT_TOKEN)
-    # Processing updates concurrently is not recommended when stateful handlers like telegram.ext.ConversationHandler are used.
-    # https://docs.python-telegram-bot.org/en/latest/telegram.ext.applicationbuilder.html#telegram.ext.ApplicationBuilder.concurrent_updates
-    .concurrent_updates(False)
-    .post_init(on_post_init)
-    .context_types(context_types)
-    .build()
-)
+def create_application(request: BaseRequest | None = None) -> BotApplication:
+    """Builds the bot. `request` replaces the connection to Bot API, for example in load tests"""
+    builder = (
+        ApplicationBuilder()
+        .token(settings.BOT_TOKEN)
+        # Processing updates concurrently is not recommended when stateful handlers like telegram.ext.ConversationHandler are used.
+        # https://docs.python-telegram-bot.org/en/latest/telegram.ext.applicationbuilder.html#telegram.ext.ApplicationBuilder.concurrent_updates
+        # So updates of the same user are still processed one by one
+        .concurrent_updates(ConversationUpdateProcessor(settings.MAX_CONCURRENT_UPDATES,
+                                                        settings.SLOW_UPDATE_THRESHOLD_MS / 1000,
+                                                        settings.MAX_QUEUED_UPDATES_PER_USER))
+        # Same pool size as the default request of ApplicationBuilder
+        .request(TracedRequest(request or HTTPXRequest(connection_pool_size=256)))
+        .post_init(on_post_init)
+        .post_shutdown(on_post_shutdown)
+        .context_types(context_types)
+    )
+    
+    if request is not None:
+        builder = builder.get_updates_request(request)
+        
+    # context_types don't change type of the job queue, it passes ApplicationContext to jobs too
+    return builder.build() # pyright: ignore[reportReturnType]
+    
+application = create_application()
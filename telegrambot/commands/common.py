@@ -1,14 +1,15 @@
 from datetime import datetime, timedelta
 
-from sqlalchemy import select, update
 from telegram import Update, User
 import telegram
 from telegram.ext import ConversationHandler
 
 import asu
-from database.db import create_session
+from database.stats import stats_writer
+from database.user_profiles import user_profiles
 from telegrambot.context import ApplicationContext
 from utils.daterange import DateRange
+from utils.tracing import span
 
 import database.models as models
 
@@ -19,84 +20,33 @@ async def get_saved_group(user: User | None) -> models.Group | None:
     if not user:
         return None
     
-    stmt = select(models.User).where(models.User.id == user.id)
-    async for session in create_session():
-        async with session.begin():
-            result = await session.execute(stmt)
-            db_user = result.scalar()
-            
-            if db_user and db_user.saved_group_id:
-                return await db_user.saved_group(session)
-            
-    return None
+    return (await user_profiles.get(user.id)).saved_group
 
 async def set_saved_group(user: User | None, group: models.Group | None) -> None:
     if not user:
         return
     
-    group_id = group.id if group else None
-    
-    async for session in create_session():
-        async with session.begin():
-            # Check if the user exists
-            existing_user_stmt = select(models.User).where(models.User.id == user.id)
-            result = await session.execute(existing_user_stmt)
-            existing_user = result.scalar_one_or_none()
-
-            if existing_user:
-                # Update the existing user's saved_group_id
-                stmt = update(models.User).where(models.User.id == user.id).values(saved_group_id=group_id)
-                await session.execute(stmt)
-            else:
-                session.add(models.User(id=user.id, saved_group_id=group_id, saved_lecturer_id=None))
-                await session.commit()
+    await user_profiles.set_saved_group(user.id, group)
                 
 async def get_saved_lecturer(user: User | None) -> models.Lecturer | None:
     if not user:
         return None
     
-    stmt = select(models.User).where(models.User.id == user.id)
-    async for session in create_session():
-        async with session.begin():
-            result = await session.execute(stmt)
-            db_user = result.scalar()
-            
-            if db_user and db_user.saved_lecturer_id:
-                return await db_user.saved_lecturer(session)
-
-    return None
+    return (await user_profiles.get(user.id)).saved_lecturer
 
 async def set_saved_lecturer(user: User | None, lecturer: models.Lecturer | None) -> None:
     if not user:
         return
     
-    lecturer_id = lecturer.id if lecturer else None
-    
-    async for session in create_session():
-        async with session.begin():
-            # Check if the user exists
-            existing_user_stmt = select(models.User).where(models.User.id == user.id)
-            result = await session.execute(existing_user_stmt)
-            existing_user = result.scalar_one_or_none()
-
-            if existing_user:
-                # Update the existing user's saved_group_id
-                stmt = update(models.User).where(models.User.id == user.id).values(saved_lecturer_id=lecturer_id)
-                await session.execute(stmt)
-            else:
-                session.add(models.User(id=user.id, saved_group_id=None, saved_lecturer_id=lecturer_id))
-                await session.commit()
+    await user_profiles.set_saved_lecturer(user.id, lecturer)
                 
                 
-async def add_statistics(user: User | None, search_type: models.SearchType, search_query: str):
-    async for session in create_session():
-        async with session.begin():
-            session.add(models.Stat(user_id=user.id,
-                        search_type=search_type,
-                        search_query=search_query,
-                        timestamp=datetime.now()
-                        ))
-            await session.commit()
+def add_statistics(user: User | None, search_type: models.SearchType, search_query: str) -> None:
+    if not user:
+        return
+    
+    with span("statistics"):
+        stats_writer.add(user.id, search_type, search_query)
 
 async def handle_show_schedule(update: Update, context: ApplicationContext) -> int:
     """Обработчик показа расписания"""
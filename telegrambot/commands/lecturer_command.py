@@ -15,7 +15,7 @@ async def lecturer_callback(update: Update, context: ApplicationContext) -> int:
     
     lecturer = await get_saved_lecturer(update.effective_user)
     if lecturer:
-        await add_statistics(update.effective_user, SearchType.lecturer, lecturer.name)
+        add_statistics(update.effective_user, SearchType.lecturer, lecturer.name)
         
         context.user_data.selected_schedule = lecturer
         return await show_lecturer_options(update, context)
@@ -41,7 +41,7 @@ async def handle_lecturer_by_name(update: Update, context: ApplicationContext, l
     # Limit to 50 symbols
     lecturer_name = lecturer_name.strip()[:50]
     
-    await add_statistics(update.effective_user, SearchType.lecturer, lecturer_name)
+    add_statistics(update.effective_user, SearchType.lecturer, lecturer_name)
     
     lecturer = await asu.client.search_lecturer(lecturer_name)
     if not lecturer:
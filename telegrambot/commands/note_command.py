@@ -1,8 +1,9 @@
-from sqlalchemy import func
+from sqlalchemy import func, select
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ChatMemberStatus, ChatType
 from telegram.ext import CallbackQueryHandler, CommandHandler, MessageHandler, filters
 
+from database.db import create_session
 from database.models import Note
 from .common import *
 
@@ -21,7 +21,7 @@ async def schedule_callback(update: Update, context: ApplicationContext) -> int:
     
     group = await get_saved_group(update.effective_user)
     if group:
-        await add_statistics(update.effective_user, SearchType.group, group.name)
+        add_statistics(update.effective_user, SearchType.group, group.name)
         
         context.user_data.selected_schedule = group
         return await show_schedule_options(update, context)
@@ -48,7 +48,7 @@ async def handle_schedule_by_name(update: Update, context: ApplicationContext, g
     group_name = group_name.strip()[:50]
     
     # Stats
-    await add_statistics(update.effective_user, SearchType.group, group_name)
+    add_statistics(update.effective_user, SearchType.group, group_name)
     
     schedule = await asu.client.search_group(group_name)
     if not schedule:
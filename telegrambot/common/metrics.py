@@ -0,0 +1,51 @@
+from collections.abc import Callable, Coroutine, Iterable
+from functools import wraps
+import time
+from typing import Any
+
+from telegram import Update
+from telegram.ext import BaseHandler, ConversationHandler
+
+from telegrambot.context import ApplicationContext
+from utils.metrics import registry
+from utils.tracing import span
+
+HandlerCallback = Callable[[Update, ApplicationContext], Coroutine[Any, Any, Any]]
+
+_handler_duration = registry.histogram("bot_handler_duration_seconds", "Duration of handler callbacks", ("handler",))
+_handler_errors = registry.counter("bot_handler_errors", "Exceptions raised by handler callbacks", ("handler", "error"))
+
+# Wrapped callbacks, so handlers shared between applications are not wrapped twice
+_instrumented: set[HandlerCallback] = set()
+
+def instrument_handlers(handlers: Iterable[BaseHandler[Any, Any, Any]]) -> None:
+    """Measures duration and errors of handler callbacks, including handlers of conversations,
+    and adds them to the trace of the update"""
+    for handler in handlers:
+        if isinstance(handler, ConversationHandler):
+            instrument_handlers(handler.entry_points)
+            for state_handlers in handler.states.values():
+                instrument_handlers(state_handlers)
+            instrument_handlers(handler.fallbacks)
+            continue
+        
+        if handler.callback not in _instrumented:
+            handler.callback = _instrument(handler.callback)
+
+def _instrument(callback: HandlerCallback) -> HandlerCallback:
+    name: str = getattr(callback, "__name__", type(callback).__name__)
+    
+    @wraps(callback)
+    async def wrapper(update: Update, context: ApplicationContext) -> Any:
+        started_at = time.perf_counter()
+        try:
+            with span(f"handler {name}"):
+                return await callback(update, context)
+        except Exception as e:
+            _handler_errors.inc(handler=name, error=type(e).__name__)
+            raise
+        finally:
+            _handler_duration.observe(time.perf_counter() - started_at, handler=name)
+    
+    _instrumented.add(wrapper)
+    return wrapper
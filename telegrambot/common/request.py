@@ -0,0 +1,27 @@
+from typing import Any
+
+from telegram.request import BaseRequest, RequestData
+
+from utils.tracing import span
+
+class TracedRequest(BaseRequest):
+    """Adds Bot API requests to the trace of the update they were made for"""
+
+    def __init__(self, request: BaseRequest) -> None:
+        self.request: BaseRequest = request
+
+    @property
+    def read_timeout(self) -> float | None: # pyright: ignore[reportImplicitOverride]
+        return self.request.read_timeout
+
+    async def initialize(self) -> None: # pyright: ignore[reportImplicitOverride]
+        await self.request.initialize()
+
+    async def shutdown(self) -> None: # pyright: ignore[reportImplicitOverride]
+        await self.request.shutdown()
+
+    async def do_request(self, url: str, method: str, request_data: RequestData | None = None, # pyright: ignore[reportImplicitOverride]
+                         *args: Any, **kwargs: Any) -> tuple[int, bytes]:
+        # url ends with the method of Bot API
+        with span(f"telegram {url.rsplit('/', 1)[-1]}"):
+            return await self.request.do_request(url, method, request_data, *args, **kwargs)
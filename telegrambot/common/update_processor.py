@@ -0,0 +1,139 @@
+from collections import deque
+from collections.abc import Awaitable
+import inspect
+import json
+import logging
+import time
+from typing import Any
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from utils.metrics import registry
+from utils.startup import startup
+from utils.tracing import start_trace
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+_update_duration = registry.histogram("bot_update_duration_seconds",
+                                      "Duration of processing updates, including waiting for previous updates of the user")
+_updates_in_progress = registry.gauge("bot_updates_in_progress", "Count of updates processing or waiting for the user")
+_updates_dropped = registry.counter("bot_updates_dropped", "Updates dropped, because too many updates of the user were queued")
+
+class ConversationUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates of different users concurrently, but updates of the same user one by one.
+
+    Conversation handlers are keyed by chat and user, and user_data is shared between chats,
+    so serializing by user keeps the conversation state consistent.
+    Updates without a user are serialized by chat.
+
+    Updates arriving while an update of the user is processing are queued and processed by the same call,
+    so they don't take slots of `max_concurrent_updates` while waiting and don't stall other users.
+    At most `max_queued_updates` updates of a user wait, newer ones are dropped, so a user flooding the bot
+    doesn't take memory and keep handlers busy. 0 disables the limit.
+    
+    Every update is traced, updates processed longer than `slow_update_threshold` seconds
+    are logged with their spans. 0 disables the log."""
+
+    def __init__(self, max_concurrent_updates: int, slow_update_threshold: float = 0,
+                 max_queued_updates: int = 0) -> None:
+        super().__init__(max_concurrent_updates)
+        
+        self.slow_update_threshold: float = slow_update_threshold
+        self.max_queued_updates: int = max_queued_updates
+        # user -> queued updates with time.perf_counter() of queueing, exists while an update of the user is processing
+        self._queues: dict[int, deque[tuple[object, Awaitable[Any], float]]] = {}
+
+    @staticmethod
+    def _get_key(update: object) -> int | None:
+        if not isinstance(update, Update):
+            return None
+        
+        if update.effective_user:
+            return update.effective_user.id
+        
+        if update.effective_chat:
+            return update.effective_chat.id
+        
+        return None
+    
+    @staticmethod
+    def _describe(update: object) -> str:
+        """Returns kind of the update without text entered by user"""
+        if not isinstance(update, Update):
+            return type(update).__name__
+        
+        if update.callback_query:
+            return f"callback {update.callback_query.data}"
+        
+        if update.message and update.message.text:
+            text = update.message.text
+            return text.split()[0].split("@")[0] if text.startswith("/") else "message"
+        
+        return "update"
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None: # pyright: ignore[reportImplicitOverride]
+        _updates_in_progress.inc()
+        key = self._get_key(update)
+        if key is None:
+            try:
+                await self._process_update(update, coroutine, None)
+            finally:
+                _updates_in_progress.dec()
+            return
+
+        queue = self._queues.get(key)
+        if queue is not None and self.max_queued_updates and len(queue) >= self.max_queued_updates:
+            _updates_in_progress.dec()
+            _updates_dropped.inc()
+            _logger.warning("Пропущено обновление %s пользователя %d: в очереди уже %d обновлений",
+                            self._describe(update), key, len(queue))
+            if inspect.iscoroutine(coroutine):
+                coroutine.close()
+            return
+
+        if queue is not None:
+            queue.append((update, coroutine, time.perf_counter()))
+            return
+
+        queue = self._queues[key] = deque()
+        queued_at: float | None = None
+        try:
+            while True:
+                try:
+                    await self._process_update(update, coroutine, queued_at)
+                except Exception:
+                    # Keep processing queued updates of the user
+                    _logger.exception("Ошибка при обработке обновления")
+                finally:
+                    _updates_in_progress.dec()
+
+                if not queue:
+                    break
+                update, coroutine, queued_at = queue.popleft()
+        finally:
+            del self._queues[key]
+            # Cancelled on shutdown
+            for _, queued, _ in queue:
+                _updates_in_progress.dec()
+                if inspect.iscoroutine(queued):
+                    queued.close()
+
+    async def _process_update(self, update: object, coroutine: Awaitable[Any], queued_at: float | None) -> None:
+        """Processes the update in its trace. `queued_at` is time of queueing, if it waited for the user"""
+        with start_trace(self._describe(update), update_id=getattr(update, "update_id", None),
+                         user_id=self._get_key(update)) as trace:
+            if queued_at is not None:
+                trace.add_span("wait_user", queued_at)
+            await coroutine
+
+        _update_duration.observe(trace.duration or 0)
+        startup.first_update_handled()
+        if self.slow_update_threshold and (trace.duration or 0) >= self.slow_update_threshold:
+            _logger.warning("Медленная обработка обновления: %s", json.dumps(trace.to_dict(), ensure_ascii=False))
+
+    async def initialize(self) -> None: # pyright: ignore[reportImplicitOverride]
+        pass
+
+    async def shutdown(self) -> None: # pyright: ignore[reportImplicitOverride]
+        pass
@@ -1,6 +1,6 @@
 from typing import Any
 
-from telegram.ext import CallbackContext, ContextTypes, ExtBot
+from telegram.ext import Application, CallbackContext, ContextTypes, ExtBot, JobQueue
 
 from database.models import Group, Lecturer, Note
 from settings import Settings
@@ -23,4 +23,8 @@ def settings(self) -> Settings:
         return self.bot_data._settings # pyright: ignore[reportPrivateUsage]
 
     
-context_types = ContextTypes(context=ApplicationContext, bot_data=BotData, user_data=UserData)
\ No newline at end of file
+context_types = ContextTypes(context=ApplicationContext, bot_data=BotData, user_data=UserData)
+
+# Application built with context_types, for functions adding jobs and handlers to it
+BotApplication = Application[ExtBot[None], ApplicationContext, UserData, dict[Any, Any], BotData,
+                             JobQueue[ApplicationContext]]
\ No newline at end of file
@@ -0,0 +1,11 @@
+from .prefetch_job import schedule_prefetch_jobs
+from .crawler_job import schedule_crawler_job
+from .metrics_job import schedule_metrics_log_job
+from .faculties_job import schedule_faculties_refresh_job
+
+__all__ = [
+    "schedule_prefetch_jobs",
+    "schedule_crawler_job",
+    "schedule_metrics_log_job",
+    "schedule_faculties_refresh_job",
+]
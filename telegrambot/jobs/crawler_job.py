@@ -0,0 +1,28 @@
+from datetime import datetime
+import logging
+
+import asu
+from asu.crawler import DirectoryCrawler
+from settings import Settings
+from telegrambot.context import ApplicationContext, BotApplication
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+async def crawler_callback(context: ApplicationContext) -> None:
+    """Loads all groups and lecturers, so searching them doesn't need requests to ASU"""
+    settings = context.settings
+    
+    crawler = DirectoryCrawler(asu.client, settings.CRAWLER_CHECKPOINT_PATH, settings.CRAWLER_CONCURRENCY)
+    await crawler.run()
+
+def schedule_crawler_job(application: BotApplication, settings: Settings) -> None:
+    job_queue = application.job_queue
+    if job_queue is None:
+        _logger.warning("JobQueue is not available, groups and lecturers will not be crawled")
+        return
+    
+    if settings.CRAWLER_TIME is None:
+        return
+    
+    local_timezone = datetime.now().astimezone().tzinfo
+    job_queue.run_daily(crawler_callback, settings.CRAWLER_TIME.replace(tzinfo=local_timezone), name="crawler")
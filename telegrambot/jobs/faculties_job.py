@@ -0,0 +1,23 @@
+import logging
+
+import asu
+from settings import Settings
+from telegrambot.context import ApplicationContext, BotApplication
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+async def faculties_refresh_callback(_context: ApplicationContext) -> None:
+    """Reloads faculties, so faculties added to the database are used without restarting the bot"""
+    await asu.client.faculty_map.refresh()
+
+def schedule_faculties_refresh_job(application: BotApplication, settings: Settings) -> None:
+    job_queue = application.job_queue
+    if job_queue is None:
+        _logger.warning("JobQueue is not available, faculties will not be refreshed")
+        return
+    
+    if not settings.FACULTIES_REFRESH_INTERVAL:
+        return
+    
+    job_queue.run_repeating(faculties_refresh_callback, settings.FACULTIES_REFRESH_INTERVAL,
+                            first=settings.FACULTIES_REFRESH_INTERVAL, name="faculties_refresh")
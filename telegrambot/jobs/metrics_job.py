@@ -0,0 +1,22 @@
+import logging
+
+from settings import Settings
+from telegrambot.context import ApplicationContext, BotApplication
+from utils.metrics import registry
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+async def metrics_log_callback(_context: ApplicationContext) -> None:
+    """Writes metrics to the log"""
+    registry.log(_logger)
+
+def schedule_metrics_log_job(application: BotApplication, settings: Settings) -> None:
+    job_queue = application.job_queue
+    if job_queue is None:
+        _logger.warning("JobQueue is not available, metrics will not be logged")
+        return
+    
+    if not settings.METRICS_LOG_INTERVAL:
+        return
+    
+    job_queue.run_repeating(metrics_log_callback, settings.METRICS_LOG_INTERVAL, name="metrics_log")
@@ -0,0 +1,117 @@
+import asyncio
+from datetime import date, datetime, timedelta
+import logging
+
+from sqlalchemy import select
+
+import asu
+from asu.api import ScheduleType
+from asu.diff import DayChanges, diff_timetables
+from asu.timetable import TimeTable
+from database.db import create_session
+import database.models as models
+from settings import Settings
+from telegrambot.context import ApplicationContext, BotApplication
+
+from .schedule_changes import (delete_notified_time_tables, get_notified_time_tables, notify_schedule_changes,
+                               save_notified_time_tables)
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+async def get_saved_schedules() -> list[ScheduleType]:
+    """Returns distinct groups and lecturers saved by users"""
+    groups_stmt = select(models.Group).where(
+        models.Group.id.in_(select(models.User.saved_group_id).distinct()))
+    lecturers_stmt = select(models.Lecturer).where(
+        models.Lecturer.id.in_(select(models.User.saved_lecturer_id).distinct()))
+    
+    schedules: list[ScheduleType] = []
+    
+    async for session in create_session():
+        async with session.begin():
+            schedules.extend((await session.execute(groups_stmt)).scalars())
+            schedules.extend((await session.execute(lecturers_stmt)).scalars())
+            
+    return schedules
+
+async def prefetch_callback(context: ApplicationContext) -> None:
+    """Refreshes current and next week schedules of saved groups and lecturers in the cache
+    and notifies users about changes"""
+    schedules = await get_saved_schedules()
+    
+    today = date.today()
+    current_week_start = today - timedelta(days=today.weekday())
+    week_starts = [current_week_start, current_week_start + timedelta(days=7)]
+    
+    semaphore = asyncio.Semaphore(context.settings.PREFETCH_CONCURRENCY)
+    notify = context.settings.SCHEDULE_CHANGE_NOTIFICATIONS
+    # schedule -> changes
+    changed_schedules: list[tuple[ScheduleType, list[DayChanges]]] = []
+    # schedule -> timetables by week start, saved as notified after notifications are sent
+    fetched_schedules: list[tuple[ScheduleType, dict[date, TimeTable]]] = []
+    
+    async def refresh(schedule: ScheduleType) -> bool:
+        async with semaphore:
+            try:
+                # One request for all weeks
+                time_tables = await asu.client.refresh_schedule_weeks(schedule, week_starts,
+                                                                      asu.RequestPriority.BACKGROUND)
+                if not notify:
+                    return True
+                
+                previous_time_tables = await get_notified_time_tables(schedule, week_starts)
+            except Exception:
+                _logger.exception("Не удалось обновить расписание %s", schedule.schedule_url)
+                return False
+            
+        changes: list[DayChanges] = []
+        fetched_time_tables: dict[date, TimeTable] = {}
+        for week_start, time_table in zip(week_starts, time_tables):
+            # The whole week has disappeared, which is more likely an error of ASU.
+            # Unknown faculties would be reported as changes after they are refreshed
+            if not time_table.days or time_table.has_unknown_faculties:
+                continue
+            
+            fetched_time_tables[week_start] = time_table
+            # Nothing to compare with yet, the week becomes the base of the next comparison
+            if (previous_time_table := previous_time_tables.get(week_start)) is not None:
+                changes.extend(diff_timetables(previous_time_table, time_table, since=today))
+            
+        if changes:
+            changed_schedules.append((schedule, changes))
+        fetched_schedules.append((schedule, fetched_time_tables))
+        return True
+    
+    started_at = datetime.now()
+    results = await asyncio.gather(*[refresh(schedule) for schedule in schedules])
+    
+    _logger.info("Предзагружено расписаний: %d из %d за %s, изменилось: %d",
+                 sum(results), len(results), datetime.now() - started_at, len(changed_schedules))
+    
+    for schedule, changes in changed_schedules:
+        try:
+            await notify_schedule_changes(context.bot, schedule, changes, context.settings)
+        except Exception:
+            _logger.exception("Не удалось отправить уведомления об изменении расписания %s", schedule.schedule_url)
+            
+    if not notify:
+        return
+    
+    try:
+        for schedule, time_tables in fetched_schedules:
+            await save_notified_time_tables(schedule, time_tables)
+        await delete_notified_time_tables(current_week_start)
+    except Exception:
+        _logger.exception("Не удалось сохранить снимки расписаний")
+
+def schedule_prefetch_jobs(application: BotApplication, settings: Settings) -> None:
+    job_queue = application.job_queue
+    if job_queue is None:
+        _logger.warning("JobQueue is not available, schedules will not be prefetched")
+        return
+    
+    local_timezone = datetime.now().astimezone().tzinfo
+    
+    for prefetch_time in settings.PREFETCH_TIMES:
+        job_queue.run_daily(prefetch_callback, prefetch_time.replace(tzinfo=local_timezone),
+                            name=f"prefetch_{prefetch_time.strftime('%H%M')}")
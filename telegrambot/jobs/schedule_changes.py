@@ -0,0 +1,149 @@
+import asyncio
+from collections.abc import Callable
+from datetime import date
+import logging
+
+from sqlalchemy import delete, select
+from telegram import Bot
+from telegram.constants import MessageLimit, ParseMode
+from telegram.error import Forbidden, TelegramError
+
+import asu
+from asu.api import ScheduleType
+from asu.diff import DayChanges
+from asu.timetable import TimeTable, timetable_from_json, timetable_to_json
+from database.db import create_session, upsert
+import database.models as models
+from settings import NotificationSettings
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+async def get_subscribers(schedule: ScheduleType) -> list[int]:
+    """Returns ids of users, who saved the group or the lecturer"""
+    if isinstance(schedule, models.Lecturer):
+        stmt = select(models.User.id).where(models.User.saved_lecturer_id == schedule.id)
+    else:
+        stmt = select(models.User.id).where(models.User.saved_group_id == schedule.id)
+
+    async for session in create_session():
+        async with session.begin():
+            return list((await session.execute(stmt)).scalars())
+
+    return []
+
+async def get_notified_time_tables(schedule: ScheduleType, week_starts: list[date]) -> dict[date, TimeTable]:
+    """Returns timetables of the weeks, which subscribers were notified about last time, by week start.
+    They are kept apart from the schedule cache, because users' requests update the cache without notifying"""
+    stmt = select(models.ScheduleSnapshot.week_start, models.ScheduleSnapshot.data).where(
+        models.ScheduleSnapshot.schedule_url == schedule.schedule_url,
+        models.ScheduleSnapshot.week_start.in_(week_starts))
+    
+    time_tables: dict[date, TimeTable] = {}
+    async for session in create_session():
+        async with session.begin():
+            for week_start, data in (await session.execute(stmt)).all():
+                try:
+                    time_tables[week_start] = timetable_from_json(data)
+                except (ValueError, KeyError, TypeError):
+                    _logger.warning("Не удалось прочитать снимок расписания %s (%s)", schedule.schedule_url, week_start,
+                                    exc_info=True)
+                    
+    return time_tables
+
+async def save_notified_time_tables(schedule: ScheduleType, time_tables: dict[date, TimeTable]) -> None:
+    if not time_tables:
+        return
+    
+    rows = [{'schedule_url': schedule.schedule_url, 'week_start': week_start, 'data': timetable_to_json(time_table)}
+            for week_start, time_table in time_tables.items()]
+    stmt = upsert(models.ScheduleSnapshot, rows, index_elements=['schedule_url', 'week_start'], update_columns=['data'])
+    
+    async for session in create_session():
+        async with session.begin():
+            await session.execute(stmt)
+
+async def delete_notified_time_tables(before: date) -> None:
+    """Deletes timetables of past weeks"""
+    async for session in create_session():
+        async with session.begin():
+            await session.execute(delete(models.ScheduleSnapshot).where(models.ScheduleSnapshot.week_start < before))
+
+def format_notifications(schedule: ScheduleType, changes: list[DayChanges]) -> list[str]:
+    """Formats changes into messages, which fit into the message length limit.
+    Days are not split between messages, unless one day doesn't fit into a message alone"""
+    is_lecturer = isinstance(schedule, models.Lecturer)
+
+    def fits(days: list[DayChanges]) -> bool:
+        text = asu.format_changes(days, schedule.schedule_url, schedule.name, is_lecturer)
+        return len(text) <= MessageLimit.MAX_TEXT_LENGTH
+
+    messages: list[list[DayChanges]] = [[]]
+    for day_changes in changes:
+        for part in ([day_changes] if fits([day_changes]) else _split_day_changes(day_changes, fits)):
+            if messages[-1] and not fits(messages[-1] + [part]):
+                messages.append([])
+            messages[-1].append(part)
+
+    return [asu.format_changes(days, schedule.schedule_url, schedule.name, is_lecturer) for days in messages]
+
+def _split_day_changes(day_changes: DayChanges, fits: Callable[[list[DayChanges]], bool]) -> list[DayChanges]:
+    """Splits changes of the day into parts, which fit into a message"""
+    count = len(day_changes.removed) + len(day_changes.changed) + len(day_changes.added)
+
+    parts: list[DayChanges] = []
+    start = 0
+    while start < count:
+        stop = start + 1
+        while stop < count and fits([_slice_day_changes(day_changes, start, stop + 1)]):
+            stop += 1
+
+        parts.append(_slice_day_changes(day_changes, start, stop))
+        start = stop
+
+    return parts
+
+def _slice_day_changes(day_changes: DayChanges, start: int, stop: int) -> DayChanges:
+    """Returns lessons from `start` to `stop` of the day, counting removed, changed and added lessons in a row"""
+    changed_start = len(day_changes.removed)
+    added_start = changed_start + len(day_changes.changed)
+
+    return DayChanges(day_changes.day,
+                      added=day_changes.added[max(start - added_start, 0):max(stop - added_start, 0)],
+                      removed=day_changes.removed[start:stop],
+                      changed=day_changes.changed[max(start - changed_start, 0):max(stop - changed_start, 0)])
+
+async def notify_schedule_changes(bot: Bot, schedule: ScheduleType, changes: list[DayChanges],
+                                  settings: NotificationSettings) -> int:
+    """Sends changes to subscribers of the schedule in batches. Returns count of sent notifications"""
+    user_ids = await get_subscribers(schedule)
+    if not user_ids:
+        return 0
+
+    # Rendered once for all subscribers
+    texts = format_notifications(schedule, changes)
+
+    async def send(user_id: int) -> bool:
+        try:
+            for text in texts:
+                await bot.send_message(chat_id=user_id, text=text, parse_mode=ParseMode.HTML,
+                                       disable_web_page_preview=True)
+            return True
+        except Forbidden:
+            # User blocked the bot
+            _logger.debug("Пользователь %d заблокировал бота", user_id)
+        except TelegramError:
+            _logger.warning("Не удалось отправить уведомление пользователю %d", user_id, exc_info=True)
+        return False
+
+    sent = 0
+    batch_size = max(settings.NOTIFICATION_BATCH_SIZE, 1)
+    for start in range(0, len(user_ids), batch_size):
+        if start:
+            await asyncio.sleep(settings.NOTIFICATION_BATCH_INTERVAL_MS / 1000)
+
+        results = await asyncio.gather(*[send(user_id) for user_id in user_ids[start:start + batch_size]])
+        sent += sum(results)
+
+    _logger.info("Уведомления об изменении расписания %s: отправлено %d из %d",
+                 schedule.schedule_url, sent, len(user_ids))
+    return sent
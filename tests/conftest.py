@@ -0,0 +1,12 @@
+import os
+
+import pytest
+
+# Settings are read on import of the modules, tests don't need real tokens or database
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("BOT_TOKEN", "1:test")
+os.environ.setdefault("ASU_TOKEN", "test")
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
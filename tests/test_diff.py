@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+
+from asu.diff import diff_timetables
+from asu.timetable import Lesson, LessonGroup, LessonLecturer, Room, Subject, TimeTable
+
+_MONDAY = date(2024, 10, 14)
+_TUESDAY = _MONDAY + timedelta(days=1)
+
+def lesson(number: str, title: str, room: str = "101", time_start: str = "08:00", lecturer: str = "Иванов И.И.",
+           sub_groups: tuple[str, ...] | None = None) -> Lesson:
+    subject = Subject(title, "лек.", None, (LessonGroup(1, 5, "305с11-4"),),
+                      (LessonLecturer(77, 5, 3, lecturer, "доц."),), Room("пр. Ленина 61", "Л", room), sub_groups)
+    return Lesson(number, time_start, "09:30", subject)
+
+def test_equal_timetables_have_no_changes() -> None:
+    previous = TimeTable({_MONDAY: (lesson("1", "Матан"), lesson("2", "Физика"))})
+    current = TimeTable({_MONDAY: (lesson("1", "Матан"), lesson("2", "Физика"))})
+
+    assert diff_timetables(previous, current) == []
+
+def test_added_and_removed_lessons() -> None:
+    previous = TimeTable({_MONDAY: (lesson("1", "Матан"), lesson("2", "Физика"))})
+    current = TimeTable({_MONDAY: (lesson("1", "Матан"), lesson("3", "История"))})
+
+    [changes] = diff_timetables(previous, current)
+
+    assert changes.day == _MONDAY
+    assert changes.added == [lesson("3", "История")]
+    assert changes.removed == [lesson("2", "Физика")]
+    assert changes.changed == []
+
+def test_changed_room_time_and_lecturer() -> None:
+    previous = TimeTable({_MONDAY: (lesson("1", "Матан"), lesson("2", "Физика"), lesson("3", "История"))})
+    current = TimeTable({_MONDAY: (lesson("1", "Матан", room="202"), lesson("2", "Физика", time_start="08:10"),
+                                   lesson("3", "История", lecturer="Петров П.П."))})
+
+    [changes] = diff_timetables(previous, current)
+
+    assert changes.added == changes.removed == []
+    assert changes.changed == [
+        (lesson("1", "Матан"), lesson("1", "Матан", room="202")),
+        (lesson("2", "Физика"), lesson("2", "Физика", time_start="08:10")),
+        (lesson("3", "История"), lesson("3", "История", lecturer="Петров П.П.")),
+    ]
+
+def test_sub_groups_are_different_lessons() -> None:
+    previous = TimeTable({_MONDAY: (lesson("1", "Английский", sub_groups=("1",)),
+                                    lesson("1", "Английский", sub_groups=("2",)))})
+    current = TimeTable({_MONDAY: (lesson("1", "Английский", sub_groups=("2",)),)})
+
+    [changes] = diff_timetables(previous, current)
+
+    assert changes.removed == [lesson("1", "Английский", sub_groups=("1",))]
+    assert changes.added == changes.changed == []
+
+def test_repeated_lesson_is_matched_once() -> None:
+    previous = TimeTable({_MONDAY: (lesson("1", "Матан"),)})
+    current = TimeTable({_MONDAY: (lesson("1", "Матан"), lesson("1", "Матан", room="202"))})
+
+    [changes] = diff_timetables(previous, current)
+
+    assert changes.added == [lesson("1", "Матан", room="202")]
+    assert changes.removed == changes.changed == []
+
+def test_days_missing_in_one_of_timetables() -> None:
+    previous = TimeTable({_MONDAY: (lesson("1", "Матан"),)})
+    current = TimeTable({_TUESDAY: (lesson("1", "Матан"),)})
+
+    changes = diff_timetables(previous, current)
+
+    assert [day_changes.day for day_changes in changes] == [_MONDAY, _TUESDAY]
+    assert changes[0].removed == [lesson("1", "Матан")]
+    assert changes[1].added == [lesson("1", "Матан")]
+
+def test_days_before_since_are_ignored() -> None:
+    previous = TimeTable({_MONDAY: (lesson("1", "Матан"),), _TUESDAY: (lesson("1", "Матан"),)})
+    current = TimeTable({_MONDAY: (), _TUESDAY: ()})
+
+    changes = diff_timetables(previous, current, since=_TUESDAY)
+
+    assert [day_changes.day for day_changes in changes] == [_TUESDAY]
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+
+from asu.ratelimit import RequestPriority, TokenBucketRateLimiter
+
+pytestmark = pytest.mark.anyio
+
+async def start_waiters(limiter: TokenBucketRateLimiter, order: list[str],
+                        waiters: list[tuple[str, RequestPriority]]) -> list[asyncio.Task[None]]:
+    """Starts waiters one by one, so they are queued in the given order"""
+    async def wait(name: str, priority: RequestPriority) -> None:
+        await limiter.acquire(priority)
+        order.append(name)
+
+    tasks: list[asyncio.Task[None]] = []
+    for name, priority in waiters:
+        tasks.append(asyncio.create_task(wait(name, priority)))
+        await asyncio.sleep(0)
+    return tasks
+
+def test_rejects_invalid_settings() -> None:
+    with pytest.raises(ValueError):
+        TokenBucketRateLimiter(0, 1)
+    with pytest.raises(ValueError):
+        TokenBucketRateLimiter(1, 0)
+
+async def test_burst_is_not_delayed() -> None:
+    limiter = TokenBucketRateLimiter(1, 5)
+
+    await asyncio.wait_for(asyncio.gather(*[limiter.acquire() for _ in range(5)]), timeout=0.05)
+
+async def test_limits_rate_after_burst() -> None:
+    limiter = TokenBucketRateLimiter(50, 2)
+    started_at = time.monotonic()
+
+    await asyncio.gather(*[limiter.acquire() for _ in range(7)])
+
+    # 5 requests over the burst, 20ms per token
+    assert time.monotonic() - started_at >= 0.09
+
+async def test_interactive_requests_go_first() -> None:
+    limiter = TokenBucketRateLimiter(100, 1)
+    await limiter.acquire()
+    order: list[str] = []
+
+    tasks = await start_waiters(limiter, order, [
+        ("background 1", RequestPriority.BACKGROUND),
+        ("interactive 1", RequestPriority.INTERACTIVE),
+        ("background 2", RequestPriority.BACKGROUND),
+        ("interactive 2", RequestPriority.INTERACTIVE),
+    ])
+    await asyncio.gather(*tasks)
+
+    assert order == ["interactive 1", "interactive 2", "background 1", "background 2"]
+
+async def test_same_priority_is_served_in_order() -> None:
+    limiter = TokenBucketRateLimiter(100, 1)
+    await limiter.acquire()
+    order: list[str] = []
+
+    tasks = await start_waiters(limiter, order, [(str(number), RequestPriority.BACKGROUND) for number in range(5)])
+    await asyncio.gather(*tasks)
+
+    assert order == ["0", "1", "2", "3", "4"]
+
+async def test_cancelled_waiter_does_not_take_token() -> None:
+    limiter = TokenBucketRateLimiter(10, 1)
+    await limiter.acquire()
+    order: list[str] = []
+
+    cancelled, waiting = await start_waiters(limiter, order, [
+        ("cancelled", RequestPriority.INTERACTIVE),
+        ("waiting", RequestPriority.INTERACTIVE),
+    ])
+    started_at = time.monotonic()
+    cancelled.cancel()
+
+    await asyncio.wait_for(waiting, timeout=1)
+    # The next token is refilled in 100ms, the cancelled waiter would make it 200ms
+    assert time.monotonic() - started_at < 0.15
+    assert order == ["waiting"]
+    assert cancelled.cancelled()
@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+from telegram.constants import MessageLimit
+
+from asu.diff import DayChanges
+from asu.timetable import Lesson, LessonGroup, Room, Subject
+import database.models as models
+from telegrambot.jobs.schedule_changes import format_notifications
+
+_MONDAY = date(2024, 10, 14)
+_GROUP = models.Group(id=1, group_id=1001, faculty_id=5, name="305с11-4")
+
+def lesson(number: int, title_length: int = 60) -> Lesson:
+    subject = Subject(f"Предмет {number} " + "x" * title_length, "лек.", None, (LessonGroup(1001, 5, "305с11-4"),),
+                      (), Room("пр. Ленина 61", "Л", str(number)))
+    return Lesson(str(number % 8 + 1), "08:00", "09:30", subject)
+
+def test_short_changes_are_one_message() -> None:
+    assert len(format_notifications(_GROUP, [DayChanges(_MONDAY, added=[lesson(1)])])) == 1
+
+def test_long_changes_are_split_by_days() -> None:
+    changes = [DayChanges(_MONDAY + timedelta(days=day), added=[lesson(number) for number in range(6)],
+                          removed=[lesson(number) for number in range(10, 14)])
+               for day in range(14)]
+
+    messages = format_notifications(_GROUP, changes)
+
+    assert len(messages) > 1
+    assert all(len(message) <= MessageLimit.MAX_TEXT_LENGTH for message in messages)
+    # Every day is in one message
+    assert sum(message.count("📅") for message in messages) == len(changes)
+    assert sum(message.count("Предмет") for message in messages) == 14 * 10
+
+def test_day_too_long_for_one_message_is_split_by_lessons() -> None:
+    changes = [DayChanges(_MONDAY, removed=[lesson(number, 200) for number in range(20)],
+                          changed=[(lesson(number, 200), lesson(number + 100, 200)) for number in range(20)],
+                          added=[lesson(number + 200, 200) for number in range(20)])]
+
+    messages = format_notifications(_GROUP, changes)
+
+    assert len(messages) > 1
+    assert all(len(message) <= MessageLimit.MAX_TEXT_LENGTH for message in messages)
+    text = "\n".join(messages)
+    assert (text.count("❌"), text.count("✏️"), text.count("➕")) == (20, 20, 20)
+    assert text.rindex("❌") < text.index("✏️") < text.rindex("✏️") < text.index("➕")
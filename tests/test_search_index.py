@@ -0,0 +1,66 @@
+from asu.search_index import SearchIndex, normalize
+
+Item = tuple[int, str]
+
+def create_index(*names: str) -> SearchIndex[Item]:
+    index: SearchIndex[Item] = SearchIndex(lambda item: item[0])
+    for identity, name in enumerate(names):
+        index.add(name, (identity, name))
+    return index
+
+def names(items: list[Item]) -> list[str]:
+    return [name for _, name in items]
+
+def test_normalize() -> None:
+    # Latin lookalikes, other dashes, spaces and dots
+    assert normalize("305C11 – 4") == "305с11-4"
+    assert normalize("Пётров П.П.") == "петровпп"
+    assert normalize(" . ") == ""
+
+def test_exact_match_then_shorter_prefix_matches() -> None:
+    index = create_index("305с11-41", "305с11-4а", "305с11-4", "305с11-411", "306с11-4")
+
+    assert names(index.search("305с11-4", fuzzy=False)) == ["305с11-4", "305с11-41", "305с11-4а", "305с11-411"]
+
+def test_query_with_lookalike_letters() -> None:
+    index = create_index("305с11-4")
+
+    assert names(index.search("305c11_4", fuzzy=False)) == ["305с11-4"]
+
+def test_prefix_matches_go_before_substring_matches() -> None:
+    index = create_index("1105с11-4", "11-4м", "305с11-4")
+
+    assert names(index.search("11-4", fuzzy=False)) == ["11-4м", "305с11-4", "1105с11-4"]
+
+def test_short_query_matches_substrings() -> None:
+    index = create_index("Сидорова А.В.", "Петров П.П.", "Иванов И.И.")
+
+    assert names(index.search("ов", fuzzy=False)) == ["Иванов И.И.", "Петров П.П.", "Сидорова А.В."]
+
+def test_fuzzy_match_of_typo() -> None:
+    index = create_index("305с11-4", "205м12-1")
+
+    assert names(index.search("305с1-4", fuzzy=False)) == []
+    assert names(index.search("305с1-4")) == ["305с11-4"]
+
+def test_not_similar_keys_are_not_matched() -> None:
+    index = create_index("305с11-4")
+
+    assert index.search("история") == []
+    assert index.search("") == []
+
+def test_limit() -> None:
+    index = create_index(*(f"305с11-{number}" for number in range(10)))
+
+    assert len(index.search("305с", limit=3)) == 3
+    assert len(index.search("305с", limit=20)) == 10
+
+def test_item_with_same_identity_is_replaced() -> None:
+    index = create_index("305с11-4")
+    index.add("305с11-5", (0, "305с11-5"))
+
+    assert len(index) == 1
+    assert index.search("305с11-4", fuzzy=False) == []
+    assert names(index.search("305с11-5", fuzzy=False)) == ["305с11-5"]
+    assert index.get(0) == (0, "305с11-5")
+    assert index.get(1) is None
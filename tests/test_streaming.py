@@ -0,0 +1,69 @@
+import json
+from typing import Any
+
+import pytest
+
+from asu.streaming import JsonArraySplitter
+
+_PATH = ("schedule", "records")
+
+_RECORDS: list[dict[str, Any]] = [
+    {"lessonDate": "20241014", "lessonSubject": {"subjectTitle": "Матан"}, "lessonGroups": [{"groupId": 1}]},
+    {"title": 'quote " and backslash \\ in a string', "braces": "{[}]", "escaped": "\\\"}\\"},
+    {"unicode": "тест \\u0442", "empty": {}, "nested": {"records": [{"decoy": True}]}},
+]
+
+def split(document: bytes, chunks: list[bytes] | None = None) -> list[Any]:
+    splitter = JsonArraySplitter(_PATH)
+    elements: list[bytes] = []
+    for chunk in chunks if chunks is not None else [document]:
+        elements += splitter.feed(chunk)
+    return [json.loads(element) for element in elements]
+
+def test_splits_whole_document() -> None:
+    document = json.dumps({"schedule": {"records": _RECORDS}}).encode()
+
+    assert split(document) == _RECORDS
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_any_chunk_boundary(ensure_ascii: bool) -> None:
+    document = json.dumps({"schedule": {"records": _RECORDS}}, ensure_ascii=ensure_ascii).encode()
+
+    for position in range(1, len(document)):
+        assert split(document, [document[:position], document[position:]]) == _RECORDS, position
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+def test_small_chunks(chunk_size: int) -> None:
+    document = json.dumps({"schedule": {"records": _RECORDS}}, ensure_ascii=False).encode()
+    chunks = [document[start:start + chunk_size] for start in range(0, len(document), chunk_size)]
+
+    assert split(document, chunks) == _RECORDS
+
+def test_ignores_decoy_keys() -> None:
+    document = json.dumps({
+        "records": [{"decoy": 1}],
+        "meta": {"schedule": {"records": [{"decoy": 2}]}},
+        "schedule": {
+            "other": {"records": [{"decoy": 3}]},
+            "comment": "\"records\": [{\"decoy\": 4}]",
+            "records": _RECORDS,
+            "after": [{"decoy": 5}],
+        },
+        "tail": {"records": [{"decoy": 6}]},
+    }).encode()
+
+    assert split(document) == _RECORDS
+
+def test_key_equal_to_value_of_previous_key() -> None:
+    document = json.dumps({"schedule": {"title": "records", "records": _RECORDS}}).encode()
+
+    assert split(document) == _RECORDS
+
+def test_pretty_printed_document() -> None:
+    document = json.dumps({"schedule": {"records": _RECORDS}}, indent=4, ensure_ascii=False).encode()
+    document = document.replace(b'": ', b'" :\n\t ')
+
+    assert split(document, [document[start:start + 5] for start in range(0, len(document), 5)]) == _RECORDS
+
+def test_empty_array() -> None:
+    assert split(b'{"schedule": {"records": []}}') == []
@@ -0,0 +1,206 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Coroutine
+
+import httpx
+import pytest
+
+from asu.transport import CircuitBreaker, CircuitOpenError, CircuitState, ResilientTransport
+
+pytestmark = pytest.mark.anyio
+
+Handler = Callable[[httpx.Request], Coroutine[None, None, httpx.Response]]
+
+class Clock:
+    """Replaces time.monotonic of the circuit breaker"""
+
+    def __init__(self) -> None:
+        self.now: float = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def create_client(handler: Handler, retries: int = 2, deadline: float = 5.0,
+                  circuit_breaker: CircuitBreaker | None = None,
+                  before_attempt: Callable[[httpx.Request], Awaitable[None]] | None = None) -> httpx.AsyncClient:
+    transport = ResilientTransport(httpx.MockTransport(handler), retries, 0.0,
+                                   circuit_breaker or CircuitBreaker(100, 60.0), deadline, before_attempt)
+    return httpx.AsyncClient(transport=transport, base_url="https://asu.test")
+
+def respond(*statuses: int, headers: dict[str, str] | None = None) -> tuple[Handler, list[httpx.Request]]:
+    """Handler answering with `statuses` in order, the last one is repeated. Returns it with list of requests"""
+    requests: list[httpx.Request] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(statuses[min(len(requests), len(statuses)) - 1], headers=headers)
+
+    return handler, requests
+
+async def test_retries_retryable_status() -> None:
+    handler, requests = respond(503, 502, 200)
+
+    async with create_client(handler) as client:
+        response = await client.get("/")
+
+    assert response.status_code == 200
+    assert len(requests) == 3
+
+async def test_returns_last_response_when_retries_are_exhausted() -> None:
+    handler, requests = respond(503)
+    circuit_breaker = CircuitBreaker(1, 60.0)
+
+    async with create_client(handler, retries=2, circuit_breaker=circuit_breaker) as client:
+        response = await client.get("/")
+
+    assert response.status_code == 503
+    assert len(requests) == 3
+    assert circuit_breaker.state == CircuitState.OPEN
+
+async def test_does_not_retry_other_statuses() -> None:
+    handler, requests = respond(404)
+
+    async with create_client(handler) as client:
+        response = await client.get("/")
+
+    assert response.status_code == 404
+    assert len(requests) == 1
+
+async def test_does_not_retry_non_idempotent_requests() -> None:
+    handler, requests = respond(503, 200)
+
+    async with create_client(handler) as client:
+        response = await client.post("/")
+
+    assert response.status_code == 503
+    assert len(requests) == 1
+
+async def test_retries_transport_errors() -> None:
+    requests: list[httpx.Request] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    async with create_client(handler, retries=2) as client:
+        with pytest.raises(httpx.ConnectError):
+            await client.get("/")
+
+    assert len(requests) == 3
+
+async def test_retry_after_beyond_deadline_is_not_waited() -> None:
+    handler, requests = respond(503, 200, headers={"Retry-After": "5"})
+
+    async with create_client(handler, deadline=1.0) as client:
+        response = await client.get("/")
+
+    assert response.status_code == 503
+    assert len(requests) == 1
+
+async def test_deadline_cancels_slow_request() -> None:
+    async def handler(_request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(10)
+        return httpx.Response(200)
+
+    async with create_client(handler, deadline=0.05) as client:
+        with pytest.raises(httpx.TimeoutException):
+            await client.get("/")
+
+async def test_before_attempt_is_awaited_for_every_attempt() -> None:
+    handler, requests = respond(503, 200)
+    waited: list[httpx.Request] = []
+
+    async def before_attempt(request: httpx.Request) -> None:
+        waited.append(request)
+
+    async with create_client(handler, before_attempt=before_attempt) as client:
+        await client.get("/")
+
+    assert len(waited) == len(requests) == 2
+
+async def test_first_wait_is_not_counted_in_deadline() -> None:
+    handler, _ = respond(200)
+
+    async def before_attempt(_request: httpx.Request) -> None:
+        await asyncio.sleep(0.1)
+
+    async with create_client(handler, deadline=0.05, before_attempt=before_attempt) as client:
+        response = await client.get("/")
+
+    assert response.status_code == 200
+
+async def test_retry_wait_is_counted_in_deadline() -> None:
+    handler, requests = respond(503, 200)
+    waits = 0
+
+    async def before_attempt(_request: httpx.Request) -> None:
+        nonlocal waits
+        waits += 1
+        if waits > 1:
+            await asyncio.sleep(10)
+
+    async with create_client(handler, deadline=0.05, before_attempt=before_attempt) as client:
+        with pytest.raises(httpx.TimeoutException):
+            await client.get("/")
+
+    assert len(requests) == 1
+
+async def test_open_circuit_fails_fast() -> None:
+    handler, requests = respond(503)
+
+    async with create_client(handler, retries=0, circuit_breaker=CircuitBreaker(2, 60.0)) as client:
+        await client.get("/")
+        await client.get("/")
+
+        with pytest.raises(CircuitOpenError):
+            await client.get("/")
+
+    assert len(requests) == 2
+
+def test_circuit_opens_after_failures_in_a_row(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("asu.transport.time.monotonic", Clock())
+    circuit_breaker = CircuitBreaker(3, 60.0)
+
+    circuit_breaker.record_failure()
+    circuit_breaker.record_failure()
+    circuit_breaker.record_success()
+    circuit_breaker.record_failure()
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CircuitState.CLOSED
+
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_request()
+
+def test_half_open_circuit_closes_after_success(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = Clock()
+    monkeypatch.setattr("asu.transport.time.monotonic", clock)
+    circuit_breaker = CircuitBreaker(1, 60.0)
+    circuit_breaker.record_failure()
+
+    clock.now += 60
+    circuit_breaker.before_request()
+    assert circuit_breaker.state == CircuitState.HALF_OPEN
+    # Only the trial request is let through
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_request()
+
+    circuit_breaker.record_success()
+    assert circuit_breaker.state == CircuitState.CLOSED
+    circuit_breaker.before_request()
+
+def test_half_open_circuit_opens_after_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = Clock()
+    monkeypatch.setattr("asu.transport.time.monotonic", clock)
+    circuit_breaker = CircuitBreaker(5, 60.0)
+    for _ in range(5):
+        circuit_breaker.record_failure()
+
+    clock.now += 60
+    circuit_breaker.before_request()
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CircuitState.OPEN
+
+    clock.now += 30
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_request()
@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from telegram import Chat, Message, Update, User
+
+from telegrambot.common.update_processor import ConversationUpdateProcessor
+
+pytestmark = pytest.mark.anyio
+
+def update(update_id: int, user_id: int) -> Update:
+    message = Message(update_id, datetime.now(), Chat(user_id, Chat.PRIVATE), from_user=User(user_id, "user", False),
+                      text="/start")
+    return Update(update_id, message=message)
+
+async def test_updates_of_user_are_processed_in_order() -> None:
+    processor = ConversationUpdateProcessor(8)
+    gate = asyncio.Event()
+    order: list[int] = []
+
+    async def handle(update_id: int) -> None:
+        await gate.wait()
+        order.append(update_id)
+
+    tasks = [asyncio.create_task(processor.do_process_update(update(update_id, 1), handle(update_id)))
+             for update_id in range(5)]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(*tasks)
+
+    assert order == [0, 1, 2, 3, 4]
+
+async def test_updates_over_queue_limit_are_dropped() -> None:
+    processor = ConversationUpdateProcessor(8, max_queued_updates=2)
+    gate = asyncio.Event()
+    handled: list[tuple[int, int]] = []
+
+    async def handle(update_id: int, user_id: int) -> None:
+        await gate.wait()
+        handled.append((user_id, update_id))
+
+    tasks = [asyncio.create_task(processor.do_process_update(update(update_id, user_id), handle(update_id, user_id)))
+             for user_id in (1, 2) for update_id in range(5 if user_id == 1 else 2)]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(*tasks)
+
+    # The first update is processing, two wait and the rest are dropped. Other users are not affected
+    assert sorted(handled) == [(1, 0), (1, 1), (1, 2), (2, 0), (2, 1)]
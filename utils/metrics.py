@@ -0,0 +1,273 @@
+"""In-process metrics in Prometheus text format.
+
+Counters and histograms are updated by the code, values of callback metrics (cache stats, pool sizes)
+are read when metrics are rendered. MetricsServer serves them over HTTP for Prometheus."""
+import asyncio
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Generator, Iterable, Iterator
+from contextlib import contextmanager
+import dataclasses
+import logging
+import math
+import time
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+LabelValues = tuple[str, ...]
+
+# In seconds, from a cached lookup to a slow ASU response
+DEFAULT_BUCKETS: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+                                      30.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return f"{{{labels}}}" if labels else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric(ABC):
+    type: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labelnames: tuple[str, ...] = tuple(labelnames)
+
+    def _label_values(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[tuple[str, LabelValues, tuple[str, ...], float]]:
+        """Yields (suffix, label values, extra label pairs, value)"""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, values, extra, value in self.samples():
+            names = self.labelnames + extra[0::2]
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values + extra[1::2])} {_format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    type: str = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._label_values(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._label_values(labels), 0)
+
+    def samples(self) -> Iterator[tuple[str, LabelValues, tuple[str, ...], float]]:  # pyright: ignore[reportImplicitOverride]
+        for values, value in sorted(self._values.items()):
+            yield "_total", values, (), value
+
+class Gauge(Metric):
+    type: str = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._label_values(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._label_values(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterator[tuple[str, LabelValues, tuple[str, ...], float]]:  # pyright: ignore[reportImplicitOverride]
+        for values, value in sorted(self._values.items()):
+            yield "", values, (), value
+
+@dataclasses.dataclass
+class _HistogramValue:
+    # count of observations in each bucket, not cumulative
+    buckets: list[int]
+    sum: float = 0.0
+    count: int = 0
+
+class Histogram(Metric):
+    type: str = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets)) + (math.inf,)
+        self._values: dict[LabelValues, _HistogramValue] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        histogram = self._values.get(key)
+        if histogram is None:
+            histogram = self._values[key] = _HistogramValue([0] * len(self.buckets))
+
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                histogram.buckets[index] += 1
+                break
+
+        histogram.sum += value
+        histogram.count += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Generator[None, None, None]:
+        """Observes duration of the block, also if it raised"""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def summary(self) -> dict[LabelValues, tuple[int, float]]:
+        """Returns count and sum of observations by label values"""
+        return {values: (histogram.count, histogram.sum) for values, histogram in self._values.items()}
+
+    def samples(self) -> Iterator[tuple[str, LabelValues, tuple[str, ...], float]]:  # pyright: ignore[reportImplicitOverride]
+        for values, histogram in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram.buckets):
+                cumulative += count
+                yield "_bucket", values, ("le", _format_value(bound)), cumulative
+            yield "_sum", values, (), histogram.sum
+            yield "_count", values, (), histogram.count
+
+class CallbackMetric(Metric):
+    """Metric, whose samples are returned by callbacks when it is rendered"""
+
+    def __init__(self, name: str, documentation: str, type: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.type: str = type
+        # key -> callback returning (label values, value) pairs
+        self._callbacks: dict[str, Callable[[], Iterable[tuple[LabelValues, float]]]] = {}
+
+    def add_callback(self, key: str, callback: Callable[[], Iterable[tuple[LabelValues, float]]]) -> None:
+        """Adds source of samples, replaces previous one with the same key"""
+        self._callbacks[key] = callback
+
+    def samples(self) -> Iterator[tuple[str, LabelValues, tuple[str, ...], float]]:  # pyright: ignore[reportImplicitOverride]
+        suffix = "_total" if self.type == "counter" else ""
+        for key, callback in list(self._callbacks.items()):
+            try:
+                for values, value in callback():
+                    yield suffix, values, (), value
+            except Exception:
+                _logger.warning("Не удалось получить метрику %s (%s)", self.name, key, exc_info=True)
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} is already registered with other type or labels")
+            return existing
+
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))  # pyright: ignore[reportReturnType]
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))  # pyright: ignore[reportReturnType]
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))  # pyright: ignore[reportReturnType]
+
+    def callback_metric(self, name: str, documentation: str, type: str,
+                        labelnames: Iterable[str] = ()) -> CallbackMetric:
+        return self._register(CallbackMetric(name, documentation, type, labelnames))  # pyright: ignore[reportReturnType]
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def log(self, logger: logging.Logger = _logger) -> None:
+        """Logs counters and count with average of histograms"""
+        for metric in self._metrics.values():
+            if isinstance(metric, Histogram):
+                for values, (count, total) in sorted(metric.summary().items()):
+                    logger.info("%s%s: %d, в среднем %.1f мс", metric.name, _format_labels(metric.labelnames, values),
+                                count, total / count * 1000 if count else 0)
+            else:
+                for _, values, _, value in metric.samples():
+                    logger.info("%s%s: %s", metric.name, _format_labels(metric.labelnames, values),
+                                _format_value(value))
+
+registry = Registry()
+
+_cache_events = registry.callback_metric("cache_events", "Events of cache layers, like hits and misses", "counter",
+                                         ("cache", "event"))
+_cache_entries = registry.callback_metric("cache_entries", "Count of entries in cache layers", "gauge", ("cache",))
+
+def register_cache(cache: str, stats: object, size: Callable[[], int] | None = None) -> None:
+    """Exposes integer fields of dataclass `stats` as cache_events_total{cache, event}
+    and `size` as cache_entries{cache}"""
+    def get_events() -> list[tuple[LabelValues, float]]:
+        return [((cache, name), value) for name, value in vars(stats).items() if isinstance(value, int)]
+
+    _cache_events.add_callback(cache, get_events)
+    if size is not None:
+        _cache_entries.add_callback(cache, lambda: [((cache,), size())])
+
+class MetricsServer:
+    """Serves metrics of the registry on GET /metrics"""
+
+    def __init__(self, host: str, port: int, metrics: Registry = registry) -> None:
+        self.host: str = host
+        self.port: int = port
+        self.registry: Registry = metrics
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        _logger.info("Метрики доступны на http://%s:%d/metrics", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Skip headers
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+
+            method, path, *_ = request_line.decode("latin-1").split() + ["", ""]
+            if method == "GET" and path.split("?")[0] == "/metrics":
+                status, content_type = "200 OK", "text/plain; version=0.0.4; charset=utf-8"
+                body = self.registry.render().encode()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain; charset=utf-8", b"Not Found\n"
+
+            headers = (f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                       + "Connection: close\r\n\r\n")
+            writer.write(headers.encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
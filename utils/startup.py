@@ -0,0 +1,52 @@
+"""Durations of process startup stages, reported once the first update is handled.
+
+Import this module before others, it starts measuring on import."""
+from collections.abc import Awaitable
+import logging
+import time
+from typing import TypeVar
+
+from utils.metrics import registry
+
+T = TypeVar('T')
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+_startup_duration = registry.gauge("bot_startup_seconds", "Duration of startup stages", ("stage",))
+
+class StartupReport:
+    def __init__(self) -> None:
+        self.started_at: float = time.perf_counter()
+        # stage -> duration in seconds
+        self.stages: dict[str, float] = {}
+        self.reported: bool = False
+        self._last_mark: float = self.started_at
+
+    def mark(self, stage: str) -> None:
+        """Records time since the previous mark as duration of the stage"""
+        now = time.perf_counter()
+        self.record(stage, now - self._last_mark)
+        self._last_mark = now
+
+    def record(self, stage: str, duration: float) -> None:
+        self.stages[stage] = duration
+        _startup_duration.set(duration, stage=stage)
+
+    async def measure(self, stage: str, awaitable: Awaitable[T]) -> T:
+        """Awaits and records duration of the stage, stages can be measured concurrently"""
+        started_at = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.record(stage, time.perf_counter() - started_at)
+
+    def first_update_handled(self) -> None:
+        """Logs the report after the first handled update"""
+        if self.reported:
+            return
+
+        self.reported = True
+        self.record("first_update", time.perf_counter() - self.started_at)
+        _logger.info("Время запуска: %s", ", ".join(f"{stage} {duration:.2f} с" for stage, duration in self.stages.items()))
+
+startup = StartupReport()
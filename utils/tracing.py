@@ -0,0 +1,124 @@
+"""Lightweight tracing of updates.
+
+A trace is started for every update and kept in a context variable, so code called while handling
+the update (API client, database sessions, Bot API requests) adds spans to it without passing it around.
+Tasks created during the update copy the context and add spans to the same trace.
+Outside of a trace spans cost one context variable lookup."""
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import time
+from typing import Any
+
+# Spans after this count are only counted, so long updates don't grow the trace without limit
+MAX_SPANS: int = 256
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    # time.perf_counter() at the start
+    started_at: float
+    # in seconds, None until finished
+    duration: float | None = None
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.started_at
+
+class Trace:
+    def __init__(self, name: str, **attributes: Any) -> None:
+        self.name: str = name
+        self.attributes: dict[str, Any] = attributes
+        self.started_at: float = time.perf_counter()
+        self.duration: float | None = None
+        self.spans: list[Span] = []
+        self.dropped_spans: int = 0
+
+    def start_span(self, name: str) -> Span | None:
+        if len(self.spans) >= MAX_SPANS:
+            self.dropped_spans += 1
+            return None
+
+        span = Span(name, time.perf_counter())
+        self.spans.append(span)
+        return span
+
+    def add_span(self, name: str, started_at: float) -> None:
+        """Adds span, which started before the trace, and finishes it now.
+        The trace is extended to the start of the span"""
+        self.started_at = min(self.started_at, started_at)
+        span = self.start_span(name)
+        if span is not None:
+            span.started_at = started_at
+            span.finish()
+
+    def finish(self) -> float:
+        self.duration = time.perf_counter() - self.started_at
+        return self.duration
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns trace with spans in order of start and total time by span name, in milliseconds"""
+        totals: dict[str, float] = {}
+        spans: list[dict[str, Any]] = []
+
+        for span in self.spans:
+            duration = span.duration
+            if duration is not None:
+                totals[span.name] = totals.get(span.name, 0) + duration
+            spans.append({"name": span.name, "start_ms": round((span.started_at - self.started_at) * 1000, 1),
+                          # unfinished span, for example a task still running
+                          "duration_ms": round(duration * 1000, 1) if duration is not None else None})
+
+        return {
+            "trace": self.name,
+            **self.attributes,
+            "duration_ms": round((self.duration or 0) * 1000, 1),
+            "totals_ms": {name: round(total * 1000, 1)
+                          for name, total in sorted(totals.items(), key=lambda item: -item[1])},
+            "spans": spans,
+            "dropped_spans": self.dropped_spans,
+        }
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+
+def get_current_trace() -> Trace | None:
+    return _current_trace.get()
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Generator[Trace, None, None]:
+    """Makes a new trace current for the block and finishes it after"""
+    trace = Trace(name, **attributes)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.finish()
+        _current_trace.reset(token)
+
+def start_span(name: str) -> Span | None:
+    """Starts span in the current trace, returns None if there is no trace.
+    For code, where span() doesn't fit, like __enter__ and __exit__ of other context managers"""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+
+    return trace.start_span(name)
+
+def finish_span(span: Span | None) -> None:
+    if span is not None:
+        span.finish()
+
+@contextmanager
+def span(name: str) -> Generator[None, None, None]:
+    """Adds span of the block to the current trace"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    started = trace.start_span(name)
+    try:
+        yield
+    finally:
+        if started is not None:
+            started.finish()